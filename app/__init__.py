@@ -10,6 +10,7 @@ from flask_login import LoginManager
 from flask_migrate import Migrate
 from flask_wtf.csrf import CSRFProtect
 import os
+import click
 
 # Extensions
 db = SQLAlchemy()
@@ -34,14 +35,36 @@ def create_app(config_name=None):
         'pool_recycle': 300,
     }
     
+    # Redis (cache, invalidation)
+    app.config['REDIS_URL'] = os.environ.get('REDIS_URL', '')
+    
+    # SQL profili: örneklenecek istek oranı (0-1), N+1 için tekrar eşiği
+    app.config['SQL_PROFIL_ORAN'] = float(os.environ.get('SQL_PROFIL_ORAN', 0.01))
+    app.config['SQL_PROFIL_TEKRAR_ESIGI'] = int(os.environ.get('SQL_PROFIL_TEKRAR_ESIGI', 5))
+    
+    # Anlık bildirimler (SSE); kapalıysa arayüz polling'e döner
+    app.config['BILDIRIM_SSE'] = os.environ.get('BILDIRIM_SSE', '1') == '1'
+    
     # Upload settings
     app.config['UPLOAD_FOLDER'] = os.path.join(app.root_path, '..', 'uploads')
     app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max
     
+    # Dosya deposu (içerik adresli): yerel dizin veya S3 uyumlu (boto3 gerekir)
+    app.config['DEPOLAMA_ARKA_UCU'] = os.environ.get('DEPOLAMA_ARKA_UCU', 'yerel')
+    app.config['DEPOLAMA_X_ACCEL'] = os.environ.get('DEPOLAMA_X_ACCEL', '')
+    app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE', '0') == '1'
+    app.config['S3_BUCKET'] = os.environ.get('S3_BUCKET', '')
+    app.config['S3_ENDPOINT_URL'] = os.environ.get('S3_ENDPOINT_URL', '')
+    
     # NetGSM SMS
     app.config['NETGSM_USERCODE'] = os.environ.get('NETGSM_USERCODE', '')
     app.config['NETGSM_PASSWORD'] = os.environ.get('NETGSM_PASSWORD', '')
     app.config['NETGSM_HEADER'] = os.environ.get('NETGSM_HEADER', '')
+    app.config['NETGSM_API_URL'] = os.environ.get('NETGSM_API_URL', 'https://api.netgsm.com.tr')
+    app.config['SMS_WORKER_THREADS'] = int(os.environ.get('SMS_WORKER_THREADS', 4))
+    
+    # PDF üretimi (WeasyPrint): süreç başına worker sayısı
+    app.config['PDF_WORKER_SAYISI'] = int(os.environ.get('PDF_WORKER_SAYISI', 2))
     
     
     # Şirket Ayarları
@@ -54,6 +77,21 @@ def create_app(config_name=None):
     migrate.init_app(app, db)
     csrf.init_app(app)
     
+    from app import profiler
+    profiler.init_app(app)
+    
+    from app import bildirim
+    bildirim.init_app(app)
+    
+    from app import depolama
+    depolama.init_app(app)
+    
+    from app import pdf
+    pdf.init_app(app)
+    
+    from app import aktivite
+    aktivite.init_app(app)
+    
     # Login manager settings
     login_manager.login_view = 'core.login'
     login_manager.login_message = 'Bu sayfayı görüntülemek için giriş yapmalısınız.'
@@ -122,4 +160,104 @@ def create_app(config_name=None):
         seed_all()
         print('Örnek veriler yüklendi.')
     
+    @app.cli.command('talep-sla-kontrol')
+    @click.option('--aralik', default=0, type=int, help='Saniye; verilirse sürekli çalışır')
+    def talep_sla_kontrol(aralik):
+        """Yanıt veya çözüm süresi geçmiş talepleri SLA aşımı olarak işaretle"""
+        import time
+        from app.models.talep import sla_asimlarini_isaretle
+        while True:
+            yanit, cozum = sla_asimlarini_isaretle()
+            print(f'SLA aşımı işaretlendi: {yanit} talep yanıt, {cozum} talep çözüm.')
+            if not aralik:
+                break
+            time.sleep(aralik)
+    
+    @app.cli.command('onay-zaman-asimi')
+    @click.option('--aralik', default=0, type=int, help='Saniye; verilirse sürekli çalışır')
+    @click.option('--parti', default=500, type=int, help='Bir transaction\'da işlenecek kayıt sayısı')
+    def onay_zaman_asimi(aralik, parti):
+        """Otomatik onay süresi dolmuş kayıtları onayla veya üst yöneticiye aktar"""
+        import time
+        from app.models.onay import sureli_onaylari_isle
+        while True:
+            onaylanan, yukseltilen = sureli_onaylari_isle(parti)
+            print(f'{onaylanan} kayıt otomatik onaylandı, {yukseltilen} kayıt üst yöneticiye aktarıldı.')
+            if not aralik:
+                break
+            time.sleep(aralik)
+    
+    @app.cli.command('gorsel-turevleri')
+    @click.option('--aralik', default=0, type=int, help='Saniye; verilirse sürekli çalışır')
+    @click.option('--parti', default=20, type=int, help='Bir transaction\'da işlenecek görsel sayısı')
+    def gorsel_turevleri(aralik, parti):
+        """Yüklenen fotoğrafların küçük/orta boy türevlerini üret"""
+        import time
+        from app.gorsel import turevleri_isle
+        while True:
+            hazirlanan, hatali = turevleri_isle(parti)
+            if hazirlanan or hatali or not aralik:
+                print(f'{hazirlanan} görselin türevleri üretildi, {hatali} görsel işlenemedi.')
+            if not aralik:
+                break
+            # Kuyrukta iş kaldıysa beklemeden devam et
+            if hazirlanan + hatali < parti:
+                time.sleep(aralik)
+    
+    @app.cli.command('rapor-ozetleri')
+    @click.option('--aralik', default=0, type=int, help='Saniye; verilirse sürekli çalışır')
+    @click.option('--tam', is_flag=True, help='Başlarken tüm özetleri baştan hesapla')
+    def rapor_ozetleri(aralik, tam):
+        """Rapor özet tablolarını değişen aylar için yeniden hesapla"""
+        import time
+        from app.modules.rapor.ozet import kuyrugu_isle, tumunu_yenile
+        if tam:
+            print(f'{tumunu_yenile()} özet dilimi baştan hesaplandı.')
+        while True:
+            yenilenen = kuyrugu_isle()
+            if yenilenen or not aralik:
+                print(f'{yenilenen} özet dilimi yenilendi.')
+            if not aralik:
+                break
+            if not yenilenen:
+                time.sleep(aralik)
+    
+    @app.cli.command('sozlesme-yasam-dongusu')
+    @click.option('--aralik', default=0, type=int, help='Saniye; verilirse sürekli çalışır')
+    def sozlesme_yasam_dongusu(aralik):
+        """Süresi dolan sözleşmeleri yenile / sona erdir, bitiş pencerelerini hesapla"""
+        import time
+        from app.models.sozlesme import guncelle_sozlesme_durumlari
+        from app.modules.sozlesme.bitis import pencereleri_yenile
+        while True:
+            yenilenen, sona_eren = guncelle_sozlesme_durumlari()
+            pencereleri_yenile()
+            print(f'{yenilenen} sözleşme otomatik yenilendi, {sona_eren} sözleşme sona erdi.')
+            if not aralik:
+                break
+            time.sleep(aralik)
+    
+    @app.cli.command('tarih-filtre-plani')
+    @click.option('--satir', default=1000000, type=int, help='Geçici tabloya yüklenecek kayıt sayısı')
+    def tarih_filtre_plani(satir):
+        """Dönem filtrelerinin extract() ve aralık biçimlerinin sorgu planlarını karşılaştır"""
+        from app.modules.rapor.sorgu_plani import planlari_yaz
+        planlari_yaz(satir)
+    
+    @app.cli.command('sms-worker')
+    @click.option('--once', is_flag=True, help='Kuyruğu bir kez işle ve çık')
+    def sms_worker(once):
+        """SMS kuyruğunu gönder"""
+        from app.modules.basvuru.sms import NetgsmIstemci, SmsGonderici
+        thread_sayisi = app.config['SMS_WORKER_THREADS']
+        gonderici = SmsGonderici(
+            NetgsmIstemci.from_config(app.config, havuz_boyutu=thread_sayisi),
+            thread_sayisi=thread_sayisi
+        )
+        if once:
+            print(f'{gonderici.bir_tur()} SMS işlendi.')
+        else:
+            print(f'SMS worker başladı ({thread_sayisi} thread).')
+            gonderici.calistir()
+    
     return app
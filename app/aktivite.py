@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+TG Portal - Aktivite Logu Yazıcısı
+AktiviteLog.kaydet kaydı veritabanına yazmaz, süreç içi kuyruğa ekler;
+çağıranın transaction'ına dokunmaz ve isteğe gidiş-dönüş eklemez. Arka
+plan thread'i kuyruğu en geç AKTIVITE_ARALIK saniyede bir (kuyruk
+AKTIVITE_PARTI'ye ulaşınca hemen) partiler halinde, tek bir çok satırlı
+INSERT ile ve kendi bağlantısında yazar. Süreç kapanırken kalanlar yazılır.
+
+PostgreSQL'de aktivite_loglari tarih'e göre aylık bölümlüdür (bkz.
+migration e6f1a4c9d287). Yazıcı her ay başında sonraki ayların bölümlerini
+oluşturur; bölümü olmayan tarihler varsayılan bölüme düşer.
+"""
+
+import atexit
+import collections
+import os
+import threading
+from datetime import date, datetime
+
+from flask import current_app
+from sqlalchemy import text
+from sqlalchemy.exc import DisconnectionError, OperationalError, SQLAlchemyError
+
+from app import db
+
+
+# Önceden oluşturulan aylık bölüm sayısı (bu ay hariç)
+ILERI_BOLUM_SAYISI = 2
+
+# Bağlantı / sunucu kaynaklı, aynı partiyle tekrar denenebilecek hatalar.
+# Diğerleri (DataError, IntegrityError ...) satırın kendisinden kaynaklanır.
+GECICI_HATALAR = (OperationalError, DisconnectionError)
+
+
+def _ay_ekle(gun, ay):
+    yil, ay = divmod(gun.month - 1 + ay, 12)
+    return date(gun.year + yil, ay + 1, 1)
+
+
+def bolumleri_olustur(ileri=ILERI_BOLUM_SAYISI):
+    """
+    PostgreSQL'de bu ay ve sonraki `ileri` ay için aylık bölümleri
+    oluşturur. Dönüş: oluşturulan bölüm tablolarının adları
+    """
+    if db.engine.dialect.name != 'postgresql':
+        return []
+
+    bu_ay = datetime.utcnow().date().replace(day=1)
+    olusturulan = []
+    with db.engine.begin() as conn:
+        # Worker'lar aynı anda başlarsa tek biri oluştursun
+        conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('aktivite_bolumleri'))"))
+        for i in range(ileri + 1):
+            baslangic = _ay_ekle(bu_ay, i)
+            ad = f'aktivite_loglari_{baslangic:%Y_%m}'
+            if conn.execute(text('SELECT to_regclass(:ad)'), {'ad': ad}).scalar() is not None:
+                continue
+            conn.execute(text(
+                f"CREATE TABLE {ad} PARTITION OF aktivite_loglari "
+                f"FOR VALUES FROM ('{baslangic}') TO ('{_ay_ekle(baslangic, 1)}')"
+            ))
+            olusturulan.append(ad)
+    return olusturulan
+
+
+class AktiviteYazici:
+    """Süreç içi aktivite kuyruğu ve onu boşaltan arka plan thread'i"""
+
+    def __init__(self):
+        self._sifirla()
+        os.register_at_fork(after_in_child=self._sifirla)
+        atexit.register(self._cikista_bosalt)
+
+    def _sifirla(self):
+        # Fork sonrası: ebeveynin kuyruğu ve thread'i bu süreçte geçersiz
+        self._kilit = threading.Lock()
+        self._uyandir = threading.Event()
+        self._kuyruk = collections.deque()
+        self._atilan = 0
+        self._thread = None
+        self._app = None
+        self._bolum_ayi = None
+
+    def ekle(self, kayit):
+        """Kaydı (AktiviteLog kolonları -> değer) kuyruğa ekler"""
+        app = current_app._get_current_object()
+        with self._kilit:
+            # Veritabanı uzun süre yazılamazsa bellek sınırsız büyümesin
+            if len(self._kuyruk) >= app.config['AKTIVITE_KUYRUK_LIMIT']:
+                self._kuyruk.popleft()
+                self._atilan += 1
+            self._kuyruk.append(kayit)
+            dolu = len(self._kuyruk) >= app.config['AKTIVITE_PARTI']
+            if self._thread is None:
+                self._app = app
+                self._thread = threading.Thread(
+                    target=self._dongu, args=(app,), name='aktivite-yazici', daemon=True
+                )
+                self._thread.start()
+        if dolu:
+            self._uyandir.set()
+
+    def bekleyen_sayisi(self):
+        with self._kilit:
+            return len(self._kuyruk)
+
+    def _yaz(self, satirlar):
+        from app.models.ayarlar import AktiviteLog
+        with db.engine.begin() as conn:
+            conn.execute(AktiviteLog.__table__.insert(), satirlar)
+
+    def _geri_koy(self, satirlar):
+        # Sonraki turda tekrar denenir
+        with self._kilit:
+            self._kuyruk.extendleft(reversed(satirlar))
+
+    def _tek_tek_yaz(self, satirlar):
+        """
+        Hatalı satır yüzünden yazılamayan partiyi satır satır yazar, yazılamayan
+        satırları atar. Dönüş: (yazılan, geçici hata yüzünden yarıda kaldı mı)
+        """
+        yazilan = 0
+        for i, satir in enumerate(satirlar):
+            try:
+                self._yaz([satir])
+            except GECICI_HATALAR as e:
+                current_app.logger.error(f"Aktivite logları yazılamadı ({len(satirlar) - i} kayıt): {e}")
+                self._geri_koy(satirlar[i:])
+                return yazilan, True
+            except SQLAlchemyError as e:
+                current_app.logger.error(f"Aktivite logu atıldı ({satir.get('eylem')!r}): {e}")
+                continue
+            yazilan += 1
+        return yazilan, False
+
+    def bosalt(self):
+        """Kuyruktaki kayıtları partiler halinde yazar; yazılan kayıt sayısını döndürür"""
+        parti = current_app.config['AKTIVITE_PARTI']
+        yazilan = 0
+        while True:
+            with self._kilit:
+                satirlar = [self._kuyruk.popleft() for _ in range(min(parti, len(self._kuyruk)))]
+                atilan, self._atilan = self._atilan, 0
+            if atilan:
+                current_app.logger.warning(f"Aktivite kuyruğu doldu, {atilan} kayıt atıldı.")
+            if not satirlar:
+                return yazilan
+            try:
+                self._yaz(satirlar)
+            except GECICI_HATALAR as e:
+                current_app.logger.error(f"Aktivite logları yazılamadı ({len(satirlar)} kayıt): {e}")
+                self._geri_koy(satirlar)
+                return yazilan
+            except SQLAlchemyError as e:
+                # Tekrar denemek aynı hatayı verir ve kuyruğu kilitler
+                # Parametreler tüm partiyi içerir; sadece sürücü hatası loglanır
+                hata = getattr(e, 'orig', None) or e
+                current_app.logger.warning(f"Aktivite partisi yazılamadı, satır satır deneniyor: {hata}")
+                tek_tek, yarida = self._tek_tek_yaz(satirlar)
+                yazilan += tek_tek
+                if yarida:
+                    return yazilan
+                continue
+            yazilan += len(satirlar)
+
+    def _bolumleri_kontrol_et(self):
+        bu_ay = datetime.utcnow().date().replace(day=1)
+        if self._bolum_ayi == bu_ay:
+            return
+        try:
+            bolumleri_olustur()
+            self._bolum_ayi = bu_ay
+        except SQLAlchemyError as e:
+            current_app.logger.warning(f"Aktivite log bölümleri oluşturulamadı: {e}")
+
+    def _dongu(self, app):
+        while True:
+            self._uyandir.wait(app.config['AKTIVITE_ARALIK'])
+            self._uyandir.clear()
+            with app.app_context():
+                try:
+                    self._bolumleri_kontrol_et()
+                    self.bosalt()
+                except Exception as e:
+                    # Thread ölürse kuyruk bir daha boşalmaz
+                    app.logger.exception(f"Aktivite yazıcısı hatası: {e}")
+
+    def _cikista_bosalt(self):
+        if self._app is not None and self._kuyruk:
+            with self._app.app_context():
+                self.bosalt()
+
+
+yazici = AktiviteYazici()
+
+
+def init_app(app):
+    """Aktivite yazıcısı ayarlarını uygulamaya bağlar (create_app içinden çağrılır)"""
+    app.config.setdefault('AKTIVITE_PARTI', 500)
+    app.config.setdefault('AKTIVITE_ARALIK', 1.0)  # saniye
+    app.config.setdefault('AKTIVITE_KUYRUK_LIMIT', 50000)
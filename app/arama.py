@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+TG Portal - Metin Arama
+Çalışan, araç ve tedarikçi aramaları ILIKE '%x%' ile her tuşta tabloyu
+baştan sona tarıyordu. PostgreSQL'de bu tablolarda iki üretilmiş (generated)
+kolon bulunur (bkz. migration d4b8e2f61a93):
+
+    arama_metni    - aranan alanların Türkçe katlanmış (İ/ı -> i, ş -> s,
+                     ğ -> g ...) ve küçük harfe çevrilmiş birleşimi;
+                     pg_trgm GIN indeksiyle LIKE '%x%' ve benzerlik (%)
+    arama_vektoru  - aynı metnin 'simple' tsvector'ü; GIN indeksiyle
+                     önek eşleşmesi (ahm:* & yil:*)
+
+Aranan ifade aynı kurala göre Python tarafında katlanır; sonuçlar tam
+kelime/önek eşleşmesi ve trigram benzerliğine göre sıralanır.
+PostgreSQL dışındaki veritabanlarında ve kolonların olmadığı şemalarda
+(migration yerine `flask init-db` / db.create_all ile kurulmuş) alanlar
+üzerinde ILIKE'a düşülür.
+"""
+
+import re
+
+from flask import current_app
+from sqlalchemy import func, inspect, literal_column, or_
+
+from app import db
+
+
+# Tablo -> arama metnine giren alanlar (sıra migration ile aynı olmalı)
+ARAMA_ALANLARI = {
+    'calisanlar': ('ad', 'soyad', 'sicil_no', 'email'),
+    'araclar': ('plaka', 'marka', 'model'),
+    'tedarikciler': ('unvan', 'kisa_ad', 'vergi_no', 'yetkili_adi'),
+}
+
+# tr_normalize() SQL fonksiyonuyla aynı katlama
+TR_KAYNAK = 'İIıŞşĞğÜüÖöÇçÂâÎîÛû'
+TR_HEDEF = 'iiissgguuooccaaiiuu'
+_TR_TABLO = str.maketrans(TR_KAYNAK, TR_HEDEF)
+
+_KELIME = re.compile(r'[a-z0-9]+')
+
+# (veritabanı, tablo) -> arama kolonları var mı; şema süreç boyunca değişmez
+_arama_kolonlari = {}
+
+
+def normalize(metin):
+    """Türkçe karakterleri katlayıp küçük harfe çevirir: 'İŞÇİ Iğdır' -> 'isci igdir'"""
+    return (metin or '').translate(_TR_TABLO).lower()
+
+
+def _onek_sorgusu(metin):
+    """Kelimeleri 'ahm:* & yil:*' biçiminde tsquery metnine çevirir"""
+    return ' & '.join(f'{kelime}:*' for kelime in _KELIME.findall(metin))
+
+
+def _arama_kolonlari_var_mi(tablo):
+    """Tabloda migration'ın eklediği arama_metni / arama_vektoru kolonları var mı"""
+    anahtar = (str(db.engine.url), tablo)
+    var = _arama_kolonlari.get(anahtar)
+    if var is None:
+        kolonlar = {kolon['name'] for kolon in inspect(db.engine).get_columns(tablo)}
+        var = _arama_kolonlari[anahtar] = {'arama_metni', 'arama_vektoru'} <= kolonlar
+        if not var:
+            current_app.logger.warning(
+                f"{tablo} tablosunda arama kolonları yok, ILIKE kullanılıyor (flask db upgrade)."
+            )
+    return var
+
+
+def arama_uygula(query, model, arama):
+    """
+    Sorguya metin araması filtresini ve alaka sıralamasını ekler.
+    Sonradan eklenen order_by ifadeleri eşit alakalı satırları sıralar.
+    """
+    tablo = model.__tablename__
+    alanlar = ARAMA_ALANLARI[tablo]
+    arama = (arama or '').strip()
+    if not arama:
+        return query
+
+    if db.engine.dialect.name != 'postgresql' or not _arama_kolonlari_var_mi(tablo):
+        desen = f'%{arama}%'
+        return query.filter(or_(*(getattr(model, alan).ilike(desen) for alan in alanlar)))
+
+    metin = literal_column(f'{tablo}.arama_metni')
+    vektor = literal_column(f'{tablo}.arama_vektoru')
+    aranan = normalize(arama)
+
+    kosullar = [metin.contains(aranan, autoescape=True), metin.bool_op('%')(aranan)]
+    alaka = func.similarity(metin, aranan)
+    onek = _onek_sorgusu(aranan)
+    if onek:
+        tsquery = func.to_tsquery('simple', onek)
+        kosullar.append(vektor.bool_op('@@')(tsquery))
+        alaka = alaka + func.ts_rank(vektor, tsquery)
+
+    return query.filter(or_(*kosullar)).order_by(alaka.desc())
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+TG Portal - Anlık Bildirimler (Server-Sent Events)
+Onay, talep ataması/durumu ve yorum olayları commit sonrası yayınlanır.
+REDIS_URL tanımlıysa olaylar Redis pub/sub ile tüm worker'lara dağılır;
+her süreçte tek bir dinleyici thread'i olayları o süreçteki bağlantılara
+iletir. Redis yoksa aynı süreç içinde dağıtılır (tek node kurulumları).
+
+SSE bağlantıları uzun ömürlüdür; gunicorn'da gevent gibi non-blocking bir
+worker sınıfıyla çalıştırılmalıdır (bkz. gunicorn.conf.py).
+"""
+
+import json
+import queue
+import threading
+import time
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+import redis
+
+from app.cache import get_redis
+
+
+BILDIRIM_KANALI = 'bildirim'
+
+# Yavaş istemcinin kuyruğu dolarsa eski olaylar atılır
+KUYRUK_LIMIT = 100
+
+# Bağlantı koparsa tarayıcının yeniden bağlanma beklemesi
+YENIDEN_BAGLANMA_MS = 5000
+
+
+class Dagitici:
+    """Süreç içi abonelikler: kullanıcı id -> bağlantı kuyrukları"""
+
+    def __init__(self):
+        self._kilit = threading.Lock()
+        self._aboneler = {}
+        self._dinleyici = None
+
+    def abone_ol(self, kullanici_id):
+        kuyruk = queue.Queue(maxsize=KUYRUK_LIMIT)
+        with self._kilit:
+            self._aboneler.setdefault(kullanici_id, set()).add(kuyruk)
+        return kuyruk
+
+    def abonelikten_cik(self, kullanici_id, kuyruk):
+        with self._kilit:
+            kuyruklar = self._aboneler.get(kullanici_id)
+            if kuyruklar:
+                kuyruklar.discard(kuyruk)
+                if not kuyruklar:
+                    del self._aboneler[kullanici_id]
+
+    def baglanti_sayisi(self):
+        with self._kilit:
+            return sum(len(k) for k in self._aboneler.values())
+
+    def dagit(self, mesaj):
+        """mesaj: {'kullanicilar': [...], 'olay': str, 'veri': {...}}"""
+        with self._kilit:
+            hedefler = [
+                kuyruk
+                for kullanici_id in mesaj['kullanicilar']
+                for kuyruk in self._aboneler.get(kullanici_id, ())
+            ]
+        for kuyruk in hedefler:
+            try:
+                kuyruk.put_nowait(mesaj)
+            except queue.Full:
+                try:
+                    kuyruk.get_nowait()
+                    kuyruk.put_nowait(mesaj)
+                except (queue.Empty, queue.Full):
+                    pass
+
+    def redis_dinle(self, app):
+        """Redis kanalını dinleyen thread'i (süreç başına bir kez) başlatır"""
+        with self._kilit:
+            if self._dinleyici is not None and self._dinleyici.is_alive():
+                return
+            self._dinleyici = threading.Thread(
+                target=self._redis_dongusu, args=(app,), name='bildirim-dinleyici', daemon=True
+            )
+            self._dinleyici.start()
+
+    def _redis_dongusu(self, app):
+        # Soket zaman aşımı olmadan ayrı bir bağlantı; abonelik sürekli açık kalır
+        client = redis.Redis.from_url(app.config['REDIS_URL'], decode_responses=True)
+        while True:
+            try:
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(BILDIRIM_KANALI)
+                for ham in pubsub.listen():
+                    try:
+                        self.dagit(json.loads(ham['data']))
+                    except (ValueError, KeyError, TypeError):
+                        continue
+            except redis.RedisError as e:
+                app.logger.warning(f"Bildirim kanalı koptu, yeniden bağlanılıyor: {e}")
+                time.sleep(2)
+
+
+dagitici = Dagitici()
+
+
+def _gonder(mesajlar):
+    client = get_redis()
+    if client is not None:
+        try:
+            pipe = client.pipeline(transaction=False)
+            for mesaj in mesajlar:
+                pipe.publish(BILDIRIM_KANALI, json.dumps(mesaj, ensure_ascii=False))
+            pipe.execute()
+            return
+        except redis.RedisError as e:
+            current_app.logger.warning(f"Bildirim yayınlanamadı: {e}")
+    for mesaj in mesajlar:
+        dagitici.dagit(mesaj)
+
+
+def _mesaj(kullanici_ids, olay, veri):
+    kullanicilar = sorted({k for k in kullanici_ids if k})
+    if not kullanicilar:
+        return None
+    return {'kullanicilar': kullanicilar, 'olay': olay, 'veri': veri or {}}
+
+
+def hemen_yayinla(kullanici_ids, olay, veri=None):
+    """Olayı transaction beklemeden gönderir (commit sonrası hook'lar için)"""
+    mesaj = _mesaj(kullanici_ids, olay, veri)
+    if mesaj and has_app_context():
+        _gonder([mesaj])
+
+
+def yayinla(kullanici_ids, olay, veri=None, session=None):
+    """
+    Olayı kullanıcılara gönderir. Oturumun transaction'ı commit edilince
+    yayınlanır, rollback olursa atılır.
+    """
+    mesaj = _mesaj(kullanici_ids, olay, veri)
+    if not mesaj:
+        return
+    if session is None:
+        from app import db
+        session = db.session()
+    session.info.setdefault('bildirimler', []).append(mesaj)
+
+
+@event.listens_for(Session, 'after_commit')
+def _bildirimleri_gonder(session):
+    mesajlar = session.info.pop('bildirimler', None)
+    if mesajlar and has_app_context():
+        _gonder(mesajlar)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _bildirimleri_at(session):
+    session.info.pop('bildirimler', None)
+
+
+def olay_akisi(kullanici_id, ping_saniye, azami_saniye):
+    """
+    Kullanıcının SSE akışı. Belirli aralıkla yorum satırı (ping) gönderilir;
+    azami süre dolunca bağlantı kapanır ve tarayıcı yeniden bağlanır.
+    """
+    kuyruk = dagitici.abone_ol(kullanici_id)
+    bitis = time.monotonic() + azami_saniye
+    try:
+        yield f'retry: {YENIDEN_BAGLANMA_MS}\n\n'
+        while time.monotonic() < bitis:
+            try:
+                mesaj = kuyruk.get(timeout=ping_saniye)
+            except queue.Empty:
+                yield ': ping\n\n'
+                continue
+            veri = json.dumps(mesaj['veri'], ensure_ascii=False)
+            yield f"event: {mesaj['olay']}\ndata: {veri}\n\n"
+    finally:
+        dagitici.abonelikten_cik(kullanici_id, kuyruk)
+
+
+def init_app(app):
+    """Bildirim ayarlarını uygulamaya bağlar (create_app içinden çağrılır)"""
+    app.config.setdefault('BILDIRIM_SSE', True)
+    app.config.setdefault('BILDIRIM_PING_SANIYE', 25)
+    app.config.setdefault('BILDIRIM_AZAMI_SANIYE', 1800)
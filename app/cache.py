@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+TG Portal - Redis Cache Yardımcıları
+REDIS_URL tanımlı değilse veya Redis'e ulaşılamıyorsa None döner;
+çağıran taraf her zaman cache'siz yola düşebilmelidir.
+"""
+
+import json
+from flask import current_app
+import redis
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+_clients = {}
+
+
+def get_redis():
+    """Uygulamanın Redis istemcisini döndürür (yoksa None)"""
+    url = current_app.config.get('REDIS_URL')
+    if not url:
+        return None
+    client = _clients.get(url)
+    if client is None:
+        client = redis.Redis.from_url(
+            url,
+            socket_timeout=0.5,
+            socket_connect_timeout=0.5,
+            decode_responses=True
+        )
+        _clients[url] = client
+    return client
+
+
+def versiyon_oku(anahtar):
+    """Versiyon sayacını okur; Redis yoksa None"""
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        return int(client.get(anahtar) or 0)
+    except redis.RedisError as e:
+        current_app.logger.warning(f"Redis okunamadı ({anahtar}): {e}")
+        return None
+
+
+def versiyon_artir(anahtar):
+    """Versiyon sayacını bir artırır (cache invalidation)"""
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        return client.incr(anahtar)
+    except redis.RedisError as e:
+        current_app.logger.warning(f"Redis yazılamadı ({anahtar}): {e}")
+        return None
+
+
+def json_oku(anahtar):
+    """JSON olarak saklanan değeri okur; yoksa veya Redis erişilemezse None"""
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        deger = client.get(anahtar)
+    except redis.RedisError as e:
+        current_app.logger.warning(f"Redis okunamadı ({anahtar}): {e}")
+        return None
+    return json.loads(deger) if deger is not None else None
+
+
+def json_yaz(anahtar, deger, ttl):
+    """Değeri JSON olarak TTL ile saklar"""
+    client = get_redis()
+    if client is None:
+        return False
+    try:
+        client.setex(anahtar, ttl, json.dumps(deger, default=str))
+        return True
+    except redis.RedisError as e:
+        current_app.logger.warning(f"Redis yazılamadı ({anahtar}): {e}")
+        return False
+
+
+def anahtar_sil(*anahtarlar):
+    """Verilen anahtarları siler"""
+    client = get_redis()
+    if client is None or not anahtarlar:
+        return 0
+    try:
+        return client.delete(*anahtarlar)
+    except redis.RedisError as e:
+        current_app.logger.warning(f"Redis yazılamadı ({anahtarlar[0]}): {e}")
+        return 0
+
+
+def liste_ekle(anahtar, deger, limit):
+    """Değeri JSON olarak listenin başına ekler, listeyi `limit` elemanda tutar"""
+    client = get_redis()
+    if client is None:
+        return False
+    try:
+        pipe = client.pipeline()
+        pipe.lpush(anahtar, json.dumps(deger, default=str))
+        pipe.ltrim(anahtar, 0, limit - 1)
+        pipe.execute()
+        return True
+    except redis.RedisError as e:
+        current_app.logger.warning(f"Redis yazılamadı ({anahtar}): {e}")
+        return False
+
+
+def liste_oku(anahtar, limit=None):
+    """JSON liste elemanlarını okur; Redis yoksa veya erişilemezse None"""
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        satirlar = client.lrange(anahtar, 0, (limit or 0) - 1)
+    except redis.RedisError as e:
+        current_app.logger.warning(f"Redis okunamadı ({anahtar}): {e}")
+        return None
+    return [json.loads(s) for s in satirlar]
+
+
+# ============================================================
+# DEĞİŞİKLİK İZLEME (CACHE INVALIDATION)
+# ============================================================
+
+# Seçici dönüşü / session.info işareti: cache'in tamamı geçersiz
+TUMU = object()
+
+# (modeller, bayrak, callback, secici) kayıtları; hepsi aynı dinleyicileri paylaşır
+_izlenenler = []
+
+
+def degisiklik_izle(modeller, bayrak, callback, secici=None):
+    """
+    `modeller`den birine yazan transaction commit edilince `callback`
+    çağrılır. Flush edilen nesneler ile query.update() / delete() gibi
+    flush'tan geçmeyen toplu yazımlar izlenir; `bayrak` session.info'daki
+    işaretin adıdır. Rollback işareti siler.
+
+    `secici(session, yeni, degisen, silinen)` verilirse her flush'ta bu
+    modellere ait nesnelerle bir kez çağrılır ve None (etkisiz), TUMU veya
+    etkilenen kayıtların anahtarlarını döndürür. Commit sonrası callback
+    cache'in tamamı için argümansız, yalnızca belirli kayıtlar etkilendiyse
+    anahtar kümesiyle çağrılır. Toplu yazımlar her zaman TUMU sayılır.
+
+    Kullanım:
+        degisiklik_izle((Sozlesme, SozlesmeTipi), 'sozlesme_degisti', pencere_cache_temizle)
+        degisiklik_izle((AdayEvrak, EvrakTipi), 'evrak_degisti', evrak_durumu_cache_temizle,
+                        secici=_evrak_degisikligi)
+    """
+    _izlenenler.append((tuple(modeller), bayrak, callback, secici))
+
+
+def _isaretle(session, bayrak, anahtarlar):
+    if anahtarlar is TUMU:
+        session.info[bayrak] = TUMU
+    elif anahtarlar:
+        session.info.setdefault(bayrak, set()).update(anahtarlar)
+
+
+def _ayikla(gruplar, modeller):
+    return [obj for tip, nesneler in gruplar.items() if issubclass(tip, modeller) for obj in nesneler]
+
+
+@event.listens_for(Session, 'before_flush')
+def _flush_degisikliklerini_izle(session, flush_context, instances):
+    # Nesneler türe göre bir kez gruplanır; kayıt başına yalnızca türler taranır
+    gruplar = []
+    for kume in (session.new, session.dirty, session.deleted):
+        grup = {}
+        for obj in kume:
+            grup.setdefault(type(obj), []).append(obj)
+        gruplar.append(grup)
+    if not any(gruplar):
+        return
+
+    for modeller, bayrak, _, secici in _izlenenler:
+        if session.info.get(bayrak) is TUMU:
+            continue
+        if secici is None:
+            if any(issubclass(tip, modeller) for grup in gruplar for tip in grup):
+                session.info[bayrak] = TUMU
+            continue
+        yeni, degisen, silinen = (_ayikla(grup, modeller) for grup in gruplar)
+        if yeni or degisen or silinen:
+            _isaretle(session, bayrak, secici(session, yeni, degisen, silinen))
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _toplu_yazimlari_izle(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete
+            or orm_execute_state.is_insert):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None:
+        return
+    for modeller, bayrak, _, _ in _izlenenler:
+        if issubclass(mapper.class_, modeller):
+            orm_execute_state.session.info[bayrak] = TUMU
+
+
+@event.listens_for(Session, 'after_commit')
+def _degisenleri_bildir(session):
+    for _, bayrak, callback, _ in _izlenenler:
+        anahtarlar = session.info.pop(bayrak, None)
+        if anahtarlar is TUMU:
+            callback()
+        elif anahtarlar:
+            callback(anahtarlar)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _degisiklik_isaretlerini_temizle(session):
+    for _, bayrak, _, _ in _izlenenler:
+        session.info.pop(bayrak, None)
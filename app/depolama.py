@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+"""
+TG Portal - İçerik Adresli Dosya Deposu
+Yüklenen dosya parça parça geçici dosyaya yazılırken SHA-256 özeti
+hesaplanır; içerik depoda özetinin altında tek kez saklanır. Aynı PDF veya
+fotoğraf yüzlerce kez yüklense de diskte bir kopyası olur. Modül kayıtları
+dosya_yolu alanında 'sha256:<özet>' tutar.
+
+Arka uç DEPOLAMA_ARKA_UCU ile seçilir: 'yerel' (dizin) veya 's3'
+(S3 uyumlu; boto3 gerekir). Yerel depoda sunum, özet üzerinden güçlü ETag
+ve Range desteğiyle yapılır; DEPOLAMA_X_ACCEL (nginx internal location)
+veya USE_X_SENDFILE ayarlıysa dosyayı web sunucusu gönderir.
+
+Eski (içerik adreslemesiz) yollar olduğu gibi okunup sunulmaya devam eder.
+"""
+
+import hashlib
+import io
+import mimetypes
+import os
+import tempfile
+from urllib.parse import quote
+
+from flask import current_app, redirect, request, send_file
+from sqlalchemy.exc import IntegrityError
+from werkzeug.utils import send_file as _werkzeug_send_file
+
+from app import db
+from app.models.dosya import Dosya, DOSYA_YOL_ONEKI
+
+
+# Akış sırasında okunan parça boyutu
+PARCA_BOYUTU = 64 * 1024
+
+
+def _alt_yol(ozet):
+    """Özeti iki seviyeli dizinlere böler: ab/cd/abcd..."""
+    return f'{ozet[:2]}/{ozet[2:4]}/{ozet}'
+
+
+class YerelDepo:
+    """Blob'ları bir dizin altında <kök>/ab/cd/<özet> olarak saklar"""
+
+    def __init__(self, kok):
+        self.kok = os.path.abspath(kok)
+
+    def yol(self, ozet):
+        return os.path.join(self.kok, *_alt_yol(ozet).split('/'))
+
+    def gecici_dosya(self):
+        # Aynı dosya sisteminde: yerine koyma atomik bir rename olur
+        gecici_dizin = os.path.join(self.kok, 'tmp')
+        os.makedirs(gecici_dizin, exist_ok=True)
+        return tempfile.NamedTemporaryFile(dir=gecici_dizin, delete=False)
+
+    def var_mi(self, ozet):
+        return os.path.exists(self.yol(ozet))
+
+    def ac(self, ozet):
+        return open(self.yol(ozet), 'rb')
+
+    def koy(self, ozet, gecici_yol):
+        hedef = self.yol(ozet)
+        if os.path.exists(hedef):
+            os.remove(gecici_yol)
+            return
+        os.makedirs(os.path.dirname(hedef), exist_ok=True)
+        os.replace(gecici_yol, hedef)
+
+    def gonder(self, ozet, mimetype, download_name, as_attachment):
+        x_accel = current_app.config.get('DEPOLAMA_X_ACCEL')
+        vekil = bool(x_accel or current_app.config.get('USE_X_SENDFILE'))
+
+        response = _werkzeug_send_file(
+            self.yol(ozet),
+            request.environ,
+            mimetype=mimetype,
+            as_attachment=as_attachment,
+            download_name=download_name,
+            conditional=not vekil,
+            etag=ozet,
+            use_x_sendfile=vekil,
+            response_class=current_app.response_class,
+        )
+        if not vekil:
+            return response
+
+        # Range isteklerini web sunucusu karşılar; burada yalnızca 304 kontrolü
+        if x_accel:
+            del response.headers['X-Sendfile']
+            response.headers['X-Accel-Redirect'] = f"{x_accel.rstrip('/')}/{_alt_yol(ozet)}"
+        return response.make_conditional(request)
+
+
+class S3Depo:
+    """Blob'ları S3 uyumlu bir bucket'ta saklar; sunum imzalı URL ile yapılır"""
+
+    def __init__(self, bucket, onek='', endpoint_url=None, url_suresi=300):
+        try:
+            import boto3
+            from botocore.exceptions import ClientError
+        except ImportError:
+            raise RuntimeError("S3 depolama için boto3 paketi kurulu olmalıdır.")
+        self._client_error = ClientError
+        self.client = boto3.client('s3', endpoint_url=endpoint_url or None)
+        self.bucket = bucket
+        self.onek = onek
+        self.url_suresi = url_suresi
+
+    def anahtar(self, ozet):
+        return f'{self.onek}{_alt_yol(ozet)}'
+
+    def gecici_dosya(self):
+        return tempfile.NamedTemporaryFile(delete=False)
+
+    def var_mi(self, ozet):
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.anahtar(ozet))
+            return True
+        except self._client_error:
+            return False
+
+    def ac(self, ozet):
+        nesne = self.client.get_object(Bucket=self.bucket, Key=self.anahtar(ozet))
+        return io.BytesIO(nesne['Body'].read())
+
+    def koy(self, ozet, gecici_yol):
+        try:
+            if not self.var_mi(ozet):
+                self.client.upload_file(gecici_yol, self.bucket, self.anahtar(ozet))
+        finally:
+            os.remove(gecici_yol)
+
+    def gonder(self, ozet, mimetype, download_name, as_attachment):
+        # ETag ve Range'i S3 karşılar
+        parametreler = {
+            'Bucket': self.bucket,
+            'Key': self.anahtar(ozet),
+            'ResponseContentType': mimetype,
+        }
+        if download_name or as_attachment:
+            tur = 'attachment' if as_attachment else 'inline'
+            parametreler['ResponseContentDisposition'] = (
+                f"{tur}; filename*=UTF-8''{quote(download_name or ozet)}"
+            )
+        url = self.client.generate_presigned_url(
+            'get_object', Params=parametreler, ExpiresIn=self.url_suresi
+        )
+        return redirect(url)
+
+
+def _depo_olustur(config):
+    if config['DEPOLAMA_ARKA_UCU'] == 's3':
+        return S3Depo(
+            config['S3_BUCKET'],
+            onek=config['S3_ONEK'],
+            endpoint_url=config['S3_ENDPOINT_URL'],
+            url_suresi=config['S3_URL_SURESI'],
+        )
+    return YerelDepo(config['DEPOLAMA_KOK'])
+
+
+def get_depo():
+    """Uygulamanın depo arka ucunu döndürür"""
+    depo = current_app.extensions.get('depolama')
+    if depo is None:
+        depo = _depo_olustur(current_app.config)
+        current_app.extensions['depolama'] = depo
+    return depo
+
+
+def _ozet(yol):
+    if yol and yol.startswith(DOSYA_YOL_ONEKI):
+        return yol[len(DOSYA_YOL_ONEKI):]
+    return None
+
+
+def dosya_kaydet(dosya, turev=False):
+    """
+    Yüklenen dosyayı (FileStorage) akış halinde özetleyip depoya koyar.
+    Aynı içerik daha önce yüklendiyse mevcut kayıt döner, yeni kopya yazılmaz.
+    turev=True ise görseller küçük/orta boy türev üretimi için kuyruğa alınır
+    (bkz. app/gorsel.py).
+    Dönüş: Dosya (yol özelliği dosya_yolu alanına yazılır; commit çağırana aittir)
+    """
+    kayit = akistan_kaydet(dosya.stream, dosya.mimetype or None)
+    if turev and kayit.turev_durumu is None and (kayit.mime_tipi or '').startswith('image/'):
+        kayit.turev_durumu = 'bekliyor'
+    return kayit
+
+
+def akistan_kaydet(akis, mime_tipi=None):
+    """Okunabilir bir akışı özetleyip depoya koyar; Dosya kaydını döndürür"""
+    depo = get_depo()
+    hesap = hashlib.sha256()
+    boyut = 0
+
+    gecici = depo.gecici_dosya()
+    try:
+        with gecici:
+            while True:
+                parca = akis.read(PARCA_BOYUTU)
+                if not parca:
+                    break
+                hesap.update(parca)
+                gecici.write(parca)
+                boyut += len(parca)
+        ozet = hesap.hexdigest()
+
+        kayit = Dosya.query.filter_by(ozet=ozet).first()
+        if kayit is not None and depo.var_mi(ozet):
+            return kayit
+
+        depo.koy(ozet, gecici.name)
+    finally:
+        if os.path.exists(gecici.name):
+            os.remove(gecici.name)
+
+    if kayit is not None:
+        return kayit
+
+    # Aynı içerik eşzamanlı yüklenirse unique kısıt yarışı çözer
+    kayit = Dosya(ozet=ozet, boyut=boyut, mime_tipi=mime_tipi)
+    try:
+        with db.session.begin_nested():
+            db.session.add(kayit)
+    except IntegrityError:
+        kayit = Dosya.query.filter_by(ozet=ozet).one()
+    return kayit
+
+
+def dosya_var_mi(yol):
+    """dosya_yolu değerinin işaret ettiği içerik mevcut mu"""
+    if not yol:
+        return False
+    ozet = _ozet(yol)
+    if ozet is None:
+        return os.path.exists(yol)
+    return get_depo().var_mi(ozet)
+
+
+def dosya_sil(yol):
+    """
+    Kaydın dosyasını bırakır. İçerik adresli blob'lar başka kayıtlarca
+    paylaşılabildiği için silinmez; yalnızca eski yollar diskten kaldırılır.
+    """
+    if yol and _ozet(yol) is None and os.path.exists(yol):
+        os.remove(yol)
+
+
+def indirme_adi(yol):
+    """Adı bilinmeyen 'sha256:' dosyası için özet önekinden ve MIME tipinden indirme adı"""
+    ozet = _ozet(yol)
+    mime_tipi = db.session.query(Dosya.mime_tipi).filter_by(ozet=ozet).scalar()
+    uzanti = mimetypes.guess_extension(mime_tipi) if mime_tipi else None
+    return f'{ozet[:16]}{uzanti or ""}'
+
+
+def dosya_gonder(yol, download_name=None, as_attachment=False, mimetype=None):
+    """dosya_yolu değerindeki dosyayı istemciye gönderir (ETag + Range)"""
+    ozet = _ozet(yol)
+    if ozet is None:
+        # Eski yükleme: doğrudan diskteki yoldan
+        response = send_file(yol, mimetype=mimetype, download_name=download_name,
+                             as_attachment=as_attachment, conditional=True)
+    else:
+        if mimetype is None and download_name:
+            mimetype = mimetypes.guess_type(download_name)[0]
+        if mimetype is None:
+            kayit = Dosya.query.filter_by(ozet=ozet).first()
+            mimetype = (kayit.mime_tipi if kayit else None) or 'application/octet-stream'
+        response = get_depo().gonder(ozet, mimetype, download_name, as_attachment)
+
+    response.cache_control.private = True
+    return response
+
+
+def init_app(app):
+    """Depolama ayarlarını uygulamaya bağlar (create_app içinden çağrılır)"""
+    app.config.setdefault('DEPOLAMA_ARKA_UCU', 'yerel')
+    app.config.setdefault('DEPOLAMA_KOK', os.path.join(app.config['UPLOAD_FOLDER'], 'depo'))
+    app.config.setdefault('DEPOLAMA_X_ACCEL', '')
+    app.config.setdefault('S3_BUCKET', '')
+    app.config.setdefault('S3_ONEK', 'depo/')
+    app.config.setdefault('S3_ENDPOINT_URL', '')
+    app.config.setdefault('S3_URL_SURESI', 300)
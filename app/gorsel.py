@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+TG Portal - Görsel Türevleri
+Kaza, araç teslim/iade ve aday fotoğrafları telefon kamerası çözünürlüğünde
+yüklenir. Yüklemede dosya yalnızca kuyruğa alınır (Dosya.turev_durumu =
+'bekliyor'); arka plan worker'ı (flask gorsel-turevleri) her görsel için
+yönü düzeltilmiş, EXIF'i atılmış küçük ve orta boy türevler üretip depoya
+koyar. Sayfalar türevleri gösterir; orijinal yalnızca indirme ile sunulur.
+"""
+
+import io
+
+from flask import current_app
+from PIL import Image, ImageOps, features
+
+from app import db
+from app.depolama import akistan_kaydet, get_depo
+from app.models.dosya import Dosya, DosyaTurevi, DOSYA_YOL_ONEKI
+
+
+# Tür -> en uzun kenar (px)
+TUREVLER = {
+    'kucuk': 320,
+    'orta': 1280,
+}
+
+TUREV_KALITE = 80
+
+# Türev henüz hazır değilken sayfalara gönderilen görsel (static/ altında)
+TUREV_YER_TUTUCU = 'images/gorsel-hazirlaniyor.svg'
+
+# WebP desteği olmayan Pillow derlemelerinde JPEG'e düşülür
+TUREV_FORMATI, TUREV_MIME = ('WEBP', 'image/webp') if features.check('webp') else ('JPEG', 'image/jpeg')
+
+
+def turevleri_uret(akis):
+    """
+    Görseli açıp her tür için küçültülmüş kopyayı üretir.
+    Dönüş: {tur: (veri, genislik, yukseklik)}
+    """
+    sonuc = {}
+    with Image.open(akis) as gorsel:
+        # JPEG'i gereken en büyük boyuta yakın ölçekte çöz (tam çözünürlük açılmaz)
+        en_buyuk = max(TUREVLER.values())
+        gorsel.draft('RGB', (en_buyuk, en_buyuk))
+        # Yön EXIF'ten uygulanır; kaydederken EXIF aktarılmaz
+        gorsel = ImageOps.exif_transpose(gorsel)
+        if TUREV_FORMATI == 'JPEG' or gorsel.mode not in ('RGB', 'RGBA'):
+            saydam = TUREV_FORMATI == 'WEBP' and gorsel.has_transparency_data
+            gorsel = gorsel.convert('RGBA' if saydam else 'RGB')
+
+        for tur, kenar in sorted(TUREVLER.items(), key=lambda t: -t[1]):
+            gorsel.thumbnail((kenar, kenar), Image.LANCZOS)
+            tampon = io.BytesIO()
+            gorsel.save(tampon, TUREV_FORMATI, quality=TUREV_KALITE)
+            sonuc[tur] = (tampon.getvalue(), gorsel.width, gorsel.height)
+    return sonuc
+
+
+def turevleri_isle(parti=20):
+    """
+    Türevi bekleyen görselleri işler (PostgreSQL'de SKIP LOCKED ile; birden
+    çok worker çalışabilir). Dönüş: (hazirlanan, hatali)
+    """
+    kayitlar = Dosya.query.filter_by(turev_durumu='bekliyor').order_by(
+        Dosya.id
+    ).limit(parti).with_for_update(skip_locked=True).all()
+
+    depo = get_depo()
+    hazirlanan = hatali = 0
+    for kayit in kayitlar:
+        try:
+            with depo.ac(kayit.ozet) as akis:
+                uretilen = turevleri_uret(akis)
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            current_app.logger.warning(f"Görsel türevi üretilemedi ({kayit.ozet}): {e}")
+            kayit.turev_durumu = 'hata'
+            hatali += 1
+            continue
+
+        for tur, (veri, genislik, yukseklik) in uretilen.items():
+            turev = akistan_kaydet(io.BytesIO(veri), TUREV_MIME)
+            db.session.add(DosyaTurevi(
+                dosya_id=kayit.id, tur=tur, turev_id=turev.id,
+                genislik=genislik, yukseklik=yukseklik
+            ))
+        kayit.turev_durumu = 'hazir'
+        hazirlanan += 1
+
+    db.session.commit()
+    return hazirlanan, hatali
+
+
+def turev_yolu(yol, tur):
+    """
+    'sha256:<özet>' yolunun istenen türevinin yolunu döndürür; türev henüz
+    yoksa (veya görsel değilse) None.
+    """
+    if tur not in TUREVLER or not yol or not yol.startswith(DOSYA_YOL_ONEKI):
+        return None
+    Turev = db.aliased(Dosya)
+    ozet = db.session.query(Turev.ozet).join(
+        DosyaTurevi, DosyaTurevi.turev_id == Turev.id
+    ).join(
+        Dosya, Dosya.id == DosyaTurevi.dosya_id
+    ).filter(
+        Dosya.ozet == yol[len(DOSYA_YOL_ONEKI):],
+        DosyaTurevi.tur == tur
+    ).scalar()
+    return f'{DOSYA_YOL_ONEKI}{ozet}' if ozet else None
@@ -85,9 +85,17 @@ from app.models.talep import (
 )
 
 from app.models.ayarlar import (
-    SistemAyar, AktiviteLog, varsayilan_ayarlari_yukle
+    SistemAyar, AktiviteLog, varsayilan_ayarlari_yukle, ayarlari_getir
 )
 
+from app.models.sms import SmsIsi, SmsMesaj
+
+from app.models.sayac import BelgeSayaci, belge_no_al
+
+from app.models.dosya import Dosya, DosyaTurevi
+
+from app.models.rapor import RaporOzeti, RaporOzetKuyrugu
+
 from app.models.egitim import (
         EgitimTipi, Egitim, EgitimKatilimci, EgitimMateryali,
         CalisanZorunluEgitim, PozisyonZorunluEgitim
@@ -2,13 +2,35 @@
 """
 TG Portal - Ayarlar Modülü Modelleri
 Sistem konfigürasyonu ve genel ayarlar
+
+SistemAyar.get her çağrıda sorgu atmaz: tüm ayarlar süreç başına bir kez
+tiplerine çevrilip sözlüğe yüklenir. Sözlük en fazla saniyede bir tek bir
+versiyon sayacına (Redis; yoksa tablonun satır sayısı + son güncelleme
+zamanı) karşı doğrulanır. sistem_ayarlari'na yazan her commit sayacı
+artırır; değişiklik tüm gunicorn worker'larında bir saniye içinde görünür.
 """
 
+import json
+import time
 from datetime import datetime
+
+from flask import has_app_context
+from sqlalchemy import func
+
 from app import db
+from app.cache import degisiklik_izle, versiyon_oku, versiyon_artir
 from app.models.base import TimestampMixin
 
 
+AYAR_VERSIYON_KEY = 'ayar:versiyon'
+AYAR_KONTROL_ARALIGI = 1.0  # saniye
+
+# Süreç içi cache: tiplerine çevrilmiş {anahtar: değer}
+_ayarlar = None
+_ayar_versiyon = None
+_son_kontrol = 0.0
+
+
 class SistemAyar(db.Model, TimestampMixin):
     """Anahtar-değer bazlı sistem ayarları"""
     __tablename__ = 'sistem_ayarlari'
@@ -31,18 +53,8 @@ class SistemAyar(db.Model, TimestampMixin):
     
     @staticmethod
     def get(anahtar, varsayilan=None):
-        """Ayar değerini getir"""
-        ayar = SistemAyar.query.filter_by(anahtar=anahtar).first()
-        if ayar:
-            if ayar.tip == 'boolean':
-                return ayar.deger.lower() in ('true', '1', 'evet', 'yes')
-            elif ayar.tip == 'number':
-                try:
-                    return int(ayar.deger) if '.' not in ayar.deger else float(ayar.deger)
-                except:
-                    return varsayilan
-            return ayar.deger
-        return varsayilan
+        """Ayar değerini getir (süreç içi cache'ten)"""
+        return ayarlari_getir().get(anahtar, varsayilan)
     
     @staticmethod
     def set(anahtar, deger, kategori='genel', tip='text', aciklama=None):
@@ -89,7 +101,15 @@ class AktiviteLog(db.Model):
     ip_adresi = db.Column(db.String(50))
     user_agent = db.Column(db.String(255))
     
-    tarih = db.Column(db.DateTime, default=datetime.utcnow)
+    tarih = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    # log_liste filtreleri + tarih üzerinden keyset sayfalama
+    __table_args__ = (
+        db.Index('ix_aktivite_loglari_tarih_id', 'tarih', 'id'),
+        db.Index('ix_aktivite_loglari_eylem_tarih', 'eylem', 'tarih'),
+        db.Index('ix_aktivite_loglari_modul_tarih', 'modul', 'tarih'),
+        db.Index('ix_aktivite_loglari_kullanici_tarih', 'kullanici_id', 'tarih'),
+    )
     
     # İlişki
     kullanici = db.relationship('User', backref=db.backref('aktiviteler', lazy='dynamic'))
@@ -99,22 +119,93 @@ class AktiviteLog(db.Model):
     
     @staticmethod
     def kaydet(kullanici_id, eylem, modul=None, aciklama=None, detay=None, request=None):
-        """Aktivite kaydı oluştur"""
-        log = AktiviteLog(
-            kullanici_id=kullanici_id,
-            eylem=eylem,
-            modul=modul,
-            aciklama=aciklama,
-            detay=detay
-        )
+        """
+        Aktivite kaydını yazma kuyruğuna ekler (bkz. app/aktivite.py).
+        Çağıranın oturumuna dokunmaz; kayıt kısa süre içinde toplu yazılır.
+        """
+        from app.aktivite import yazici
+        
+        kayit = {
+            'kullanici_id': kullanici_id,
+            # Kolon uzunluklarına kırpılır; uzun değer tüm partinin yazımını bozmasın
+            'eylem': eylem[:50] if eylem else eylem,
+            'modul': modul[:50] if modul else modul,
+            'aciklama': aciklama[:255] if aciklama else aciklama,
+            'detay': detay,
+            'ip_adresi': None,
+            'user_agent': None,
+            'tarih': datetime.utcnow(),
+        }
         
         if request:
-            log.ip_adresi = request.remote_addr
-            log.user_agent = request.user_agent.string[:255] if request.user_agent else None
+            kayit['ip_adresi'] = request.remote_addr[:50] if request.remote_addr else None
+            kayit['user_agent'] = request.user_agent.string[:255] if request.user_agent else None
         
-        db.session.add(log)
-        db.session.commit()
-        return log
+        yazici.ekle(kayit)
+
+
+# ============================================================
+# AYAR CACHE'İ
+# ============================================================
+
+def _tipine_cevir(tip, deger):
+    """Ayar değerini tipine çevirir; çevrilemezse ValueError"""
+    if tip == 'boolean':
+        return (deger or '').lower() in ('true', '1', 'evet', 'yes')
+    if tip == 'number':
+        return int(deger) if '.' not in deger else float(deger)
+    if tip == 'json':
+        return json.loads(deger)
+    return deger
+
+
+def _ayarlari_yukle():
+    degerler = {}
+    for anahtar, tip, deger in db.session.query(SistemAyar.anahtar, SistemAyar.tip, SistemAyar.deger):
+        try:
+            degerler[anahtar] = _tipine_cevir(tip, deger)
+        except (TypeError, ValueError):
+            # Geçersiz değer: get() varsayılanı döndürür
+            continue
+    return degerler
+
+
+def _ayar_versiyonu():
+    versiyon = versiyon_oku(AYAR_VERSIYON_KEY)
+    if versiyon is not None:
+        return versiyon
+    # Redis yoksa tablonun kendisi: satır sayısı + son güncelleme
+    return tuple(db.session.query(func.count(SistemAyar.id), func.max(SistemAyar.updated_at)).one())
+
+
+def ayarlari_getir():
+    """
+    Tüm ayarları {anahtar: değer} olarak döndürür (değerler tiplerine
+    çevrilmiş). Versiyon en fazla AYAR_KONTROL_ARALIGI saniyede bir okunur.
+    """
+    global _ayarlar, _ayar_versiyon, _son_kontrol
+    simdi = time.monotonic()
+    if _ayarlar is not None and simdi - _son_kontrol < AYAR_KONTROL_ARALIGI:
+        return _ayarlar
+    
+    # Versiyon yüklemeden önce okunur; arada gelen değişiklik bir sonraki kontrolde alınır
+    versiyon = _ayar_versiyonu()
+    if _ayarlar is None or versiyon != _ayar_versiyon:
+        _ayarlar = _ayarlari_yukle()
+        _ayar_versiyon = versiyon
+    _son_kontrol = simdi
+    return _ayarlar
+
+
+def ayar_cache_temizle():
+    """Ayar cache'ini bu süreçte hemen, diğer worker'larda sonraki kontrolde geçersiz kılar"""
+    global _ayarlar
+    _ayarlar = None
+    if has_app_context():
+        versiyon_artir(AYAR_VERSIYON_KEY)
+
+
+degisiklik_izle((SistemAyar,), 'ayar_degisti', ayar_cache_temizle)
 
 
 # ============================================================
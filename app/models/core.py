@@ -4,9 +4,13 @@ TG Portal - Core Models (User, Role, Permission)
 """
 
 from datetime import datetime
+from itertools import chain
+from flask import g, has_app_context
+from sqlalchemy import inspect, select, union
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
 from app import db
+from app.cache import TUMU, degisiklik_izle, versiyon_oku, versiyon_artir, json_oku, json_yaz
 from app.models.base import TimestampMixin, SoftDeleteMixin
 
 
@@ -71,38 +75,17 @@ class User(db.Model, UserMixin, TimestampMixin, SoftDeleteMixin):
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
     
+    @property
+    def yetki_seti(self):
+        """Derlenmiş, cache'lenmiş yetki seti"""
+        return yetki_seti_getir(self.id)
+    
     def has_permission(self, permission_code):
         """Kullanıcının belirli bir yetkisi var mı kontrol eder"""
         # Admin her şeye erişir
         if self.is_admin:
             return True
-        
-        # Önce bireysel claims kontrol et
-        for claim in self.claims:
-            if claim.code == permission_code:
-                return True
-            # Wildcard desteği
-            if claim.code.endswith('.*'):
-                module = claim.code[:-2]
-                if permission_code.startswith(module + '.'):
-                    return True
-            if claim.code == '*':
-                return True
-        
-        # Sonra rol yetkilerini kontrol et
-        for role in self.roles:
-            for perm in role.permissions:
-                if perm.code == permission_code:
-                    return True
-                # Wildcard desteği: filo.* tüm filo yetkilerini kapsar
-                if perm.code.endswith('.*'):
-                    module = perm.code[:-2]
-                    if permission_code.startswith(module + '.'):
-                        return True
-                if perm.code == '*':  # Full access
-                    return True
-        
-        return False
+        return permission_code in self.yetki_seti
     
     def has_module_access(self, module):
         """Kullanıcının modüle erişimi var mı"""
@@ -231,3 +214,127 @@ class AuditLog(db.Model, TimestampMixin):
     
     def __repr__(self):
         return f'<AuditLog {self.action} {self.table_name}:{self.record_id}>'
+
+
+# ============================================================
+# DERLENMİŞ YETKİ SETLERİ
+# ============================================================
+
+YETKI_VERSIYON_KEY = 'yetki:versiyon'
+YETKI_CACHE_TTL = 3600  # saniye
+
+# Süreç içi cache: {user_id: (versiyon, YetkiSeti)}
+_yetki_cache = {}
+_YETKI_CACHE_LIMIT = 5000
+
+
+class YetkiSeti:
+    """
+    Kullanıcının claim + rol yetkilerinin derlenmiş, değiştirilemez hali.
+    Tam kod, 'modul.*' ve '*' kontrolleri set lookup ile yapılır.
+    """
+    __slots__ = ('kodlar', 'moduller', 'tam_yetki')
+    
+    def __init__(self, kodlar):
+        kodlar = frozenset(kodlar)
+        object.__setattr__(self, 'kodlar', kodlar)
+        object.__setattr__(self, 'moduller', frozenset(k[:-2] for k in kodlar if k.endswith('.*')))
+        object.__setattr__(self, 'tam_yetki', '*' in kodlar)
+    
+    def __setattr__(self, name, value):
+        raise AttributeError('YetkiSeti değiştirilemez')
+    
+    def __contains__(self, permission_code):
+        if self.tam_yetki or permission_code in self.kodlar:
+            return True
+        # filo.* -> 'filo.' ile başlayan tüm yetkiler
+        parcalar = permission_code.split('.')
+        for i in range(1, len(parcalar)):
+            if '.'.join(parcalar[:i]) in self.moduller:
+                return True
+        return False
+    
+    def __repr__(self):
+        return f'<YetkiSeti {len(self.kodlar)} kod>'
+
+
+def _yetki_kodlarini_yukle(user_id):
+    """Claim ve rol yetkilerini tek sorguda getirir"""
+    claim_kodlari = select(Permission.code).join(
+        user_claims, user_claims.c.permission_id == Permission.id
+    ).where(user_claims.c.user_id == user_id)
+    rol_kodlari = select(Permission.code).join(
+        role_permissions, role_permissions.c.permission_id == Permission.id
+    ).join(
+        user_roles, user_roles.c.role_id == role_permissions.c.role_id
+    ).where(user_roles.c.user_id == user_id)
+    return db.session.execute(union(claim_kodlari, rol_kodlari)).scalars().all()
+
+
+def yetki_seti_getir(user_id):
+    """
+    Kullanıcının derlenmiş yetki setini döndürür.
+    Sıra: istek (g) -> süreç cache'i -> Redis -> veritabanı.
+    Redis yoksa çalışanlar arası invalidation yapılamayacağı için
+    sadece istek boyunca cache'lenir.
+    """
+    istek_cache = g.setdefault('_yetki_setleri', {})
+    if user_id in istek_cache:
+        return istek_cache[user_id]
+    
+    if '_yetki_versiyon' not in g:
+        g._yetki_versiyon = versiyon_oku(YETKI_VERSIYON_KEY)
+    versiyon = g._yetki_versiyon
+    
+    if versiyon is None:
+        yetki_seti = YetkiSeti(_yetki_kodlarini_yukle(user_id))
+        istek_cache[user_id] = yetki_seti
+        return yetki_seti
+    
+    kayit = _yetki_cache.get(user_id)
+    if kayit and kayit[0] == versiyon:
+        istek_cache[user_id] = kayit[1]
+        return kayit[1]
+    
+    redis_key = f'yetki:{versiyon}:{user_id}'
+    kodlar = json_oku(redis_key)
+    if kodlar is None:
+        kodlar = _yetki_kodlarini_yukle(user_id)
+        json_yaz(redis_key, kodlar, YETKI_CACHE_TTL)
+    
+    yetki_seti = YetkiSeti(kodlar)
+    if len(_yetki_cache) >= _YETKI_CACHE_LIMIT:
+        _yetki_cache.clear()
+    _yetki_cache[user_id] = (versiyon, yetki_seti)
+    istek_cache[user_id] = yetki_seti
+    return yetki_seti
+
+
+def yetki_cache_temizle():
+    """Tüm kullanıcıların yetki cache'ini geçersiz kılar"""
+    _yetki_cache.clear()
+    if has_app_context():
+        g.pop('_yetki_setleri', None)
+        g.pop('_yetki_versiyon', None)
+        versiyon_artir(YETKI_VERSIYON_KEY)
+
+
+def _yetki_degisikligi(session, yeni, degisen, silinen):
+    """roles, role_permissions, user_roles veya user_claims değişecekse TUMU"""
+    if any(isinstance(obj, (Role, Permission)) for obj in chain(yeni, silinen)):
+        return TUMU
+    for obj in degisen:
+        attrs = inspect(obj).attrs
+        if isinstance(obj, User):
+            if attrs.roles.history.has_changes() or attrs.claims.history.has_changes():
+                return TUMU
+        elif isinstance(obj, Role):
+            if attrs.permissions.history.has_changes():
+                return TUMU
+        elif attrs.code.history.has_changes():
+            return TUMU
+    return None
+
+
+degisiklik_izle((User, Role, Permission), 'yetki_degisti', yetki_cache_temizle,
+                secici=_yetki_degisikligi)
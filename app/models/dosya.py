@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+TG Portal - Depolanan Dosyalar
+Yüklenen her farklı içerik bir kez, SHA-256 özetiyle saklanır (bkz.
+app/depolama.py). Bu tablo blob'un meta verisini tutar; modüllerdeki
+dosya_yolu alanları 'sha256:<özet>' biçiminde bu kayda işaret eder.
+Fotoğrafların küçük/orta boy türevleri de birer Dosya'dır; DosyaTurevi
+asıl dosyayı türevine bağlar (bkz. app/gorsel.py).
+"""
+
+from datetime import datetime
+from app import db
+
+
+DOSYA_YOL_ONEKI = 'sha256:'
+
+
+class Dosya(db.Model):
+    """İçerik adresli blob meta verisi"""
+    __tablename__ = 'dosyalar'
+
+    id = db.Column(db.Integer, primary_key=True)
+    ozet = db.Column(db.String(64), nullable=False, unique=True, index=True)  # SHA-256 (hex)
+    boyut = db.Column(db.BigInteger, nullable=False)
+    mime_tipi = db.Column(db.String(100))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Görsel türevleri: None (istenmedi), bekliyor, hazir, hata
+    turev_durumu = db.Column(db.String(20), index=True)
+
+    @property
+    def yol(self):
+        """Modül kayıtlarının dosya_yolu alanına yazılacak değer"""
+        return f'{DOSYA_YOL_ONEKI}{self.ozet}'
+
+    def __repr__(self):
+        return f'<Dosya {self.ozet[:12]} {self.boyut}>'
+
+
+class DosyaTurevi(db.Model):
+    """Bir görselin küçültülmüş türevi (EXIF'siz, yönü düzeltilmiş)"""
+    __tablename__ = 'dosya_turevleri'
+    __table_args__ = (
+        db.UniqueConstraint('dosya_id', 'tur', name='uq_dosya_turevleri_dosya_tur'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    dosya_id = db.Column(db.Integer, db.ForeignKey('dosyalar.id'), nullable=False)
+    tur = db.Column(db.String(20), nullable=False)  # kucuk, orta
+    turev_id = db.Column(db.Integer, db.ForeignKey('dosyalar.id'), nullable=False)
+    genislik = db.Column(db.Integer)
+    yukseklik = db.Column(db.Integer)
+
+    dosya = db.relationship('Dosya', foreign_keys=[dosya_id])
+    turev = db.relationship('Dosya', foreign_keys=[turev_id])
+
+    def __repr__(self):
+        return f'<DosyaTurevi {self.dosya_id} {self.tur}>'
@@ -38,6 +38,9 @@ class EgitimTipi(db.Model, TimestampMixin):
 class Egitim(db.Model, TimestampMixin, SoftDeleteMixin):
     """Eğitim oturumu - Planlanan/gerçekleşen eğitimler"""
     __tablename__ = 'egitimler'
+    __table_args__ = (
+        db.Index('ix_egitimler_baslangic_tarihi', 'baslangic_tarihi'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     egitim_tipi_id = db.Column(db.Integer, db.ForeignKey('egitim_tipleri.id'), nullable=False)
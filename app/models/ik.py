@@ -52,6 +52,10 @@ class Pozisyon(db.Model, TimestampMixin, SoftDeleteMixin):
 class Calisan(db.Model, TimestampMixin, SoftDeleteMixin, AuditMixin):
     """Çalışan modeli"""
     __tablename__ = 'calisanlar'
+    __table_args__ = (
+        # İşe alım raporu (son 12 ay)
+        db.Index('ix_calisanlar_is_deleted_ise_baslama', 'is_deleted', 'ise_baslama'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     
@@ -172,6 +176,11 @@ class Aday(db.Model, TimestampMixin, SoftDeleteMixin):
     davet_token_expires = db.Column(db.DateTime)  # Token geçerlilik süresi (72 saat)
     davet_gonderim_tarihi = db.Column(db.DateTime)  # SMS/Email gönderim zamanı
     davet_tipi = db.Column(db.String(10))  # 'sms' veya 'email'
+    
+    # ==================== SMS Teslim Durumu ====================
+    sms_durumu = db.Column(db.String(20))  # kuyrukta, gonderildi, hata
+    sms_durum_tarihi = db.Column(db.DateTime)
+    sms_hata = db.Column(db.String(255))
 
     # ==================== Telefon Doğrulama (OTP) ====================
     telefon_dogrulandi = db.Column(db.Boolean, default=False)
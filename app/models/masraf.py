@@ -41,6 +41,10 @@ class MasrafKategorisi(db.Model, TimestampMixin):
 class Masraf(db.Model, TimestampMixin, SoftDeleteMixin):
     """Ana masraf kaydı"""
     __tablename__ = 'masraflar'
+    __table_args__ = (
+        # Rapor / dashboard dönem filtreleri (app.utils.donem_kosulu)
+        db.Index('ix_masraflar_is_deleted_masraf_tarihi', 'is_deleted', 'masraf_tarihi'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     
@@ -4,8 +4,9 @@ TG Portal - Onay Sistemi Modelleri
 Dinamik onay akışları, paralel onay, yetki devri
 """
 
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from app import db
+from app.bildirim import yayinla
 from app.models.base import TimestampMixin, SoftDeleteMixin
 
 
@@ -201,7 +202,7 @@ class OnayKaydi(db.Model, TimestampMixin):
     
     # Durum
     durum = db.Column(db.String(20), default='bekliyor')
-    # Değerler: bekliyor, onaylandi, reddedildi, atlandi
+    # Değerler: bekliyor, onaylandi, reddedildi, atlandi, yukseltildi
     
     # Tarihler
     islem_tarihi = db.Column(db.DateTime)
@@ -220,7 +221,8 @@ class OnayKaydi(db.Model, TimestampMixin):
             'bekliyor': 'Bekliyor',
             'onaylandi': 'Onayladı',
             'reddedildi': 'Reddetti',
-            'atlandi': 'Atlandı'
+            'atlandi': 'Atlandı',
+            'yukseltildi': 'Üst Yöneticiye Aktarıldı'
         }
         return durum_map.get(self.durum, self.durum)
     
@@ -230,10 +232,21 @@ class OnayKaydi(db.Model, TimestampMixin):
             'bekliyor': 'warning',
             'onaylandi': 'success',
             'reddedildi': 'danger',
-            'atlandi': 'secondary'
+            'atlandi': 'secondary',
+            'yukseltildi': 'info'
         }
         return renk_map.get(self.durum, 'secondary')
     
+    __table_args__ = (
+        # Bekleyen onay sayısı / listesi onaylayıcıya göre sadece bekleyenleri tarar
+        db.Index('ix_onay_kayitlari_onaylayici_bekleyen', 'onaylayici_id', 'talep_id',
+                 postgresql_where=db.text("durum = 'bekliyor'")),
+        # Süre aşımı worker'ı eski bekleyen kayıtları tarar
+        db.Index('ix_onay_kayitlari_durum_created_at', 'durum', 'created_at'),
+        # Onaylayıcının bugün onayladıkları
+        db.Index('ix_onay_kayitlari_onaylayici_durum_islem_tarihi', 'onaylayici_id', 'durum', 'islem_tarihi'),
+    )
+    
     def __repr__(self):
         return f'<OnayKaydi Talep:{self.talep_id} Adim:{self.adim_id}>'
 
@@ -278,10 +291,180 @@ class YetkiDevri(db.Model, TimestampMixin):
         return f'<YetkiDevri {self.devreden_id} -> {self.devralan_id}>'
 
 
+# ============================================================
+# REFERANS KAYITLARI
+# ============================================================
+
+# OnayTalebi.referans_tablo -> model sınıfı adı
+REFERANS_MODELLERI = {
+    'izinler': 'Izin',
+    'masraflar': 'Masraf',
+    'satinalma_talepleri': 'SatinAlmaTalebi',
+}
+
+
+def referans_modeli(tablo):
+    """Referans tablosunun modelini döndürür (kayıtlı değilse None)"""
+    ad = REFERANS_MODELLERI.get(tablo)
+    if ad is None:
+        return None
+    for mapper in db.Model.registry.mappers:
+        if mapper.class_.__name__ == ad:
+            return mapper.class_
+    return None
+
+
+def referans_kayitlari(talepler):
+    """
+    Taleplerin referans kayıtlarını tablo başına tek sorguyla okur.
+    Dönüş: {(referans_tablo, referans_id): kayit}
+    """
+    tablolar = {}
+    for talep in talepler:
+        tablolar.setdefault(talep.referans_tablo, set()).add(talep.referans_id)
+
+    sonuc = {}
+    for tablo, ids in tablolar.items():
+        model = referans_modeli(tablo)
+        if model is None:
+            continue
+        for kayit in model.query.filter(model.id.in_(ids)):
+            sonuc[(tablo, kayit.id)] = kayit
+    return sonuc
+
+
 # ============================================================
 # ONAY SERVİS FONKSİYONLARI
 # ============================================================
 
+class OnayCozucu:
+    """
+    Bir işlem partisi boyunca onaylayıcı ve vekil çözümlemelerini saklar.
+    Talep edenlerin yönetici / departman yöneticisi bilgisi ve onaylayıcıların
+    yetki devirleri hazirla() ile toplu okunur; aynı (kullanıcı, adım tipi)
+    için ikinci kez sorgu atılmaz. Kullanıcı ile çalışan e-posta ile eşleşir.
+    """
+    
+    def __init__(self):
+        self._calisan_bilgisi = {}  # user_id -> (yonetici_user_id, departman_yoneticisi_user_id)
+        self._roller = {}           # rol adı -> user_id
+        self._devirler = {}         # devreden_id -> [YetkiDevri]
+        self._onaylayicilar = {}    # (talep_eden_id, tip, deger) -> user_id
+    
+    def hazirla(self, talep_eden_ids=(), onaylayici_ids=()):
+        self._calisan_bilgisi_oku(talep_eden_ids)
+        self._devirleri_oku(onaylayici_ids)
+        return self
+    
+    def _calisan_bilgisi_oku(self, kullanici_ids):
+        from app.models.core import User
+        from app.models.ik import Calisan, Departman
+        
+        eksik = {k for k in kullanici_ids if k and k not in self._calisan_bilgisi}
+        if not eksik:
+            return
+        calisan = db.aliased(Calisan)
+        yonetici = db.aliased(Calisan)
+        yonetici_user = db.aliased(User)
+        dep_yonetici = db.aliased(Calisan)
+        dep_yonetici_user = db.aliased(User)
+        satirlar = db.session.query(User.id, yonetici_user.id, dep_yonetici_user.id).join(
+            calisan, db.and_(calisan.email == User.email, calisan.is_deleted == False)
+        ).outerjoin(
+            yonetici, yonetici.id == calisan.yonetici_id
+        ).outerjoin(
+            yonetici_user, yonetici_user.email == yonetici.email
+        ).outerjoin(
+            Departman, Departman.id == calisan.departman_id
+        ).outerjoin(
+            dep_yonetici, dep_yonetici.id == Departman.yonetici_id
+        ).outerjoin(
+            dep_yonetici_user, dep_yonetici_user.email == dep_yonetici.email
+        ).filter(User.id.in_(eksik)).order_by(calisan.id)
+        for kullanici_id, yonetici_id, dep_yonetici_id in satirlar:
+            self._calisan_bilgisi.setdefault(kullanici_id, (yonetici_id, dep_yonetici_id))
+        for kullanici_id in eksik:
+            self._calisan_bilgisi.setdefault(kullanici_id, (None, None))
+    
+    def _devirleri_oku(self, kullanici_ids):
+        eksik = {k for k in kullanici_ids if k and k not in self._devirler}
+        if not eksik:
+            return
+        bugun = date.today()
+        for kullanici_id in eksik:
+            self._devirler[kullanici_id] = []
+        for devir in YetkiDevri.query.filter(
+            YetkiDevri.devreden_id.in_(eksik),
+            YetkiDevri.aktif == True,
+            YetkiDevri.baslangic_tarihi <= bugun,
+            YetkiDevri.bitis_tarihi >= bugun
+        ).order_by(YetkiDevri.id):
+            self._devirler[devir.devreden_id].append(devir)
+    
+    def yonetici(self, kullanici_id):
+        """Kullanıcının yöneticisinin kullanıcı id'si"""
+        self._calisan_bilgisi_oku([kullanici_id])
+        return self._calisan_bilgisi[kullanici_id][0]
+    
+    def departman_yoneticisi(self, kullanici_id):
+        """Kullanıcının departman yöneticisinin kullanıcı id'si"""
+        self._calisan_bilgisi_oku([kullanici_id])
+        return self._calisan_bilgisi[kullanici_id][1]
+    
+    def rol_kullanicisi(self, rol_adi):
+        """Belirli roldeki ilk kullanıcı (geliştirilebilir)"""
+        from app.models.core import User
+        
+        if rol_adi not in self._roller:
+            user = User.query.join(User.roles).filter_by(name=rol_adi).first()
+            self._roller[rol_adi] = user.id if user else None
+        return self._roller[rol_adi]
+    
+    def onaylayici(self, adim, talep_eden_id):
+        """Adım için onaylayıcıyı bul"""
+        tip = adim.onaylayici_tipi
+        if tip == 'kullanici':
+            return adim.onaylayici_kullanici_id
+        
+        anahtar = (talep_eden_id, tip, adim.onaylayici_rol if tip == 'rol' else None)
+        if anahtar not in self._onaylayicilar:
+            if tip == 'yonetici':
+                # Talep edenin yöneticisi
+                sonuc = self.yonetici(talep_eden_id)
+            elif tip == 'departman_yoneticisi':
+                sonuc = self.departman_yoneticisi(talep_eden_id)
+            elif tip == 'rol':
+                sonuc = self.rol_kullanicisi(adim.onaylayici_rol)
+            else:
+                sonuc = None
+            self._onaylayicilar[anahtar] = sonuc
+        return self._onaylayicilar[anahtar]
+    
+    def vekil(self, onaylayici_id, onay_tipi_id):
+        """Yetki devri varsa devralan kullanıcı"""
+        self._devirleri_oku([onaylayici_id])
+        for devir in self._devirler[onaylayici_id]:
+            # Tip kontrolü
+            if devir.tum_tipler:
+                return devir.devralan_id
+            elif devir.onay_tipi_ids and onay_tipi_id in devir.onay_tipi_ids:
+                return devir.devralan_id
+        return None
+    
+    def kayit_olustur(self, talep, adim, onaylayici_id):
+        """Onaylayıcı (varsa vekili) için bekleyen onay kaydı"""
+        vekil_id = self.vekil(onaylayici_id, talep.onay_tipi_id)
+        kayit = OnayKaydi(
+            talep_id=talep.id,
+            adim_id=adim.id,
+            onaylayici_id=vekil_id or onaylayici_id,
+            vekil_mi=vekil_id is not None,
+            asil_onaylayici_id=onaylayici_id if vekil_id else None
+        )
+        db.session.add(kayit)
+        return kayit
+
+
 class OnayServisi:
     """Onay işlemlerini yöneten servis sınıfı"""
     
@@ -319,197 +502,226 @@ class OnayServisi:
         db.session.flush()
         
         # İlk adım için onay kayıtları oluştur
-        OnayServisi._adim_kayitlari_olustur(talep, 1)
+        cozucu = OnayCozucu().hazirla(talep_eden_ids=[talep_eden_id])
+        OnayServisi._adim_kayitlari_olustur(talep, 1, cozucu=cozucu)
         
         db.session.commit()
         return talep, None
     
     @staticmethod
-    def _adim_kayitlari_olustur(talep, adim_sira):
-        """Belirli adım için onay kayıtlarını oluştur"""
-        from app.models.core import User
-        
-        adimlar = talep.akis.adimlar.filter_by(sira=adim_sira).all()
+    def _adim_kayitlari_olustur(talep, adim_sira, adimlar=None, cozucu=None):
+        """
+        Belirli adım için onay kayıtlarını oluştur (adımlar önceden okunmuşsa verilebilir).
+        cozucu: partinin paylaştığı OnayCozucu; çağıran parti için bir tane verir.
+        """
+        if adimlar is None:
+            adimlar = talep.akis.adimlar.filter_by(sira=adim_sira).all()
         
         for adim in adimlar:
-            # Onaylayıcıyı belirle
-            onaylayici_id = OnayServisi._onaylayici_bul(adim, talep.talep_eden_id)
-            
+            # Onaylayıcıyı belirle, yetki devri varsa vekile ata
+            onaylayici_id = cozucu.onaylayici(adim, talep.talep_eden_id)
             if onaylayici_id:
-                # Yetki devri kontrolü
-                vekil_id = OnayServisi._vekil_kontrol(onaylayici_id, talep.onay_tipi_id)
-                
-                kayit = OnayKaydi(
-                    talep_id=talep.id,
-                    adim_id=adim.id,
-                    onaylayici_id=vekil_id or onaylayici_id,
-                    vekil_mi=vekil_id is not None,
-                    asil_onaylayici_id=onaylayici_id if vekil_id else None
-                )
-                db.session.add(kayit)
-    
-    @staticmethod
-    def _onaylayici_bul(adim, talep_eden_id):
-        """Adım için onaylayıcıyı bul"""
-        from app.models.core import User
-        from app.models.ik import Calisan
-        
-        if adim.onaylayici_tipi == 'kullanici':
-            return adim.onaylayici_kullanici_id
-        
-        elif adim.onaylayici_tipi == 'yonetici':
-            # Talep edenin yöneticisini bul
-            calisan = Calisan.query.filter_by(user_id=talep_eden_id, is_deleted=False).first()
-            if calisan and calisan.yonetici_id:
-                yonetici = Calisan.query.get(calisan.yonetici_id)
-                return yonetici.user_id if yonetici else None
-        
-        elif adim.onaylayici_tipi == 'departman_yoneticisi':
-            calisan = Calisan.query.filter_by(user_id=talep_eden_id, is_deleted=False).first()
-            if calisan and calisan.departman and calisan.departman.yonetici_id:
-                return calisan.departman.yonetici_id
-        
-        elif adim.onaylayici_tipi == 'rol':
-            # Belirli roldeki ilk kullanıcı (geliştirilebilir)
-            user = User.query.join(User.roles).filter_by(name=adim.onaylayici_rol).first()
-            return user.id if user else None
-        
-        return None
-    
-    @staticmethod
-    def _vekil_kontrol(onaylayici_id, onay_tipi_id):
-        """Yetki devri var mı kontrol et"""
-        bugun = date.today()
-        
-        devir = YetkiDevri.query.filter(
-            YetkiDevri.devreden_id == onaylayici_id,
-            YetkiDevri.aktif == True,
-            YetkiDevri.baslangic_tarihi <= bugun,
-            YetkiDevri.bitis_tarihi >= bugun
-        ).first()
-        
-        if devir:
-            # Tip kontrolü
-            if devir.tum_tipler:
-                return devir.devralan_id
-            elif devir.onay_tipi_ids and onay_tipi_id in devir.onay_tipi_ids:
-                return devir.devralan_id
-        
-        return None
+                cozucu.kayit_olustur(talep, adim, onaylayici_id)
     
     @staticmethod
     def onayla(kayit_id, onaylayici_id, not_=None):
         """Onay kaydını onayla"""
-        kayit = OnayKaydi.query.get(kayit_id)
-        if not kayit:
-            return False, "Kayıt bulunamadı"
-        
-        if kayit.onaylayici_id != onaylayici_id:
-            return False, "Bu kaydı onaylama yetkiniz yok"
-        
-        if kayit.durum != 'bekliyor':
-            return False, "Bu kayıt zaten işlem görmüş"
-        
-        # Onayla
-        kayit.durum = 'onaylandi'
-        kayit.islem_tarihi = datetime.utcnow()
-        kayit.not_ = not_
-        
-        # Sonraki adıma geç
-        talep = kayit.talep
-        OnayServisi._sonraki_adim_kontrol(talep)
-        
-        db.session.commit()
-        return True, None
+        islenen, hatalar = OnayServisi.toplu_islem([kayit_id], onaylayici_id, 'onayla', not_)
+        return (True, None) if islenen else (False, hatalar[0][1])
     
     @staticmethod
     def reddet(kayit_id, onaylayici_id, not_=None):
         """Onay kaydını reddet"""
-        kayit = OnayKaydi.query.get(kayit_id)
-        if not kayit:
-            return False, "Kayıt bulunamadı"
-        
-        if kayit.onaylayici_id != onaylayici_id:
-            return False, "Bu kaydı reddetme yetkiniz yok"
-        
-        if kayit.durum != 'bekliyor':
-            return False, "Bu kayıt zaten işlem görmüş"
+        islenen, hatalar = OnayServisi.toplu_islem([kayit_id], onaylayici_id, 'reddet', not_)
+        return (True, None) if islenen else (False, hatalar[0][1])
+    
+    @staticmethod
+    def toplu_islem(kayit_ids, onaylayici_id, islem, not_=None, cozucu=None):
+        """
+        Seçilen onay kayıtlarını tek transaction'da onayla veya reddet.
+        Kayıtlar tek sorguda okunur, onaylanan taleplerin akışı toplu ilerletilir.
+        cozucu: birden fazla çağrı aynı OnayCozucu'yu paylaşacaksa verilir.
+        Returns: (işlenen kayıt sayısı, [(kayit_id, hata), ...])
+        """
+        fiil = 'onaylama' if islem == 'onayla' else 'reddetme'
+        kayitlar = {
+            k.id: k for k in OnayKaydi.query.filter(
+                OnayKaydi.id.in_(set(kayit_ids))
+            ).options(db.joinedload(OnayKaydi.talep))
+        }
         
-        # Reddet
-        kayit.durum = 'reddedildi'
-        kayit.islem_tarihi = datetime.utcnow()
-        kayit.not_ = not_
+        simdi = datetime.utcnow()
+        islenen = 0
+        hatalar = []
+        talepler = {}
+        for kayit_id in dict.fromkeys(kayit_ids):
+            kayit = kayitlar.get(kayit_id)
+            if not kayit:
+                hatalar.append((kayit_id, "Kayıt bulunamadı"))
+                continue
+            if kayit.onaylayici_id != onaylayici_id:
+                hatalar.append((kayit_id, f"Bu kaydı {fiil} yetkiniz yok"))
+                continue
+            if kayit.durum != 'bekliyor' or kayit.talep.durum != 'bekliyor':
+                hatalar.append((kayit_id, "Bu kayıt zaten işlem görmüş"))
+                continue
+            
+            kayit.durum = 'onaylandi' if islem == 'onayla' else 'reddedildi'
+            kayit.islem_tarihi = simdi
+            islenen += 1
+            kayit.not_ = not_
+            talep = kayit.talep
+            talepler[talep.id] = talep
+            
+            if islem == 'reddet':
+                # Talebi reddet
+                talep.durum = 'reddedildi'
+                talep.sonuc_tarihi = simdi
+                talep.sonuc_notu = not_
+                OnayServisi._sonuc_bildir(talep)
         
-        # Talebi reddet
-        talep = kayit.talep
-        talep.durum = 'reddedildi'
-        talep.sonuc_tarihi = datetime.utcnow()
-        talep.sonuc_notu = not_
+        if islem == 'onayla' and talepler:
+            # Sonraki adıma geç
+            OnayServisi._sonraki_adim_kontrol_toplu(list(talepler.values()), cozucu)
         
         db.session.commit()
-        return True, None
+        return islenen, hatalar
     
     @staticmethod
-    def _sonraki_adim_kontrol(talep):
-        """Mevcut adım tamamlandı mı, sonraki adıma geçilmeli mi kontrol et"""
-        mevcut_adim = talep.mevcut_adim
-        
-        # Mevcut adımdaki tüm kayıtlar
-        mevcut_kayitlar = talep.kayitlar.join(OnayAdimi).filter(OnayAdimi.sira == mevcut_adim).all()
-        
-        if not mevcut_kayitlar:
-            # Adım yok, talebi onayla
-            talep.durum = 'onaylandi'
-            talep.sonuc_tarihi = datetime.utcnow()
+    def _sonraki_adim_kontrol_toplu(talepler, cozucu=None):
+        """
+        Taleplerin mevcut adımlarını birlikte değerlendir.
+        Tüm taleplerin mevcut adım kayıtları tek sorguda okunur.
+        """
+        talepler = [t for t in talepler if t.durum == 'bekliyor']
+        if not talepler:
             return
         
-        # Bekleyen var mı?
-        bekleyenler = [k for k in mevcut_kayitlar if k.durum == 'bekliyor']
-        onaylananlar = [k for k in mevcut_kayitlar if k.durum == 'onaylandi']
-        
-        # Paralel onay kontrolü
-        adim = mevcut_kayitlar[0].adim
-        
-        if adim.tumu_onaymali:
-            # Tümü onaylamalı
-            if len(bekleyenler) == 0 and len(onaylananlar) == len(mevcut_kayitlar):
-                # Sonraki adıma geç
-                OnayServisi._sonraki_adima_gec(talep)
-        else:
-            # Biri onaylamalı yeterli
-            if len(onaylananlar) > 0:
-                # Diğer bekleyenleri atla
+        # Mevcut adımdaki tüm kayıtlar (üst yöneticiye aktarılanlar hariç)
+        mevcut = {}
+        for kayit in OnayKaydi.query.join(OnayKaydi.adim).join(OnayKaydi.talep).filter(
+            OnayKaydi.talep_id.in_([t.id for t in talepler]),
+            OnayAdimi.sira == OnayTalebi.mevcut_adim,
+            OnayKaydi.durum != 'yukseltildi'
+        ).options(db.contains_eager(OnayKaydi.adim)):
+            mevcut.setdefault(kayit.talep_id, []).append(kayit)
+        
+        ilerleyenler = []
+        for talep in talepler:
+            mevcut_kayitlar = mevcut.get(talep.id)
+            if not mevcut_kayitlar:
+                # Adım yok, talebi onayla
+                OnayServisi._talebi_onayla(talep)
+                continue
+            
+            # Bekleyen var mı?
+            bekleyenler = [k for k in mevcut_kayitlar if k.durum == 'bekliyor']
+            onaylananlar = [k for k in mevcut_kayitlar if k.durum == 'onaylandi']
+            
+            # Paralel onay kontrolü
+            if mevcut_kayitlar[0].adim.tumu_onaymali:
+                # Tümü onaylamalı
+                if len(bekleyenler) == 0 and len(onaylananlar) == len(mevcut_kayitlar):
+                    ilerleyenler.append(talep)
+            elif onaylananlar:
+                # Biri onaylamalı yeterli, diğer bekleyenleri atla
                 for k in bekleyenler:
                     k.durum = 'atlandi'
                     k.islem_tarihi = datetime.utcnow()
-                # Sonraki adıma geç
-                OnayServisi._sonraki_adima_gec(talep)
+                ilerleyenler.append(talep)
+        
+        if ilerleyenler:
+            OnayServisi._sonraki_adima_gec_toplu(ilerleyenler, cozucu)
     
     @staticmethod
-    def _sonraki_adima_gec(talep):
-        """Sonraki adıma geç"""
-        mevcut_adim = talep.mevcut_adim
-        
-        # Sonraki adım var mı?
-        sonraki_adim = talep.akis.adimlar.filter(OnayAdimi.sira > mevcut_adim).order_by(OnayAdimi.sira).first()
-        
-        if sonraki_adim:
-            talep.mevcut_adim = sonraki_adim.sira
-            OnayServisi._adim_kayitlari_olustur(talep, sonraki_adim.sira)
-        else:
-            # Son adımdı, talebi onayla
-            talep.durum = 'onaylandi'
-            talep.sonuc_tarihi = datetime.utcnow()
+    def _sonraki_adima_gec_toplu(talepler, cozucu=None):
+        """
+        Talepleri sonraki adıma geçir. Akış adımları tek sorguda okunur,
+        onaylayıcılar parti için bir kez çözülür.
+        """
+        cozucu = (cozucu or OnayCozucu()).hazirla(talep_eden_ids=[t.talep_eden_id for t in talepler])
+        akis_adimlari = {}
+        for adim in OnayAdimi.query.filter(
+            OnayAdimi.akis_id.in_({t.akis_id for t in talepler})
+        ).order_by(OnayAdimi.sira, OnayAdimi.id):
+            akis_adimlari.setdefault(adim.akis_id, []).append(adim)
+        
+        gecisler = []
+        for talep in talepler:
+            # Sonraki adım var mı?
+            kalan = [a for a in akis_adimlari.get(talep.akis_id, []) if a.sira > talep.mevcut_adim]
+            if kalan:
+                talep.mevcut_adim = kalan[0].sira
+                gecisler.append((talep, [a for a in kalan if a.sira == talep.mevcut_adim]))
+            else:
+                # Son adımdı, talebi onayla
+                OnayServisi._talebi_onayla(talep)
+        
+        # Yeni onaylayıcıların yetki devirlerini tek sorguda oku
+        cozucu.hazirla(onaylayici_ids=[
+            cozucu.onaylayici(adim, talep.talep_eden_id) for talep, adimlar in gecisler for adim in adimlar
+        ])
+        for talep, adimlar in gecisler:
+            OnayServisi._adim_kayitlari_olustur(talep, talep.mevcut_adim, adimlar, cozucu)
+    
+    @staticmethod
+    def _talebi_onayla(talep):
+        talep.durum = 'onaylandi'
+        talep.sonuc_tarihi = datetime.utcnow()
+        OnayServisi._sonuc_bildir(talep)
+    
+    @staticmethod
+    def _sonuc_bildir(talep):
+        """Talep sonuçlanınca talep edene anlık bildirim (commit sonrası gider)"""
+        yayinla([talep.talep_eden_id], 'onay_sonuc', {
+            'talep_id': talep.id,
+            'durum': talep.durum,
+            'durum_text': talep.durum_text
+        })
     
     @staticmethod
-    def bekleyen_onaylar(kullanici_id):
-        """Kullanıcının bekleyen onaylarını getir"""
-        return OnayKaydi.query.filter_by(
-            onaylayici_id=kullanici_id,
-            durum='bekliyor'
-        ).join(OnayTalebi).filter(
+    def bekleyen_onaylar(kullanici_id, limit=None, sonra=None):
+        """
+        Kullanıcının bekleyen onaylarını getir (talep, talep eden, tip ve adım
+        aynı sorguda yüklenir). Sıralama: acil önce, sonra talep tarihi.
+        sonra: önceki sayfanın son satırı (acil, talep_tarihi, kayit_id);
+        verilirse bu satırdan sonrakiler döner (keyset sayfalama).
+        """
+        query = OnayKaydi.query.join(OnayKaydi.talep).filter(
+            OnayKaydi.onaylayici_id == kullanici_id,
+            OnayKaydi.durum == 'bekliyor',
             OnayTalebi.durum == 'bekliyor'
-        ).order_by(OnayTalebi.acil.desc(), OnayTalebi.talep_tarihi).all()
+        ).options(
+            db.contains_eager(OnayKaydi.talep).joinedload(OnayTalebi.talep_eden),
+            db.contains_eager(OnayKaydi.talep).joinedload(OnayTalebi.onay_tipi),
+            db.joinedload(OnayKaydi.adim)
+        )
+
+        if sonra:
+            acil, talep_tarihi, kayit_id = sonra
+            ayni_grupta = db.and_(
+                OnayTalebi.acil == acil,
+                db.or_(
+                    OnayTalebi.talep_tarihi > talep_tarihi,
+                    db.and_(OnayTalebi.talep_tarihi == talep_tarihi, OnayKaydi.id > kayit_id)
+                )
+            )
+            # Acil grubu bittiyse acil olmayanların hepsi sonra gelir
+            query = query.filter(db.or_(ayni_grupta, OnayTalebi.acil == False) if acil else ayni_grupta)
+
+        query = query.order_by(OnayTalebi.acil.desc(), OnayTalebi.talep_tarihi, OnayKaydi.id)
+        if limit:
+            query = query.limit(limit)
+        return query.all()
+    
+    @staticmethod
+    def bekleyen_sayisi(kullanici_id):
+        """Kullanıcının bekleyen onay sayısı (kayıtları yüklemeden COUNT)"""
+        return db.session.query(db.func.count(OnayKaydi.id)).join(OnayTalebi).filter(
+            OnayKaydi.onaylayici_id == kullanici_id,
+            OnayKaydi.durum == 'bekliyor',
+            OnayTalebi.durum == 'bekliyor'
+        ).scalar()
     
     @staticmethod
     def kullanici_talepleri(kullanici_id, durum=None):
@@ -518,3 +730,83 @@ class OnayServisi:
         if durum:
             query = query.filter_by(durum=durum)
         return query.order_by(OnayTalebi.talep_tarihi.desc()).all()
+
+
+# ============================================================
+# SÜRE AŞIMI (otomatik onay / üst yöneticiye aktarma)
+# ============================================================
+
+SURE_ASIMI_ONAY_NOTU = 'Süre aşımı: otomatik onaylandı.'
+SURE_ASIMI_YUKSELTME_NOTU = 'Süre aşımı: üst yöneticiye aktarıldı.'
+
+
+def _sureli_kayitlari_isle(kayitlar, simdi):
+    """
+    Süresi dolmuş kayıtlar: atlanamaz adımlarda onaylayıcının yöneticisi
+    varsa kayıt ona aktarılır (süre yeniden başlar), diğerleri otomatik
+    onaylanır. Onaylanan taleplerin akışı toplu ilerletilir.
+    """
+    cozucu = OnayCozucu()
+    cozucu.hazirla(talep_eden_ids=[k.onaylayici_id for k in kayitlar if not k.adim.atlanabilir])
+    yonetici_ids = {
+        k.onaylayici_id: cozucu.yonetici(k.onaylayici_id)
+        for k in kayitlar if k.onaylayici_id and not k.adim.atlanabilir
+    }
+    cozucu.hazirla(onaylayici_ids=[y for y in yonetici_ids.values() if y])
+    onaylanan_talepler = {}
+    yukseltilen = 0
+    
+    for kayit in kayitlar:
+        yonetici_id = yonetici_ids.get(kayit.onaylayici_id) if not kayit.adim.atlanabilir else None
+        kayit.islem_tarihi = simdi
+        if yonetici_id and yonetici_id != kayit.onaylayici_id:
+            kayit.durum = 'yukseltildi'
+            kayit.not_ = SURE_ASIMI_YUKSELTME_NOTU
+            cozucu.kayit_olustur(kayit.talep, kayit.adim, yonetici_id)
+            yukseltilen += 1
+        else:
+            kayit.durum = 'onaylandi'
+            kayit.not_ = SURE_ASIMI_ONAY_NOTU
+            onaylanan_talepler[kayit.talep_id] = kayit.talep
+    
+    OnayServisi._sonraki_adim_kontrol_toplu(list(onaylanan_talepler.values()), cozucu)
+    return len(kayitlar) - yukseltilen, yukseltilen
+
+
+def sureli_onaylari_isle(parti=500, simdi=None):
+    """
+    otomatik_onay_sure'si dolmuş bekleyen onay kayıtlarını partiler halinde
+    işler; her parti tek transaction'dır.
+    Adımlar süreye göre gruplanır; her grup (durum, created_at) indeksinde
+    aralık taraması yapar, eski/işlenmiş kayıtlar taranmaz.
+    Dönüş: (onaylanan, yukseltilen)
+    """
+    simdi = simdi or datetime.utcnow()
+    
+    sure_gruplari = {}
+    for adim_id, sure in db.session.query(OnayAdimi.id, OnayAdimi.otomatik_onay_sure).filter(
+        OnayAdimi.otomatik_onay_sure > 0
+    ):
+        sure_gruplari.setdefault(sure, []).append(adim_id)
+    
+    onaylanan = yukseltilen = 0
+    for sure, adim_ids in sure_gruplari.items():
+        sinir = simdi - timedelta(hours=sure)
+        while True:
+            kayitlar = OnayKaydi.query.join(OnayKaydi.talep).filter(
+                OnayKaydi.durum == 'bekliyor',
+                OnayKaydi.created_at < sinir,
+                OnayKaydi.adim_id.in_(adim_ids),
+                OnayTalebi.durum == 'bekliyor'
+            ).options(
+                db.contains_eager(OnayKaydi.talep),
+                db.joinedload(OnayKaydi.adim)
+            ).order_by(OnayKaydi.created_at, OnayKaydi.id).limit(parti).all()
+            if not kayitlar:
+                break
+            o, y = _sureli_kayitlari_isle(kayitlar, simdi)
+            db.session.commit()
+            onaylanan += o
+            yukseltilen += y
+    
+    return onaylanan, yukseltilen
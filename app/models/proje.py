@@ -90,24 +90,7 @@ class Proje(db.Model, TimestampMixin, SoftDeleteMixin):
     kadrolar = db.relationship('HedefKadro', back_populates='proje', lazy='dynamic')
     araclar = db.relationship('Arac', backref='proje', lazy='dynamic')
     
-    @property
-    def toplam_kadro(self):
-        """Toplam hedef kadro sayısı"""
-        return db.session.query(db.func.sum(HedefKadro.hedef_sayi)).filter(
-            HedefKadro.proje_id == self.id,
-            HedefKadro.is_deleted == False
-        ).scalar() or 0
-    
-    @property
-    def mevcut_calisan(self):
-        """Projede çalışan sayısı"""
-        from app.models.ik import Calisan
-        from app.models.base import CalisanDurumu
-        return Calisan.query.join(HedefKadro).filter(
-            HedefKadro.proje_id == self.id,
-            Calisan.is_deleted == False,
-            Calisan.durum.in_([CalisanDurumu.AKTIF, CalisanDurumu.IZINLI])
-        ).count()
+    # toplam_kadro / mevcut_calisan: dosya sonunda column_property olarak tanımlı
     
     @property
     def doluluk_orani(self):
@@ -174,28 +157,12 @@ class HedefKadro(db.Model, TimestampMixin, SoftDeleteMixin):
     # SMS Doğrulama Ayarı
     sms_dogrulama_zorunlu = db.Column(db.Boolean, default=False)
     
-    @property
-    def mevcut_sayi(self):
-        """Kadroda çalışan sayısı"""
-        from app.models.ik import Calisan
-        from app.models.base import CalisanDurumu
-        return self.calisanlar.filter(
-            Calisan.is_deleted == False,
-            Calisan.durum.in_([CalisanDurumu.AKTIF, CalisanDurumu.IZINLI])
-        ).count()
+    # mevcut_sayi / bekleyen_aday_sayisi: dosya sonunda column_property olarak tanımlı
     
     @property
     def eksik_sayi(self):
         return max(0, self.hedef_sayi - self.mevcut_sayi)
     
-    @property
-    def bekleyen_aday_sayisi(self):
-        from app.models.ik import Aday
-        return self.adaylar.filter(
-            Aday.is_deleted == False,
-            Aday.durum.in_(['basvurdu', 'degerlendiriliyor', 'mulakat'])
-        ).count()
-    
     @property
     def doluluk_orani(self):
         if self.hedef_sayi == 0:
@@ -223,4 +190,89 @@ class HedefKadro(db.Model, TimestampMixin, SoftDeleteMixin):
         }
     
     def __repr__(self):
-        return f'<HedefKadro {self.pozisyon_adi} - {self.il}>'
\ No newline at end of file
+        return f'<HedefKadro {self.pozisyon_adi} - {self.il}>'
+
+
+# ============================================================
+# SAYIM KOLONLARI
+# ============================================================
+# Kadro ve proje sayıları, her nesnede ayrı COUNT/SUM sorgusu atmak yerine
+# ilişkili alt sorgu (column_property) olarak tanımlanır. Deferred oldukları
+# için tek nesnede ilk erişimde grup halinde bir kez yüklenir; listelerde
+# KADRO_SAYILARI / PROJE_SAYILARI seçenekleri ile ana SELECT'e eklenir.
+# Calisan/Aday modelleri ik modülünde olduğundan sınıflardan sonra eklenir.
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, column_property, undefer_group
+from app.models.ik import Calisan, Aday
+from app.models.base import CalisanDurumu
+
+CALISAN_AKTIF_DURUMLAR = (CalisanDurumu.AKTIF, CalisanDurumu.IZINLI)
+ADAY_BEKLEYEN_DURUMLAR = ('basvurdu', 'degerlendiriliyor', 'mulakat')
+
+HedefKadro.mevcut_sayi = column_property(
+    select(db.func.count(Calisan.id)).where(
+        Calisan.kadro_id == HedefKadro.id,
+        Calisan.is_deleted == False,
+        Calisan.durum.in_(CALISAN_AKTIF_DURUMLAR)
+    ).correlate_except(Calisan).scalar_subquery(),
+    deferred=True, group='kadro_sayilari'
+)
+
+HedefKadro.bekleyen_aday_sayisi = column_property(
+    select(db.func.count(Aday.id)).where(
+        Aday.kadro_id == HedefKadro.id,
+        Aday.is_deleted == False,
+        Aday.durum.in_(ADAY_BEKLEYEN_DURUMLAR)
+    ).correlate_except(Aday).scalar_subquery(),
+    deferred=True, group='kadro_sayilari'
+)
+
+Proje.toplam_kadro = column_property(
+    select(db.func.coalesce(db.func.sum(HedefKadro.hedef_sayi), 0)).where(
+        HedefKadro.proje_id == Proje.id,
+        HedefKadro.is_deleted == False
+    ).correlate_except(HedefKadro).scalar_subquery(),
+    deferred=True, group='proje_sayilari'
+)
+
+Proje.mevcut_calisan = column_property(
+    select(db.func.count(Calisan.id)).join(
+        HedefKadro, HedefKadro.id == Calisan.kadro_id
+    ).where(
+        HedefKadro.proje_id == Proje.id,
+        Calisan.is_deleted == False,
+        Calisan.durum.in_(CALISAN_AKTIF_DURUMLAR)
+    ).correlate_except(Calisan, HedefKadro).scalar_subquery(),
+    deferred=True, group='proje_sayilari'
+)
+
+# Liste sorgularında: HedefKadro.query.options(KADRO_SAYILARI)
+KADRO_SAYILARI = undefer_group('kadro_sayilari')
+PROJE_SAYILARI = undefer_group('proje_sayilari')
+
+
+# ============================================================
+# SAYIMLARIN TAZELENMESİ
+# ============================================================
+# Sayılar nesne başına bir kez yüklenir. Commit her şeyi zaten expire eder;
+# aynı transaction içinde çalışan, aday veya kadro flush edilince yüklenmiş
+# sayılar expire edilir ve sonraki erişim (eksik_sayi, doluluk_orani) yeniden sorgular.
+
+KADRO_SAYI_ALANLARI = ('mevcut_sayi', 'bekleyen_aday_sayisi')
+PROJE_SAYI_ALANLARI = ('toplam_kadro', 'mevcut_calisan')
+
+
+def _sayilari_expire_et(session, sinif, alanlar):
+    for obj in list(session.identity_map.values()):
+        if isinstance(obj, sinif) and alanlar[0] not in inspect(obj).unloaded:
+            session.expire(obj, alanlar)
+
+
+@event.listens_for(Session, 'after_flush')
+def _sayim_degisikligi_izle(session, flush_context):
+    tipler = {type(obj) for kume in (session.new, session.dirty, session.deleted) for obj in kume}
+    if any(issubclass(tip, (Calisan, Aday)) for tip in tipler):
+        _sayilari_expire_et(session, HedefKadro, KADRO_SAYI_ALANLARI)
+    if any(issubclass(tip, (Calisan, HedefKadro)) for tip in tipler):
+        _sayilari_expire_et(session, Proje, PROJE_SAYI_ALANLARI)
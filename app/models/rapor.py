@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+TG Portal - Rapor Özet Tabloları
+Rapor sayfaları ham tabloları her görüntülemede yeniden toplamak yerine
+aylık özetleri okur. Her satır bir kaynağın (masraf, talep ...) bir ayında
+(donem) kategori / durum / departman / öncelik kırılımının sayısı ve
+tutarıdır. Kaynak tablolara yazan her flush, etkilenen ayları
+rapor_ozet_kuyrugu'na ekler; `flask rapor-ozetleri` bu ayları yeniden
+hesaplar (bkz. app/modules/rapor/ozet.py).
+"""
+
+from datetime import date, datetime
+from app import db
+
+
+# Bu execution option'la çalışan toplu yazımlar kuyruğa kendileri yazar
+# (RaporOzetKuyrugu.aylari_ekle); ozet.py dinleyicisi kaynağın tamamını eklemez
+KUYRUGA_ELLE_YAZILIR = 'rapor_kuyruga_elle'
+
+
+class RaporOzeti(db.Model):
+    """Kaynak + ay bazında toplanmış rapor verisi"""
+    __tablename__ = 'rapor_ozetleri'
+    __table_args__ = (
+        db.Index('ix_rapor_ozetleri_kaynak_donem', 'kaynak', 'donem'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    kaynak = db.Column(db.String(30), nullable=False)  # masraf, satinalma_talebi, satinalma_siparisi, talep, calisan
+    donem = db.Column(db.Date)  # Ayın ilk günü; kaynak tarihi boşsa None
+
+    # Kırılımlar (kaynakta olmayanlar None)
+    kategori_id = db.Column(db.Integer)
+    durum = db.Column(db.String(30))
+    departman_id = db.Column(db.Integer)
+    oncelik = db.Column(db.String(20))
+
+    # Ölçüler
+    adet = db.Column(db.Integer, nullable=False, default=0)
+    tutar = db.Column(db.Numeric(14, 2))
+    sla_asim = db.Column(db.Integer)
+
+    def __repr__(self):
+        return f'<RaporOzeti {self.kaynak} {self.donem} {self.adet}>'
+
+
+class RaporOzetKuyrugu(db.Model):
+    """Yeniden hesaplanacak özet dilimleri (kaynak + ay ya da kaynağın tamamı)"""
+    __tablename__ = 'rapor_ozet_kuyrugu'
+
+    id = db.Column(db.Integer, primary_key=True)
+    kaynak = db.Column(db.String(30), nullable=False)
+    donem = db.Column(db.Date)
+    tam = db.Column(db.Boolean, nullable=False, default=False)  # kaynağın tüm ayları
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @staticmethod
+    def ekle(session, satirlar):
+        """
+        Dilimleri ({'kaynak', 'donem', 'tam'}) oturumun transaction'ında
+        kuyruğa yazar; aynı transaction'da aynı dilim bir kez yazılır
+        """
+        yazilan = session.info.setdefault('rapor_dilimleri', set())
+        yeni = [s for s in satirlar if (s['kaynak'], s['donem'], s['tam']) not in yazilan]
+        if not yeni:
+            return
+        zaman = datetime.utcnow()
+        session.connection().execute(
+            RaporOzetKuyrugu.__table__.insert(),
+            [dict(s, created_at=zaman) for s in yeni]
+        )
+        yazilan.update((s['kaynak'], s['donem'], s['tam']) for s in yeni)
+
+    @staticmethod
+    def aylari_ekle(session, kaynak, tarihler):
+        """Toplu yazımın değiştirdiği kayıtların tarihlerinden ayları kuyruğa ekler"""
+        aylar = {date(t.year, t.month, 1) if t else None for t in tarihler}
+        RaporOzetKuyrugu.ekle(session, [{'kaynak': kaynak, 'donem': ay, 'tam': False} for ay in aylar])
+
+    def __repr__(self):
+        return f'<RaporOzetKuyrugu {self.kaynak} {"tam" if self.tam else self.donem}>'
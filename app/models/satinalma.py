@@ -7,6 +7,7 @@ Talep → Teklif → Sipariş → Teslimat akışı
 from datetime import datetime, date
 from app import db
 from app.models.base import TimestampMixin, SoftDeleteMixin
+from app.models.sayac import belge_no_al
 
 
 class SatinAlmaKategorisi(db.Model, TimestampMixin):
@@ -32,6 +33,9 @@ class SatinAlmaKategorisi(db.Model, TimestampMixin):
 class SatinAlmaTalebi(db.Model, TimestampMixin, SoftDeleteMixin):
     """Satın alma talep kaydı"""
     __tablename__ = 'satinalma_talepleri'
+    __table_args__ = (
+        db.Index('ix_satinalma_talepleri_is_deleted_talep_tarihi', 'is_deleted', 'talep_tarihi'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     
@@ -132,11 +136,7 @@ class SatinAlmaTalebi(db.Model, TimestampMixin, SoftDeleteMixin):
     
     def talep_no_olustur(self):
         """Otomatik talep numarası oluştur"""
-        yil = date.today().year
-        son = SatinAlmaTalebi.query.filter(
-            SatinAlmaTalebi.talep_no.like(f'SAT-{yil}-%')
-        ).count()
-        self.talep_no = f'SAT-{yil}-{son + 1:04d}'
+        self.talep_no = belge_no_al('SAT')
     
     def __repr__(self):
         return f'<SatinAlmaTalebi {self.talep_no}>'
@@ -256,6 +256,9 @@ class TeklifKalemi(db.Model, TimestampMixin):
 class SatinAlmaSiparisi(db.Model, TimestampMixin, SoftDeleteMixin):
     """Satın alma siparişi"""
     __tablename__ = 'satinalma_siparisleri'
+    __table_args__ = (
+        db.Index('ix_satinalma_siparisleri_is_deleted_siparis_tarihi', 'is_deleted', 'siparis_tarihi'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     
@@ -310,11 +313,7 @@ class SatinAlmaSiparisi(db.Model, TimestampMixin, SoftDeleteMixin):
     
     def siparis_no_olustur(self):
         """Otomatik sipariş numarası"""
-        yil = date.today().year
-        son = SatinAlmaSiparisi.query.filter(
-            SatinAlmaSiparisi.siparis_no.like(f'SIP-{yil}-%')
-        ).count()
-        self.siparis_no = f'SIP-{yil}-{son + 1:04d}'
+        self.siparis_no = belge_no_al('SIP')
     
     def __repr__(self):
         return f'<SatinAlmaSiparisi {self.siparis_no}>'
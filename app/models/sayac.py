@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+TG Portal - Belge Numarası Sayaçları
+TLP / SAT / SIP gibi belge numaraları önek ve yıl bazında tutulan sayaç
+satırından tek bir INSERT ... ON CONFLICT DO UPDATE ... RETURNING ile alınır.
+Tabloyu saymaya gerek kalmaz, eşzamanlı oluşturmalar aynı numarayı alamaz.
+"""
+
+from datetime import date
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+
+
+class BelgeSayaci(db.Model):
+    """Önek + yıl başına son verilen belge numarası"""
+    __tablename__ = 'belge_sayaclari'
+
+    onek = db.Column(db.String(10), primary_key=True)  # TLP, SAT, SIP
+    yil = db.Column(db.Integer, primary_key=True)
+    deger = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<BelgeSayaci {self.onek}-{self.yil}: {self.deger}>'
+
+
+def _artir_sorgusu(dialect, onek, yil):
+    insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+    stmt = insert(BelgeSayaci).values(onek=onek, yil=yil, deger=1)
+    return stmt.on_conflict_do_update(
+        index_elements=[BelgeSayaci.onek, BelgeSayaci.yil],
+        set_={'deger': BelgeSayaci.deger + 1}
+    ).returning(BelgeSayaci.deger)
+
+
+def sayac_artir(onek, yil=None):
+    """
+    Önek/yıl sayacını atomik olarak bir artırıp yeni değeri döndürür.
+
+    PostgreSQL'de artış ayrı, hemen commit edilen bir bağlantıda yapılır;
+    sayaç satırının kilidi çağıranın transaction'ı boyunca tutulmaz.
+    Bu yüzden geri alınan kayıtlar numarada boşluk bırakabilir (sequence gibi).
+    """
+    yil = yil or date.today().year
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        with db.engine.begin() as conn:
+            return conn.execute(_artir_sorgusu(dialect, onek, yil)).scalar_one()
+    if dialect == 'sqlite':
+        # SQLite tek yazıcılıdır; oturumun kendi transaction'ında artırılır
+        return db.session.execute(_artir_sorgusu(dialect, onek, yil)).scalar_one()
+
+    # Diğer veritabanları: satır kilidi ile artır, yoksa oluştur
+    sayac = db.session.query(BelgeSayaci).filter_by(onek=onek, yil=yil).with_for_update().first()
+    if sayac is None:
+        sayac = BelgeSayaci(onek=onek, yil=yil, deger=0)
+        db.session.add(sayac)
+    sayac.deger += 1
+    db.session.flush()
+    return sayac.deger
+
+
+def belge_no_al(onek, yil=None):
+    """Sıradaki belge numarası: ONEK-YYYY-0001"""
+    yil = yil or date.today().year
+    return f'{onek}-{yil}-{sayac_artir(onek, yil):04d}'
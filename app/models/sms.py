@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+TG Portal - SMS Kuyruğu Modelleri
+Giden SMS'ler önce kalıcı kuyruğa yazılır, `flask sms-worker` tarafından gönderilir.
+"""
+
+from datetime import datetime
+from app import db
+from app.models.base import TimestampMixin
+
+
+class SmsIsi(db.Model, TimestampMixin):
+    """Toplu gönderim işi (ör. bir toplu davet)"""
+    __tablename__ = 'sms_isleri'
+
+    id = db.Column(db.Integer, primary_key=True)
+    aciklama = db.Column(db.String(200))
+    olusturan_id = db.Column(db.Integer, db.ForeignKey('users.id'))
+
+    # İlişkiler
+    olusturan = db.relationship('User', foreign_keys=[olusturan_id])
+    mesajlar = db.relationship('SmsMesaj', backref='sms_isi', lazy='dynamic')
+
+    def __repr__(self):
+        return f'<SmsIsi {self.id}>'
+
+    def ozet(self):
+        """Duruma göre mesaj sayıları (tek GROUP BY sorgusu)"""
+        satirlar = db.session.query(SmsMesaj.durum, db.func.count(SmsMesaj.id)).filter(
+            SmsMesaj.is_id == self.id
+        ).group_by(SmsMesaj.durum).all()
+        sayilar = {durum: sayi for durum, sayi in satirlar}
+        return {
+            'id': self.id,
+            'toplam': sum(sayilar.values()),
+            'bekliyor': sayilar.get('bekliyor', 0) + sayilar.get('gonderiliyor', 0),
+            'gonderildi': sayilar.get('gonderildi', 0),
+            'hata': sayilar.get('hata', 0),
+        }
+
+
+class SmsMesaj(db.Model, TimestampMixin):
+    """Kuyruktaki tek bir SMS"""
+    __tablename__ = 'sms_mesajlari'
+    __table_args__ = (
+        db.Index('ix_sms_mesajlari_durum_sonraki_deneme', 'durum', 'sonraki_deneme'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    is_id = db.Column(db.Integer, db.ForeignKey('sms_isleri.id'), index=True)
+    aday_id = db.Column(db.Integer, db.ForeignKey('adaylar.id'), index=True)
+
+    telefon = db.Column(db.String(20), nullable=False)  # 5XXXXXXXXX formatında
+    mesaj = db.Column(db.Text, nullable=False)
+    tip = db.Column(db.String(20), default='genel')  # davet, otp, genel
+
+    durum = db.Column(db.String(20), default='bekliyor', nullable=False)
+    # bekliyor, gonderiliyor, gonderildi, hata
+
+    deneme = db.Column(db.Integer, default=0, nullable=False)
+    sonraki_deneme = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    # 'gonderiliyor' durumunda worker kilidinin bitiş zamanıdır
+    son_gecerlilik = db.Column(db.DateTime)  # Bu zamandan sonra gönderilmez (OTP süresi)
+
+    saglayici_id = db.Column(db.String(50))  # NetGSM bulk id
+    hata = db.Column(db.String(255))
+    gonderim_tarihi = db.Column(db.DateTime)
+
+    # İlişkiler
+    aday = db.relationship('Aday', backref=db.backref('sms_mesajlari', lazy='dynamic'))
+
+    def __repr__(self):
+        return f'<SmsMesaj {self.id} {self.durum}>'
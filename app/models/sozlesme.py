@@ -5,10 +5,29 @@ Sözleşme takibi, bitiş uyarıları
 """
 
 from datetime import datetime, date, timedelta
+from sqlalchemy import cast, func, literal, or_
 from app import db
 from app.models.base import TimestampMixin, SoftDeleteMixin
 
 
+VARSAYILAN_YENILEME_AY = 12
+
+
+def kalan_gun_rengi(kalan):
+    """Bitişe kalan güne göre renk"""
+    if kalan is None:
+        return 'secondary'
+    if kalan < 0:
+        return 'dark'
+    elif kalan <= 7:
+        return 'danger'
+    elif kalan <= 15:
+        return 'warning'
+    elif kalan <= 30:
+        return 'info'
+    return 'success'
+
+
 class SozlesmeTipi(db.Model, TimestampMixin):
     """Sözleşme tipleri - Müşteri, Tedarikçi, Kira, İş vb."""
     __tablename__ = 'sozlesme_tipleri'
@@ -36,6 +55,10 @@ class SozlesmeTipi(db.Model, TimestampMixin):
 class Sozlesme(db.Model, TimestampMixin, SoftDeleteMixin):
     """Ana sözleşme kaydı"""
     __tablename__ = 'sozlesmeler'
+    __table_args__ = (
+        # Yaklaşan / süresi dolan aktif sözleşmeler
+        db.Index('ix_sozlesmeler_durum_bitis_tarihi', 'durum', 'bitis_tarihi'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     
@@ -100,7 +123,7 @@ class Sozlesme(db.Model, TimestampMixin, SoftDeleteMixin):
         if self.musteri:
             return self.musteri.ad
         elif self.tedarikci:
-            return self.tedarikci.ad
+            return self.tedarikci.unvan
         return self.diger_taraf or '-'
     
     @property
@@ -145,18 +168,7 @@ class Sozlesme(db.Model, TimestampMixin, SoftDeleteMixin):
     @property
     def kalan_gun_renk(self):
         """Kalan güne göre renk"""
-        kalan = self.kalan_gun
-        if kalan is None:
-            return 'secondary'
-        if kalan < 0:
-            return 'dark'
-        elif kalan <= 7:
-            return 'danger'
-        elif kalan <= 15:
-            return 'warning'
-        elif kalan <= 30:
-            return 'info'
-        return 'success'
+        return kalan_gun_rengi(self.kalan_gun)
     
     @property
     def sure_ay(self):
@@ -176,7 +188,7 @@ class Sozlesme(db.Model, TimestampMixin, SoftDeleteMixin):
     def yenile(self, ay=None):
         """Sözleşmeyi yenile"""
         if ay is None:
-            ay = self.yenileme_suresi_ay or 12
+            ay = self.yenileme_suresi_ay or VARSAYILAN_YENILEME_AY
         
         self.baslangic_tarihi = self.bitis_tarihi + timedelta(days=1)
         self.bitis_tarihi = self.baslangic_tarihi + timedelta(days=ay*30)
@@ -237,17 +249,41 @@ def get_sona_eren_sozlesmeler():
     ).all()
 
 
+def _gun_ekle(kolon, gun):
+    """Tarih kolonuna `gun` (sayı ya da SQL ifadesi) gün ekleyen ifade"""
+    if db.engine.dialect.name == 'sqlite':
+        return func.date(kolon, literal('+') + cast(gun, db.String) + ' days')
+    return kolon + gun
+
+
 def guncelle_sozlesme_durumlari():
-    """Süresi dolan sözleşmelerin durumunu güncelle"""
-    sona_erenler = get_sona_eren_sozlesmeler()
-    
-    for sozlesme in sona_erenler:
-        if sozlesme.otomatik_yenileme:
-            sozlesme.yenile()
-        else:
-            sozlesme.durum = 'sona_erdi'
-    
-    if sona_erenler:
-        db.session.commit()
-    
-    return len(sona_erenler)
+    """
+    Süresi dolan aktif sözleşmeleri set bazlı günceller: otomatik
+    yenilemeliler bir dönem uzatılır (Sozlesme.yenile ile aynı hesap),
+    diğerleri sona_erdi olur. Dönüş: (yenilenen, sona_eren)
+    """
+    sure_dolmus = (
+        Sozlesme.is_deleted == False,
+        Sozlesme.durum == 'aktif',
+        Sozlesme.bitis_tarihi < date.today()
+    )
+    # SET ifadeleri satırın eski değerlerini görür
+    yenileme_gun = func.coalesce(func.nullif(Sozlesme.yenileme_suresi_ay, 0), VARSAYILAN_YENILEME_AY) * 30
+    yenilenen = Sozlesme.query.filter(
+        *sure_dolmus, Sozlesme.otomatik_yenileme == True
+    ).update({
+        'baslangic_tarihi': _gun_ekle(Sozlesme.bitis_tarihi, 1),
+        'bitis_tarihi': _gun_ekle(Sozlesme.bitis_tarihi, 1 + yenileme_gun),
+        'uyari_gonderildi_30': False,
+        'uyari_gonderildi_15': False,
+        'uyari_gonderildi_7': False,
+    }, synchronize_session=False)
+    
+    # Birden fazla dönem gecikmiş yenilemeliler sonraki çalışmada tekrar uzatılır
+    sona_eren = Sozlesme.query.filter(
+        *sure_dolmus,
+        or_(Sozlesme.otomatik_yenileme == False, Sozlesme.otomatik_yenileme.is_(None))
+    ).update({'durum': 'sona_erdi'}, synchronize_session=False)
+    
+    db.session.commit()
+    return yenilenen, sona_eren
@@ -4,9 +4,13 @@ TG Portal - Talep/Ticket Modülü Modelleri
 Dahili destek talepleri - IT, İK, İdari İşler vb.
 """
 
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
+from sqlalchemy import update
 from app import db
 from app.models.base import TimestampMixin, SoftDeleteMixin
+from app.models.rapor import KUYRUGA_ELLE_YAZILIR, RaporOzetKuyrugu
+from app.models.sayac import belge_no_al
+from app.utils import gun_kosulu
 
 
 class TalepKategorisi(db.Model, TimestampMixin):
@@ -37,9 +41,28 @@ class TalepKategorisi(db.Model, TimestampMixin):
         return f'<TalepKategorisi {self.ad}>'
 
 
+ACIK_DURUMLAR = ['acik', 'atandi', 'devam_ediyor', 'beklemede']
+
+
 class Talep(db.Model, TimestampMixin, SoftDeleteMixin):
     """Destek talebi"""
     __tablename__ = 'talepler'
+    __table_args__ = (
+        # Sweeper sadece açık ve henüz aşılmamış talepleri tarar; zamanında
+        # kapananların bayrağı false kalır, durum şartı onları indeks dışı bırakır
+        db.Index('ix_talepler_sla_cozum_bitis_bekleyen', 'sla_cozum_bitis',
+                 postgresql_where=db.text(
+                     'sla_asildi = false AND durum IN (%s)' % ', '.join(f"'{d}'" for d in ACIK_DURUMLAR)
+                 )),
+        # Yanıt aşımı: henüz yanıtlanmamış açık talepler
+        db.Index('ix_talepler_sla_yanit_bitis_bekleyen', 'sla_yanit_bitis',
+                 postgresql_where=db.text(
+                     'sla_yanit_asildi = false AND ilk_yanit_tarihi IS NULL AND durum IN (%s)'
+                     % ', '.join(f"'{d}'" for d in ACIK_DURUMLAR)
+                 )),
+        # Rapor / dashboard dönem filtreleri (app.utils.donem_kosulu, gun_kosulu)
+        db.Index('ix_talepler_is_deleted_created_at', 'is_deleted', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     
@@ -76,6 +99,13 @@ class Talep(db.Model, TimestampMixin, SoftDeleteMixin):
     # Çözüm
     cozum_notu = db.Column(db.Text)
     
+    # SLA (oluşturma ve kategori değişiminde hesaplanır)
+    sla_yanit_bitis = db.Column(db.DateTime)
+    sla_cozum_bitis = db.Column(db.DateTime)
+    sla_asildi = db.Column(db.Boolean, default=False, nullable=False)  # çözüm süresi aşıldı
+    sla_asim_tarihi = db.Column(db.DateTime)
+    sla_yanit_asildi = db.Column(db.Boolean, default=False, nullable=False)
+    
     # Dosya
     dosya_adi = db.Column(db.String(255))
     dosya_yolu = db.Column(db.String(500))
@@ -144,18 +174,56 @@ class Talep(db.Model, TimestampMixin, SoftDeleteMixin):
     
     @property
     def sla_asim(self):
-        """SLA aşıldı mı?"""
-        if not self.acik_mi or not self.kategori:
-            return False
-        return self.sure_gecti > self.kategori.sla_cozum
+        """SLA aşıldı mı? (sweeper henüz çalışmamış olsa da doğru sonuç verir)"""
+        if self.sla_asildi:
+            return True
+        return bool(self.acik_mi and self.sla_cozum_bitis and datetime.utcnow() > self.sla_cozum_bitis)
+    
+    @property
+    def sla_yanit_asim(self):
+        """İlk yanıt süresi aşıldı mı? (sweeper henüz çalışmamış olsa da doğru sonuç verir)"""
+        if self.sla_yanit_asildi:
+            return True
+        return bool(self.acik_mi and self._yanit_gecikti(datetime.utcnow()))
+    
+    def _yanit_gecikti(self, simdi):
+        return bool(self.sla_yanit_bitis and (self.ilk_yanit_tarihi or simdi) > self.sla_yanit_bitis)
+    
+    def sla_hesapla(self, kategori=None):
+        """
+        Yanıt/çözüm bitiş zamanlarını kategori SLA sürelerine göre hesaplar.
+        İkisi de oluşturma zamanından sayılır; yeniden atama süreyi uzatmaz.
+        """
+        kategori = kategori or self.kategori
+        baslangic = self.created_at or datetime.utcnow()
+        sla_cevap = kategori.sla_cevap if kategori else None
+        sla_cozum = kategori.sla_cozum if kategori else None
+        
+        self.sla_yanit_bitis = baslangic + timedelta(hours=sla_cevap) if sla_cevap else None
+        self.sla_cozum_bitis = baslangic + timedelta(hours=sla_cozum) if sla_cozum else None
+        
+        # Daha uzun SLA'lı (veya SLA'sız) kategoriye taşınan açık talebin aşımı kalkar
+        if self.acik_mi:
+            simdi = datetime.utcnow()
+            if self.sla_asildi and (not self.sla_cozum_bitis or simdi <= self.sla_cozum_bitis):
+                self.sla_asildi = False
+                self.sla_asim_tarihi = None
+            if self.sla_yanit_asildi and not self._yanit_gecikti(simdi):
+                self.sla_yanit_asildi = False
+        self.sla_asim_kontrol()
+    
+    def sla_asim_kontrol(self):
+        """Yanıt veya çözüm süresi geçtiyse aşım bayraklarını işaretler"""
+        simdi = datetime.utcnow()
+        if not self.sla_yanit_asildi and self._yanit_gecikti(simdi):
+            self.sla_yanit_asildi = True
+        if not self.sla_asildi and self.sla_cozum_bitis and simdi > self.sla_cozum_bitis:
+            self.sla_asildi = True
+            self.sla_asim_tarihi = self.sla_cozum_bitis
     
     def talep_no_olustur(self):
         """Otomatik talep numarası"""
-        yil = date.today().year
-        son = Talep.query.filter(
-            Talep.talep_no.like(f'TLP-{yil}-%')
-        ).count()
-        self.talep_no = f'TLP-{yil}-{son + 1:04d}'
+        self.talep_no = belge_no_al('TLP')
     
     def __repr__(self):
         return f'<Talep {self.talep_no}>'
@@ -208,10 +276,48 @@ def get_acik_talepler(kullanici_id=None, atanan_id=None):
     return query.order_by(Talep.created_at.desc()).all()
 
 
+def sla_asimlarini_isaretle():
+    """
+    Yanıt veya çözüm süresi geçmiş açık talepleri birer UPDATE ile işaretler.
+    Rapor özetinde sadece çözüm aşımı işaretlenen taleplerin ayları yeniden
+    hesaplanır (özet yanıt aşımını saymaz). Dönüş: (yanıt, çözüm) aşım sayıları
+    """
+    simdi = datetime.utcnow()
+    yanit = db.session.execute(
+        update(Talep).where(
+            Talep.sla_yanit_asildi == False,
+            Talep.ilk_yanit_tarihi.is_(None),
+            Talep.sla_yanit_bitis < simdi,
+            Talep.is_deleted == False,
+            Talep.durum.in_(ACIK_DURUMLAR)
+        ).values(
+            sla_yanit_asildi=True
+        ).execution_options(
+            synchronize_session=False, **{KUYRUGA_ELLE_YAZILIR: True}
+        )
+    )
+    sonuc = db.session.execute(
+        update(Talep).where(
+            Talep.sla_asildi == False,
+            Talep.sla_cozum_bitis < simdi,
+            Talep.is_deleted == False,
+            Talep.durum.in_(ACIK_DURUMLAR)
+        ).values(
+            sla_asildi=True,
+            sla_asim_tarihi=Talep.sla_cozum_bitis
+        ).returning(Talep.created_at).execution_options(
+            synchronize_session=False, **{KUYRUGA_ELLE_YAZILIR: True}
+        )
+    )
+    tarihler = sonuc.scalars().all()
+    if tarihler:
+        RaporOzetKuyrugu.aylari_ekle(db.session, 'talep', tarihler)
+    db.session.commit()
+    return yanit.rowcount, len(tarihler)
+
+
 def get_talep_istatistikleri(atanan_id=None):
     """Talep istatistikleri"""
-    from sqlalchemy import func
-    
     base_query = Talep.query.filter(Talep.is_deleted == False)
     
     if atanan_id:
@@ -221,7 +327,8 @@ def get_talep_istatistikleri(atanan_id=None):
         'toplam': base_query.count(),
         'acik': base_query.filter(Talep.durum.in_(['acik', 'atandi', 'devam_ediyor', 'beklemede'])).count(),
         'cozuldu': base_query.filter(Talep.durum == 'cozuldu').count(),
-        'bugun': base_query.filter(func.date(Talep.created_at) == date.today()).count()
+        'bugun': base_query.filter(gun_kosulu(Talep.created_at)).count(),
+        'sla_asim': base_query.filter(Talep.sla_asildi == True, Talep.durum.in_(ACIK_DURUMLAR)).count()
     }
     
     return stats
@@ -10,12 +10,15 @@ from flask_login import login_required, current_user
 from werkzeug.security import generate_password_hash
 
 from app import db
-from app.models.ayarlar import SistemAyar, AktiviteLog, varsayilan_ayarlari_yukle
+from app.models.ayarlar import SistemAyar, AktiviteLog, varsayilan_ayarlari_yukle, ayarlari_getir
 from app.models.core import User, Role, Permission
 from app.utils import permission_required
 
 ayarlar_bp = Blueprint('ayarlar', __name__)
 
+# Aktivite logları sayfa boyutu
+LOG_SAYFA_BOYUTU = 50
+
 
 # ============================================================
 # ANA SAYFA
@@ -68,6 +71,7 @@ def sistem():
     guvenlik = SistemAyar.query.filter_by(kategori='guvenlik').all()
     
     return render_template('ayarlar/sistem.html',
+                          ayarlar=ayarlari_getir(),
                           genel=genel,
                           email=email,
                           bildirim=bildirim,
@@ -391,12 +395,12 @@ def log_liste():
         flash('Bu sayfaya erişim yetkiniz yok.', 'danger')
         return redirect(url_for('core.dashboard'))
     
-    page = request.args.get('page', 1, type=int)
+    sonra = _log_imleci_oku(request.args.get('sonra'))
     eylem = request.args.get('eylem')
     modul = request.args.get('modul')
     kullanici_id = request.args.get('kullanici_id', type=int)
     
-    query = AktiviteLog.query
+    query = AktiviteLog.query.options(db.joinedload(AktiviteLog.kullanici))
     
     if eylem:
         query = query.filter(AktiviteLog.eylem == eylem)
@@ -405,17 +409,76 @@ def log_liste():
     if kullanici_id:
         query = query.filter(AktiviteLog.kullanici_id == kullanici_id)
     
-    query = query.order_by(AktiviteLog.tarih.desc())
-    pagination = query.paginate(page=page, per_page=50, error_out=False)
+    # Keyset: derin sayfalar da (tarih, id) indeksinden okunur
+    if sonra:
+        query = query.filter(db.tuple_(AktiviteLog.tarih, AktiviteLog.id) < sonra)
+    query = query.order_by(AktiviteLog.tarih.desc(), AktiviteLog.id.desc())
+    loglar = query.limit(LOG_SAYFA_BOYUTU + 1).all()
+    
+    sonraki_imlec = None
+    if len(loglar) > LOG_SAYFA_BOYUTU:
+        loglar = loglar[:LOG_SAYFA_BOYUTU]
+        sonraki_imlec = f"{loglar[-1].tarih.isoformat()}_{loglar[-1].id}"
     
     kullanicilar = User.query.filter_by(is_active=True).order_by(User.ad).all()
     
     return render_template('ayarlar/log_liste.html',
-                          loglar=pagination.items,
-                          pagination=pagination,
+                          loglar=loglar,
+                          ilk_sayfa=sonra is None,
+                          sonraki_imlec=sonraki_imlec,
                           kullanicilar=kullanicilar)
 
 
+def _log_imleci_oku(deger):
+    """İmleci (tarih, log_id) olarak çözer; geçersizse None"""
+    if not deger:
+        return None
+    try:
+        tarih, log_id = deger.split('_')
+        return datetime.fromisoformat(tarih), int(log_id)
+    except ValueError:
+        return None
+
+
+# ============================================================
+# SQL PROFİLİ
+# ============================================================
+
+@ayarlar_bp.route('/sql-profil')
+@login_required
+def sql_profil():
+    """Örneklenen isteklerin SQL profilleri ve N+1 şüpheleri"""
+    if not current_user.is_admin:
+        flash('Bu sayfaya erişim yetkiniz yok.', 'danger')
+        return redirect(url_for('core.dashboard'))
+    
+    from app.profiler import son_profiller
+    profiller = son_profiller()
+    
+    # Endpoint bazında N+1 kalıpları
+    n_arti_bir = {}
+    for p in profiller:
+        for t in p.get('n_arti_bir', []):
+            anahtar = (p.get('endpoint'), t['sorgu'])
+            kayit = n_arti_bir.setdefault(anahtar, {
+                'endpoint': p.get('endpoint'), 'sorgu': t['sorgu'], 'istek': 0, 'max_adet': 0
+            })
+            kayit['istek'] += 1
+            kayit['max_adet'] = max(kayit['max_adet'], t['adet'])
+    n_arti_bir = sorted(n_arti_bir.values(), key=lambda k: (k['istek'], k['max_adet']), reverse=True)
+    
+    siralama = request.args.get('sirala', 'zaman')
+    if siralama == 'sorgu':
+        profiller = sorted(profiller, key=lambda p: p['sorgu_sayisi'], reverse=True)
+    elif siralama == 'sure':
+        profiller = sorted(profiller, key=lambda p: p['sql_ms'], reverse=True)
+    
+    return render_template('ayarlar/sql_profil.html',
+                          profiller=profiller,
+                          n_arti_bir=n_arti_bir,
+                          siralama=siralama)
+
+
 # ============================================================
 # YETKİ YÖNETİMİ
 # ============================================================
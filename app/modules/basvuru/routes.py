@@ -5,88 +5,24 @@ Aday başvuru sistemi - Login gerektirmez
 SMS Provider: NetGSM
 """
 
-from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app
+from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, jsonify
 from datetime import datetime
 from app import db
+from app.depolama import dosya_kaydet
 from app.models.ik import Aday
-import requests
-import urllib.parse
+from app.models.sms import SmsIsi
+from app.modules.basvuru.sms import kuyruga_ekle
 
 basvuru_bp = Blueprint('basvuru', __name__)
 
+# Ekranda gösterilen fotoğraflar: küçük/orta boy türevleri üretilir
+GORSEL_ALANLARI = {'foto', 'kimlik_on', 'kimlik_arka', 'ehliyet_foto'}
 
-# ==================== NetGSM SMS Fonksiyonları ====================
-
-def send_netgsm_sms(telefon, mesaj):
-    """NetGSM ile SMS gönder"""
-    try:
-        usercode = current_app.config.get('NETGSM_USERCODE')
-        password = current_app.config.get('NETGSM_PASSWORD')
-        header = current_app.config.get('NETGSM_HEADER')
-        
-        if not all([usercode, password, header]):
-            current_app.logger.error("NetGSM yapılandırması eksik")
-            return {'success': False, 'error': 'SMS servisi yapılandırılmamış'}
-        
-        # Telefon numarasını formatla (başında 0 olmadan, 10 hane)
-        telefon = telefon.replace(' ', '').replace('-', '').replace('(', '').replace(')', '')
-        if telefon.startswith('+90'):
-            telefon = telefon[3:]
-        elif telefon.startswith('90'):
-            telefon = telefon[2:]
-        elif telefon.startswith('0'):
-            telefon = telefon[1:]
-        
-        # NetGSM API - GET metodu
-        url = "https://api.netgsm.com.tr/sms/send/get/"
-        params = {
-            'usercode': usercode,
-            'password': password,
-            'gsmno': telefon,
-            'message': mesaj,
-            'msgheader': header,
-            'dil': 'TR'
-        }
-        
-        response = requests.get(url, params=params, timeout=30)
-        result = response.text.strip()
-        
-        # NetGSM yanıt kodları
-        # 00: Başarılı, 01: Başarılı (Rapor bekliyor)
-        # 20: Post hata, 30: Geçersiz kullanıcı/şifre, 40: Mesaj başlığı bulunamadı
-        # 50: IYS kontrolü yapılmadı, 51: IYS ret, 70: Geçersiz parametre
-        
-        if result.startswith('00') or result.startswith('01'):
-            # Başarılı - bulk_id döner: "00 12345678"
-            parts = result.split(' ')
-            bulk_id = parts[1] if len(parts) > 1 else result
-            current_app.logger.info(f"SMS gönderildi: {telefon} - ID: {bulk_id}")
-            return {'success': True, 'message_id': bulk_id}
-        else:
-            error_codes = {
-                '20': 'Post hatası',
-                '30': 'Geçersiz kullanıcı/şifre',
-                '40': 'Mesaj başlığı bulunamadı',
-                '50': 'IYS kontrolü yapılmadı',
-                '51': 'IYS listesinde değil (Numara reddetti)',
-                '70': 'Geçersiz parametre',
-                '80': 'Gönderim sınır aşımı',
-                '85': 'Mükerrer gönderim'
-            }
-            error_msg = error_codes.get(result[:2], f'Bilinmeyen hata: {result}')
-            current_app.logger.error(f"SMS hata: {telefon} - {error_msg}")
-            return {'success': False, 'error': error_msg}
-            
-    except requests.exceptions.Timeout:
-        current_app.logger.error("NetGSM timeout hatası")
-        return {'success': False, 'error': 'SMS servisi zaman aşımı'}
-    except Exception as e:
-        current_app.logger.error(f"SMS gönderim hatası: {str(e)}")
-        return {'success': False, 'error': str(e)}
 
+# ==================== NetGSM SMS Fonksiyonları ====================
 
-def send_sms_davet(aday, basvuru_link):
-    """SMS ile davet gönder"""
+def send_sms_davet(aday, basvuru_link, sms_isi=None):
+    """SMS davetini gönderim kuyruğuna al"""
     # Kadro bilgisi
     kadro_bilgi = ""
     if aday.kadro:
@@ -99,15 +35,17 @@ def send_sms_davet(aday, basvuru_link):
         f"Link 72 saat gecerlidir. - Team Guerilla IK"
     )
     
-    return send_netgsm_sms(aday.telefon, mesaj)
+    kuyruga_ekle(aday.telefon, mesaj, tip='davet', aday=aday, sms_isi=sms_isi)
 
 
 def send_otp_sms(aday):
-    """SMS ile OTP kodu gönder"""
+    """OTP kodunu gönderim kuyruğuna al (worker OTP'leri öncelikli gönderir)"""
     kod = aday.generate_otp()
     mesaj = f"Team Guerilla is basvuru dogrulama kodunuz: {kod} - Bu kod 5 dakika gecerlidir."
     
-    return send_netgsm_sms(aday.telefon, mesaj)
+    # Kod geçersizleştikten sonra gönderilmez / tekrar denenmez
+    kuyruga_ekle(aday.telefon, mesaj, tip='otp', aday=aday,
+                 son_gecerlilik=aday.telefon_dogrulama_kodu_expires)
 
 
 def send_email_davet(aday, basvuru_link):
@@ -239,23 +177,14 @@ def basvuru_form(token):
         aday.vardiyali_calisabilir = request.form.get('vardiyali_calisabilir') == 'on'
         aday.seyahat_engeli = request.form.get('seyahat_engeli') == 'on'
         
-        # Dosya yüklemeleri
-        import os
-        from werkzeug.utils import secure_filename
-        
-        upload_folder = os.path.join(current_app.root_path, 'static', 'uploads', 'adaylar', str(aday.id))
-        os.makedirs(upload_folder, exist_ok=True)
-        
+        # Dosya yüklemeleri (depoda; statik klasörden herkese açık sunulmaz)
         file_fields = ['foto', 'cv_dosya', 'kimlik_on', 'kimlik_arka', 'ehliyet_foto', 
                       'diploma_foto', 'src_foto', 'ikametgah', 'adli_sicil']
         
         for field in file_fields:
             file = request.files.get(field)
             if file and file.filename:
-                filename = secure_filename(f"{field}_{aday.id}_{file.filename}")
-                filepath = os.path.join(upload_folder, filename)
-                file.save(filepath)
-                setattr(aday, field, f"uploads/adaylar/{aday.id}/{filename}")
+                setattr(aday, field, dosya_kaydet(file, turev=field in GORSEL_ALANLARI).yol)
         
         # Başvuruyu tamamla
         aday.basvuru_tamamlandi = True
@@ -308,7 +237,7 @@ def aday_davet(kadro_id):
         aday = Aday(
             ad=ad,
             soyad=soyad,
-            kadro_id=kadro_id,
+            kadro=kadro,
             pozisyon_id=kadro.pozisyon_id if hasattr(kadro, 'pozisyon_id') else None,
             davet_tipi=davet_tipi,
             kaynak=f'{davet_tipi}_davet',
@@ -326,19 +255,17 @@ def aday_davet(kadro_id):
         aday.davet_gonderim_tarihi = datetime.utcnow()
         
         db.session.add(aday)
-        db.session.commit()
         
         # Başvuru linki oluştur
         basvuru_link = url_for('basvuru.basvuru_giris', token=aday.davet_token, _external=True)
         
         # SMS veya Email gönder
         if davet_tipi == 'sms':
-            result = send_sms_davet(aday, basvuru_link)
-            if result['success']:
-                flash(f'SMS daveti gönderildi: {iletisim}', 'success')
-            else:
-                flash(f'SMS gönderilemedi: {result.get("error", "Bilinmeyen hata")}. Link: {basvuru_link}', 'warning')
+            send_sms_davet(aday, basvuru_link)
+            db.session.commit()
+            flash(f'SMS daveti gönderim kuyruğuna alındı: {iletisim}', 'success')
         else:
+            db.session.commit()
             result = send_email_davet(aday, basvuru_link)
             if result['success']:
                 flash(f'Email daveti gönderildi: {iletisim}', 'success')
@@ -366,6 +293,14 @@ def toplu_davet(kadro_id):
     basarili = 0
     hatali = 0
     
+    sms_isi = None
+    if davet_tipi == 'sms':
+        sms_isi = SmsIsi(
+            aciklama=f'Toplu davet - {kadro.pozisyon_adi}',
+            olusturan_id=current_user.id
+        )
+        db.session.add(sms_isi)
+    
     for satir in kisi_listesi.strip().split('\n'):
         parcalar = [p.strip() for p in satir.split(',')]
         if len(parcalar) >= 3:
@@ -375,7 +310,7 @@ def toplu_davet(kadro_id):
                 aday = Aday(
                     ad=ad,
                     soyad=soyad,
-                    kadro_id=kadro_id,
+                    kadro=kadro,
                     davet_tipi=davet_tipi,
                     kaynak=f'{davet_tipi}_davet',
                     durum='davet_gonderildi',
@@ -391,13 +326,12 @@ def toplu_davet(kadro_id):
                 aday.davet_gonderim_tarihi = datetime.utcnow()
                 
                 db.session.add(aday)
-                db.session.flush()  # ID al
                 
-                # Başvuru linki oluştur ve SMS gönder
+                # Başvuru linki oluştur, SMS'i kuyruğa al (gönderimi sms-worker yapar)
                 basvuru_link = url_for('basvuru.basvuru_giris', token=aday.davet_token, _external=True)
                 
                 if davet_tipi == 'sms':
-                    send_sms_davet(aday, basvuru_link)
+                    send_sms_davet(aday, basvuru_link, sms_isi=sms_isi)
                 else:
                     send_email_davet(aday, basvuru_link)
                 
@@ -410,10 +344,24 @@ def toplu_davet(kadro_id):
     
     db.session.commit()
     
-    flash(f'{basarili} aday davet edildi, {hatali} hata oluştu.', 'success' if basarili > 0 else 'warning')
+    if davet_tipi == 'sms':
+        flash(f'{basarili} aday davet edildi, {hatali} hata oluştu. '
+              f'SMS gönderimi arka planda sürüyor (iş no: {sms_isi.id}).',
+              'success' if basarili > 0 else 'warning')
+    else:
+        flash(f'{basarili} aday davet edildi, {hatali} hata oluştu.', 'success' if basarili > 0 else 'warning')
     return redirect(url_for('proje.kadro_detay', id=kadro_id))
 
 
+@basvuru_bp.route('/sms-is/<int:is_id>')
+@login_required
+@permission_required('ik.view')
+def sms_is_durum(is_id):
+    """Toplu SMS işinin gönderim durumu (JSON)"""
+    sms_isi = SmsIsi.query.get_or_404(is_id)
+    return jsonify(sms_isi.ozet())
+
+
 @basvuru_bp.route('/davet-tekrar/<int:aday_id>')
 @login_required
 @permission_required('ik.edit')
@@ -427,21 +375,19 @@ def davet_tekrar(aday_id):
     aday.durum = 'davet_gonderildi'
     aday.davet_eden_id = current_user.id
     
-    db.session.commit()
-    
     basvuru_link = url_for('basvuru.basvuru_giris', token=aday.davet_token, _external=True)
     
     # Gönderim
     if aday.davet_tipi == 'sms' and aday.telefon:
-        result = send_sms_davet(aday, basvuru_link)
-        if result['success']:
-            flash(f'SMS tekrar gönderildi: {aday.telefon}', 'success')
-        else:
-            flash(f'SMS gönderilemedi: {result.get("error")}. Link: {basvuru_link}', 'warning')
+        send_sms_davet(aday, basvuru_link)
+        db.session.commit()
+        flash(f'SMS tekrar gönderim kuyruğuna alındı: {aday.telefon}', 'success')
     elif aday.email:
+        db.session.commit()
         result = send_email_davet(aday, basvuru_link)
         flash(f'Email tekrar gönderildi: {aday.email}', 'success')
     else:
+        db.session.commit()
         flash(f'İletişim bilgisi bulunamadı. Link: {basvuru_link}', 'warning')
     
     if aday.kadro_id:
@@ -483,13 +429,10 @@ def telefon_dogrula(token):
                 flash('Telefon numarası gereklidir.', 'danger')
                 return redirect(url_for('basvuru.telefon_dogrula', token=token))
             
-            result = send_otp_sms(aday)
+            send_otp_sms(aday)
             db.session.commit()
             
-            if result['success']:
-                flash('Doğrulama kodu telefonunuza gönderildi.', 'success')
-            else:
-                flash(f'SMS gönderilemedi: {result.get("error")}', 'danger')
+            flash('Doğrulama kodu telefonunuza gönderildi.', 'success')
         
         elif action == 'verify_code':
             kod = request.form.get('kod')
@@ -522,12 +465,9 @@ def kod_tekrar_gonder(token):
         flash('Başvuru linkinizin süresi dolmuş.', 'danger')
         return redirect(url_for('basvuru.basvuru_giris', token=token))
     
-    result = send_otp_sms(aday)
+    send_otp_sms(aday)
     db.session.commit()
     
-    if result['success']:
-        flash('Yeni doğrulama kodu gönderildi.', 'success')
-    else:
-        flash(f'SMS gönderilemedi: {result.get("error")}', 'danger')
+    flash('Yeni doğrulama kodu gönderildi.', 'success')
     
     return redirect(url_for('basvuru.telefon_dogrula', token=token))
\ No newline at end of file
@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*-
+"""
+TG Portal - Giden SMS Kuyruğu
+SMS Provider: NetGSM
+
+Web istekleri SMS'i doğrudan göndermez; `kuyruga_ekle` ile sms_mesajlari
+tablosuna yazar. `flask sms-worker` komutu kuyruğu thread havuzu ile boşaltır:
+aynı metne sahip mesajlar NetGSM'in çoklu alıcı (1:N) gönderimi ile gruplanır,
+geçici hatalar üstel geri çekilme ile tekrar denenir.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import requests
+from requests.adapters import HTTPAdapter
+from flask import current_app
+from app import db
+from app.models.ik import Aday
+from app.models.sms import SmsMesaj
+
+
+# NetGSM yanıt kodları
+# 00: Başarılı, 01: Başarılı (Rapor bekliyor)
+NETGSM_HATA_KODLARI = {
+    '20': 'Post hatası',
+    '30': 'Geçersiz kullanıcı/şifre',
+    '40': 'Mesaj başlığı bulunamadı',
+    '50': 'IYS kontrolü yapılmadı',
+    '51': 'IYS listesinde değil (Numara reddetti)',
+    '70': 'Geçersiz parametre',
+    '80': 'Gönderim sınır aşımı',
+    '85': 'Mükerrer gönderim'
+}
+
+# Tekrar denemenin sonucu değiştirmeyeceği kodlar
+KALICI_HATA_KODLARI = {'30', '40', '50', '51', '70', '85'}
+
+# NetGSM 1:N gönderiminde tek istekteki alıcı sayısı
+TOPLU_GONDERIM_LIMIT = 100
+
+# Worker'ın aldığı mesajlar bu süre boyunca başka worker'a verilmez
+KILIT_SURESI = timedelta(minutes=10)
+
+SURE_DOLDU_HATASI = 'Geçerlilik süresi doldu, gönderilmedi'
+
+
+def telefon_normalize(telefon):
+    """Telefonu NetGSM formatına çevirir (başında 0 olmadan, 10 hane)"""
+    telefon = telefon.replace(' ', '').replace('-', '').replace('(', '').replace(')', '')
+    if telefon.startswith('+90'):
+        telefon = telefon[3:]
+    elif telefon.startswith('90'):
+        telefon = telefon[2:]
+    elif telefon.startswith('0'):
+        telefon = telefon[1:]
+    return telefon
+
+
+class NetgsmIstemci:
+    """Bağlantı havuzlu NetGSM HTTP istemcisi (thread'ler arasında paylaşılır)"""
+
+    def __init__(self, usercode, password, header, base_url='https://api.netgsm.com.tr',
+                 timeout=10, havuz_boyutu=10):
+        self.usercode = usercode
+        self.password = password
+        self.header = header
+        self.url = base_url.rstrip('/') + '/sms/send/get/'
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=havuz_boyutu)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    @classmethod
+    def from_config(cls, config, havuz_boyutu=10):
+        return cls(
+            config.get('NETGSM_USERCODE'),
+            config.get('NETGSM_PASSWORD'),
+            config.get('NETGSM_HEADER'),
+            base_url=config.get('NETGSM_API_URL') or 'https://api.netgsm.com.tr',
+            havuz_boyutu=havuz_boyutu
+        )
+
+    @property
+    def yapilandirildi(self):
+        return all([self.usercode, self.password, self.header])
+
+    def gonder(self, telefonlar, mesaj):
+        """
+        Aynı mesajı bir veya daha fazla numaraya gönderir.
+        Dönüş: {'success': bool, 'message_id': str, 'error': str, 'kalici': bool}
+        """
+        if not self.yapilandirildi:
+            return {'success': False, 'error': 'SMS servisi yapılandırılmamış', 'kalici': False}
+
+        params = {
+            'usercode': self.usercode,
+            'password': self.password,
+            'gsmno': ','.join(telefonlar),
+            'message': mesaj,
+            'msgheader': self.header,
+            'dil': 'TR'
+        }
+        try:
+            response = self.session.get(self.url, params=params, timeout=self.timeout)
+            response.raise_for_status()
+        except requests.exceptions.Timeout:
+            return {'success': False, 'error': 'SMS servisi zaman aşımı', 'kalici': False}
+        except requests.exceptions.HTTPError as e:
+            # URL kullanıcı/şifre içerdiği için mesaja eklenmez
+            return {'success': False, 'error': f'SMS servisi HTTP {e.response.status_code}', 'kalici': False}
+        except requests.exceptions.RequestException as e:
+            return {'success': False, 'error': f'SMS servisine bağlanılamadı: {type(e).__name__}', 'kalici': False}
+
+        result = response.text.strip()
+        if result.startswith('00') or result.startswith('01'):
+            # Başarılı - bulk_id döner: "00 12345678"
+            parts = result.split(' ')
+            bulk_id = parts[1] if len(parts) > 1 else result
+            return {'success': True, 'message_id': bulk_id}
+
+        kod = result[:2]
+        return {
+            'success': False,
+            'error': NETGSM_HATA_KODLARI.get(kod, f'Bilinmeyen hata: {result}')[:255],
+            'kalici': kod in KALICI_HATA_KODLARI
+        }
+
+
+def kuyruga_ekle(telefon, mesaj, tip='genel', aday=None, sms_isi=None, son_gecerlilik=None):
+    """
+    SMS'i gönderim kuyruğuna ekler. Commit çağıran taraftadır.
+    `son_gecerlilik` verilirse mesaj bu zamandan sonra gönderilmez ve
+    tekrar denemeleri bu zamanı aşamaz (OTP).
+    """
+    sms = SmsMesaj(
+        telefon=telefon_normalize(telefon),
+        mesaj=mesaj,
+        tip=tip,
+        aday=aday,
+        sms_isi=sms_isi,
+        durum='bekliyor',
+        sonraki_deneme=datetime.utcnow(),
+        son_gecerlilik=son_gecerlilik
+    )
+    db.session.add(sms)
+    if aday is not None:
+        aday.sms_durumu = 'kuyrukta'
+        aday.sms_durum_tarihi = datetime.utcnow()
+        aday.sms_hata = None
+    return sms
+
+
+class SmsGonderici:
+    """
+    Kuyruk worker'ı. HTTP çağrıları thread havuzunda paralel yapılır,
+    veritabanı işlemleri ana thread'de toplu UPDATE'lerle yapılır.
+    """
+
+    def __init__(self, istemci, thread_sayisi=4, batch_boyutu=200,
+                 max_deneme=5, geri_cekilme=30):
+        self.istemci = istemci
+        self.executor = ThreadPoolExecutor(max_workers=thread_sayisi,
+                                           thread_name_prefix='sms-worker')
+        self.batch_boyutu = batch_boyutu
+        self.max_deneme = max_deneme
+        self.geri_cekilme = geri_cekilme  # saniye, her denemede iki katına çıkar
+
+    def _mesajlari_al(self):
+        """Zamanı gelmiş mesajları kilitleyip işaretler (SKIP LOCKED)"""
+        simdi = datetime.utcnow()
+        mesajlar = SmsMesaj.query.filter(
+            SmsMesaj.durum.in_(('bekliyor', 'gonderiliyor')),
+            SmsMesaj.sonraki_deneme <= simdi
+        ).order_by(
+            db.case((SmsMesaj.tip == 'otp', 0), else_=1),
+            SmsMesaj.id
+        ).limit(self.batch_boyutu).with_for_update(skip_locked=True).all()
+
+        isler = []
+        suresi_dolan = []
+        for m in mesajlar:
+            if m.son_gecerlilik is not None and m.son_gecerlilik <= simdi:
+                suresi_dolan.append(m)
+            else:
+                isler.append((m.id, m.telefon, m.mesaj, m.deneme, m.aday_id, m.son_gecerlilik))
+        if isler:
+            SmsMesaj.query.filter(SmsMesaj.id.in_([i[0] for i in isler])).update({
+                'durum': 'gonderiliyor',
+                'sonraki_deneme': simdi + KILIT_SURESI
+            }, synchronize_session=False)
+        if suresi_dolan:
+            # Süresi dolmuş OTP gönderilmez; aday yeni kod ister
+            SmsMesaj.query.filter(SmsMesaj.id.in_([m.id for m in suresi_dolan])).update({
+                'durum': 'hata',
+                'hata': SURE_DOLDU_HATASI
+            }, synchronize_session=False)
+            aday_ids = [m.aday_id for m in suresi_dolan if m.aday_id]
+            if aday_ids:
+                Aday.query.filter(Aday.id.in_(aday_ids)).update({
+                    'sms_durumu': 'hata',
+                    'sms_hata': SURE_DOLDU_HATASI,
+                    'sms_durum_tarihi': simdi
+                }, synchronize_session=False)
+        db.session.commit()
+        return isler
+
+    @staticmethod
+    def _grupla(isler):
+        """Aynı metne sahip mesajları 1:N gönderim gruplarına ayırır"""
+        gruplar = {}
+        for is_ in isler:
+            gruplar.setdefault(is_[2], []).append(is_)
+        for mesaj, grup in gruplar.items():
+            for i in range(0, len(grup), TOPLU_GONDERIM_LIMIT):
+                yield mesaj, grup[i:i + TOPLU_GONDERIM_LIMIT]
+
+    def _sonuclari_yaz(self, sonuclar):
+        simdi = datetime.utcnow()
+        for grup, sonuc in sonuclar:
+            ids = [i[0] for i in grup]
+            aday_ids = [i[4] for i in grup if i[4]]
+
+            if sonuc['success']:
+                SmsMesaj.query.filter(SmsMesaj.id.in_(ids)).update({
+                    'durum': 'gonderildi',
+                    'deneme': SmsMesaj.deneme + 1,
+                    'saglayici_id': sonuc['message_id'],
+                    'gonderim_tarihi': simdi,
+                    'hata': None
+                }, synchronize_session=False)
+                aday_durumu = {'sms_durumu': 'gonderildi', 'sms_hata': None}
+            else:
+                # Tekrar denenecekler sonraki deneme zamanına göre gruplanır:
+                # geri çekilme süresi deneme sayısına bağlıdır
+                tekrar = {}
+                kalici_ids = []
+                kalici_aday_ids = set()
+                for is_ in grup:
+                    sonraki = simdi + timedelta(seconds=self.geri_cekilme * (2 ** is_[3]))
+                    if (sonuc.get('kalici') or is_[3] + 1 >= self.max_deneme
+                            or (is_[5] is not None and sonraki > is_[5])):
+                        # Süreli mesaj (OTP) geçerliliği bittikten sonra denenmez
+                        kalici_ids.append(is_[0])
+                        if is_[4]:
+                            kalici_aday_ids.add(is_[4])
+                    else:
+                        tekrar.setdefault(sonraki, []).append(is_[0])
+
+                ortak = {'deneme': SmsMesaj.deneme + 1, 'hata': sonuc['error']}
+                if kalici_ids:
+                    SmsMesaj.query.filter(SmsMesaj.id.in_(kalici_ids)).update(
+                        dict(ortak, durum='hata'), synchronize_session=False)
+                for sonraki, tekrar_ids in tekrar.items():
+                    SmsMesaj.query.filter(SmsMesaj.id.in_(tekrar_ids)).update(
+                        dict(ortak, durum='bekliyor', sonraki_deneme=sonraki),
+                        synchronize_session=False)
+                aday_ids = list(kalici_aday_ids)
+                aday_durumu = {'sms_durumu': 'hata', 'sms_hata': sonuc['error']}
+                current_app.logger.warning(
+                    f"SMS hata ({len(ids)} mesaj): {sonuc['error']}")
+
+            if aday_ids:
+                aday_durumu['sms_durum_tarihi'] = simdi
+                Aday.query.filter(Aday.id.in_(aday_ids)).update(
+                    aday_durumu, synchronize_session=False)
+        db.session.commit()
+
+    def bir_tur(self):
+        """Kuyruktan bir batch işler, işlenen mesaj sayısını döndürür"""
+        isler = self._mesajlari_al()
+        if not isler:
+            return 0
+
+        gruplar = list(self._grupla(isler))
+        futures = [
+            (grup, self.executor.submit(self.istemci.gonder, [i[1] for i in grup], mesaj))
+            for mesaj, grup in gruplar
+        ]
+        sonuclar = []
+        for grup, future in futures:
+            try:
+                sonuclar.append((grup, future.result()))
+            except Exception as e:
+                sonuclar.append((grup, {'success': False, 'error': str(e)[:255], 'kalici': False}))
+
+        self._sonuclari_yaz(sonuclar)
+        current_app.logger.info(f"SMS worker: {len(isler)} mesaj, {len(gruplar)} istek")
+        return len(isler)
+
+    def calistir(self, bekleme=2.0):
+        """Kuyruğu sürekli boşaltır; iş yoksa `bekleme` saniye uyur"""
+        while True:
+            try:
+                islenen = self.bir_tur()
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.error(f"SMS worker hatası: {e}")
+                islenen = 0
+            if islenen == 0:
+                time.sleep(bekleme)
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+TG Portal - Dashboard İstatistikleri
+Her tablonun kırılımı tek sorguda (COUNT(*) FILTER (WHERE ...)) alınır,
+sonuç Redis'te kısa TTL ile saklanır. İlgili modellere yazılınca versiyon
+sayacı artırılır ve bir sonraki istek taze sayıları hesaplar.
+"""
+
+from flask import has_app_context
+from sqlalchemy import func, select
+
+from app import db
+from app.cache import degisiklik_izle, json_oku, json_yaz, versiyon_oku, versiyon_artir
+from app.models.base import AracDurumu, CalisanDurumu
+from app.models.filo import Arac
+from app.models.ik import Aday, Calisan
+from app.models.proje import HedefKadro, Proje
+
+
+DASHBOARD_VERSIYON_KEY = 'dashboard:versiyon'
+DASHBOARD_CACHE_TTL = 60  # saniye
+
+# Bu modellere yazılınca dashboard cache'i geçersiz olur
+DASHBOARD_MODELLERI = (Calisan, Arac, Proje, HedefKadro, Aday)
+
+CALISAN_AKTIF_DURUMLAR = (CalisanDurumu.AKTIF, CalisanDurumu.IZINLI)
+ADAY_BEKLEYEN_DURUMLAR = ('basvurdu', 'degerlendiriliyor', 'mulakat', 'teklif')
+
+ACIL_KADRO_ONCELIK = 5
+ACIL_KADRO_LIMIT = 5
+
+
+def _sayac(kosul=None):
+    """COUNT(*) veya COUNT(*) FILTER (WHERE kosul)"""
+    sayac = func.count()
+    return sayac.filter(kosul) if kosul is not None else sayac
+
+
+def _calisan_sayilari():
+    satir = db.session.execute(
+        select(
+            _sayac(Calisan.durum.in_(CALISAN_AKTIF_DURUMLAR)).label('aktif')
+        ).where(Calisan.is_deleted == False)
+    ).one()
+    return {'calisan_sayisi': satir.aktif}
+
+
+def _arac_sayilari():
+    satir = db.session.execute(
+        select(
+            _sayac().label('toplam'),
+            _sayac(Arac.durum == AracDurumu.AKTIF).label('aktif'),
+            _sayac(Arac.durum == AracDurumu.BAKIM).label('bakimda'),
+            _sayac(Arac.durum == AracDurumu.ARIZALI).label('arizali'),
+            _sayac(Arac.proje_id.isnot(None)).label('projeli'),
+        ).where(Arac.is_deleted == False)
+    ).one()
+    return {
+        'toplam': satir.toplam,
+        'aktif': satir.aktif,
+        'bakimda': satir.bakimda,
+        'arizali': satir.arizali,
+        'projeli': satir.projeli,
+        'projesiz': satir.toplam - satir.projeli,
+    }
+
+
+def _proje_sayilari():
+    satir = db.session.execute(
+        select(_sayac(Proje.aktif == True).label('aktif')).where(Proje.is_deleted == False)
+    ).one()
+    return {'aktif_proje': satir.aktif}
+
+
+def _aday_sayilari():
+    satir = db.session.execute(
+        select(
+            _sayac(Aday.durum.in_(ADAY_BEKLEYEN_DURUMLAR)).label('bekleyen')
+        ).where(Aday.is_deleted == False)
+    ).one()
+    return {'bekleyen_aday': satir.bekleyen}
+
+
+def _acil_kadrolar():
+    """
+    Önceliği yüksek ve eksiği olan kadrolar. Mevcut çalışan sayısı kadro
+    başına ayrı sorgu yerine tek GROUP BY alt sorgusu ile hesaplanır.
+    """
+    mevcut = select(
+        Calisan.kadro_id.label('kadro_id'),
+        func.count().label('sayi')
+    ).where(
+        Calisan.is_deleted == False,
+        Calisan.durum.in_(CALISAN_AKTIF_DURUMLAR)
+    ).group_by(Calisan.kadro_id).subquery()
+
+    mevcut_sayi = func.coalesce(mevcut.c.sayi, 0)
+    satirlar = db.session.execute(
+        select(
+            HedefKadro.id, HedefKadro.pozisyon_adi, HedefKadro.il, HedefKadro.oncelik,
+            HedefKadro.hedef_sayi, mevcut_sayi.label('mevcut'), Proje.ad.label('proje_adi')
+        ).join(Proje, Proje.id == HedefKadro.proje_id)
+        .outerjoin(mevcut, mevcut.c.kadro_id == HedefKadro.id)
+        .where(
+            HedefKadro.is_deleted == False,
+            HedefKadro.aktif == True,
+            HedefKadro.oncelik <= ACIL_KADRO_ONCELIK,
+            HedefKadro.hedef_sayi > mevcut_sayi
+        ).order_by(HedefKadro.oncelik, HedefKadro.id).limit(ACIL_KADRO_LIMIT)
+    ).all()
+
+    # Şablon k.proje.ad / k.eksik_sayi ile eriştiği için aynı şekli korur
+    return [{
+        'id': s.id,
+        'pozisyon_adi': s.pozisyon_adi,
+        'il': s.il,
+        'oncelik': s.oncelik,
+        'eksik_sayi': s.hedef_sayi - s.mevcut,
+        'proje': {'ad': s.proje_adi},
+    } for s in satirlar]
+
+
+def dashboard_hesapla():
+    """Dashboard sayılarını veritabanından hesaplar (cache'siz)"""
+    stats = {}
+    stats.update(_calisan_sayilari())
+    stats.update(_proje_sayilari())
+    stats.update(_aday_sayilari())
+    arac_durum = _arac_sayilari()
+    stats['arac_sayisi'] = arac_durum['toplam']
+    return {
+        'stats': stats,
+        'arac_durum': arac_durum,
+        'acil_kadrolar': _acil_kadrolar(),
+    }
+
+
+def dashboard_istatistikleri():
+    """
+    Dashboard sayıları. Redis varsa versiyonlu anahtarla kısa süre saklanır;
+    yoksa veya erişilemezse doğrudan hesaplanır.
+    """
+    versiyon = versiyon_oku(DASHBOARD_VERSIYON_KEY)
+    if versiyon is None:
+        return dashboard_hesapla()
+
+    anahtar = f'dashboard:{versiyon}'
+    veri = json_oku(anahtar)
+    if veri is None:
+        veri = dashboard_hesapla()
+        json_yaz(anahtar, veri, DASHBOARD_CACHE_TTL)
+    return veri
+
+
+def dashboard_cache_temizle():
+    """Dashboard cache'ini geçersiz kılar"""
+    if has_app_context():
+        versiyon_artir(DASHBOARD_VERSIYON_KEY)
+
+
+# ============================================================
+# CACHE INVALIDATION
+# ============================================================
+
+degisiklik_izle(DASHBOARD_MODELLERI, 'dashboard_degisti', dashboard_cache_temizle)
@@ -4,11 +4,13 @@ TG Portal - Core Routes (Auth, Admin, Dashboard)
 """
 
 from datetime import datetime
-from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app
+from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, Response
 from flask_login import login_user, logout_user, login_required, current_user
 from app import db
 from app.models.core import User, Role, Permission, AuditLog
 from app.utils import admin_required
+from app.modules.core.istatistik import dashboard_istatistikleri
+from app.bildirim import dagitici, olay_akisi
 
 core_bp = Blueprint('core', __name__)
 
@@ -89,53 +91,29 @@ def logout():
 @login_required
 def dashboard():
     """Ana dashboard"""
-    from app.models.ik import Calisan, Aday
-    from app.models.filo import Arac
-    from app.models.proje import Proje, HedefKadro, Musteri
-    from app.models.base import AracDurumu, CalisanDurumu
+    from sqlalchemy.orm import joinedload
+    from app.models.ik import Calisan
+    from app.models.proje import Proje, PROJE_SAYILARI
     
-    # Ana istatistikler
-    stats = {
-        'calisan_sayisi': Calisan.query.filter_by(is_deleted=False).filter(
-            Calisan.durum.in_([CalisanDurumu.AKTIF, CalisanDurumu.IZINLI])
-        ).count(),
-        'arac_sayisi': Arac.query.filter_by(is_deleted=False).count(),
-        'aktif_proje': Proje.query.filter_by(is_deleted=False, aktif=True).count(),
-        'bekleyen_aday': Aday.query.filter_by(is_deleted=False).filter(
-            Aday.durum.in_(['basvurdu', 'degerlendiriliyor', 'mulakat', 'teklif'])
-        ).count()
-    }
+    # Sayılar ve acil kadrolar (Redis'te kısa süreli cache)
+    veri = dashboard_istatistikleri()
     
     # Aktif projeler (doluluk için)
-    projeler = Proje.query.filter_by(is_deleted=False, aktif=True).order_by(Proje.ad).limit(5).all()
-    
-    # Acil kadro ihtiyacı (eksik > 0 ve öncelik düşük)
-    acil_kadrolar = HedefKadro.query.filter_by(is_deleted=False, aktif=True).filter(
-        HedefKadro.oncelik <= 5
-    ).order_by(HedefKadro.oncelik).limit(5).all()
-    # Sadece eksik olanları filtrele
-    acil_kadrolar = [k for k in acil_kadrolar if k.eksik_sayi > 0]
+    projeler = Proje.query.options(PROJE_SAYILARI, joinedload(Proje.musteri)).filter_by(
+        is_deleted=False, aktif=True
+    ).order_by(Proje.ad).limit(5).all()
     
     # Son eklenen çalışanlar
-    son_calisanlar = Calisan.query.filter_by(is_deleted=False).order_by(
-        Calisan.created_at.desc()
-    ).limit(5).all()
-    
-    # Araç durumu
-    arac_durum = {
-        'aktif': Arac.query.filter_by(is_deleted=False, durum=AracDurumu.AKTIF).count(),
-        'bakimda': Arac.query.filter_by(is_deleted=False, durum=AracDurumu.BAKIM).count(),
-        'arizali': Arac.query.filter_by(is_deleted=False, durum=AracDurumu.ARIZALI).count(),
-        'projeli': Arac.query.filter(Arac.is_deleted==False, Arac.proje_id.isnot(None)).count(),
-        'projesiz': Arac.query.filter(Arac.is_deleted==False, Arac.proje_id.is_(None)).count()
-    }
+    son_calisanlar = Calisan.query.options(joinedload(Calisan.pozisyon)).filter_by(
+        is_deleted=False
+    ).order_by(Calisan.created_at.desc()).limit(5).all()
     
     return render_template('core/dashboard.html',
-                         stats=stats,
+                         stats=veri['stats'],
                          projeler=projeler,
-                         acil_kadrolar=acil_kadrolar,
+                         acil_kadrolar=veri['acil_kadrolar'],
                          son_calisanlar=son_calisanlar,
-                         arac_durum=arac_durum)
+                         arac_durum=veri['arac_durum'])
 
 
 # ==================== PROFIL ====================
@@ -166,6 +144,34 @@ def profil():
     return render_template('core/profil.html')
 
 
+# ==================== BİLDİRİMLER ====================
+
+@core_bp.route('/bildirimler/akis')
+@login_required
+def bildirim_akisi():
+    """Anlık bildirim akışı (Server-Sent Events)"""
+    if not current_app.config['BILDIRIM_SSE']:
+        # 204 alan EventSource yeniden bağlanmaz, istemci polling'e döner
+        return '', 204
+    
+    kullanici_id = current_user.id
+    if current_app.config.get('REDIS_URL'):
+        dagitici.redis_dinle(current_app._get_current_object())
+    
+    # Akış boyunca veritabanı bağlantısı tutulmasın
+    db.session.remove()
+    
+    response = Response(
+        olay_akisi(kullanici_id,
+                   current_app.config['BILDIRIM_PING_SANIYE'],
+                   current_app.config['BILDIRIM_AZAMI_SANIYE']),
+        mimetype='text/event-stream'
+    )
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # nginx tamponlamasın
+    return response
+
+
 # ==================== ADMIN ====================
 
 @core_bp.route('/admin/kullanicilar')
@@ -282,11 +288,38 @@ def server_error(e):
 
 # ==================== UPLOADS ====================
 from flask import send_from_directory
+from app.depolama import dosya_gonder, indirme_adi
+from app.gorsel import TUREV_YER_TUTUCU, turev_yolu
+from app.models.dosya import DOSYA_YOL_ONEKI
 
 @core_bp.route('/uploads/<path:filename>')
 @login_required
 def uploaded_file(filename):
-    """Upload dosyalarını serve et"""
+    """
+    Upload dosyalarını serve et (sha256:<özet> yolları depodan).
+    ?tur=kucuk|orta görselin türevini, ?indir=1(&ad=...) orijinali ek olarak gönderir;
+    ad verilmezse özet öneki ve MIME tipinin uzantısı kullanılır.
+    """
+    if filename.startswith(DOSYA_YOL_ONEKI):
+        tur = request.args.get('tur')
+        if tur:
+            yol = turev_yolu(filename, tur)
+            if yol is None:
+                # Türev henüz hazır değil: orijinal yalnızca indirmeyle sunulur,
+                # sayfaya cache'lenmeyen yer tutucu gider
+                response = current_app.send_static_file(TUREV_YER_TUTUCU)
+                response.cache_control.no_cache = True
+                response.cache_control.max_age = 0
+                return response
+            filename = yol
+        indir = request.args.get('indir') == '1'
+        ad = (request.args.get('ad') or indirme_adi(filename)) if indir else None
+        response = dosya_gonder(filename, as_attachment=indir, download_name=ad)
+        # İçerik adresli URL'nin içeriği hiç değişmez
+        response.cache_control.no_cache = None
+        response.cache_control.max_age = 31536000
+        response.cache_control.immutable = True
+        return response
     import os
     upload_folder = os.path.join(current_app.root_path, '..', 'uploads')
     return send_from_directory(upload_folder, filename)
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+TG Portal - Sınav Değerlendirme Motoru
+Her testin cevap anahtarı (soru, tip, doğru seçenekler, puan) tek sorguyla
+derlenip Redis'te saklanır. Bir sonucun tüm cevapları tek sorguda okunup
+anahtara göre bellekte puanlanır; soru başına sorgu atılmaz.
+"""
+
+from itertools import chain
+
+from flask import has_app_context
+from sqlalchemy import inspect
+
+from app import db
+from app.cache import (
+    TUMU, anahtar_sil, degisiklik_izle, json_oku, json_yaz, versiyon_artir, versiyon_oku
+)
+from app.models.quiz import Soru, SoruSecenegi, TestSorusu, TestSonuc, TestCevap
+
+
+CEVAP_ANAHTARI_VERSIYON_KEY = 'cevap_anahtari:versiyon'
+CEVAP_ANAHTARI_CACHE_TTL = 3600  # saniye
+
+# Toplu yeniden değerlendirmede tek seferde cevapları okunan sonuç sayısı
+YENIDEN_DEGERLENDIRME_PARCA = 500
+
+
+class CevapAnahtari:
+    """Bir testin derlenmiş cevap anahtarı"""
+    __slots__ = ('sorular',)
+
+    def __init__(self, sorular):
+        # [(soru_id, soru_tipi, puan, dogru_secenek_idleri), ...] - test sırasına göre
+        self.sorular = sorular
+
+    @property
+    def toplam_puan(self):
+        return sum(puan for _, _, puan, _ in self.sorular)
+
+    def json(self):
+        return [list(s[:3]) + [list(s[3])] for s in self.sorular]
+
+    @classmethod
+    def jsondan(cls, veri):
+        return cls([(soru_id, tip, puan, tuple(dogrular)) for soru_id, tip, puan, dogrular in veri])
+
+
+def cevap_anahtari_derle(test_id):
+    """Test sorularını ve doğru seçeneklerini tek sorguda okuyup anahtarı derler"""
+    satirlar = db.session.query(
+        TestSorusu.soru_id, TestSorusu.ozel_puan, Soru.soru_tipi, Soru.puan, SoruSecenegi.id
+    ).join(
+        Soru, Soru.id == TestSorusu.soru_id
+    ).outerjoin(
+        SoruSecenegi, db.and_(SoruSecenegi.soru_id == Soru.id, SoruSecenegi.dogru == True)
+    ).filter(
+        TestSorusu.test_id == test_id
+    ).order_by(
+        TestSorusu.sira, TestSorusu.id, SoruSecenegi.sira, SoruSecenegi.id
+    ).all()
+
+    sorular = {}
+    for soru_id, ozel_puan, tip, soru_puani, secenek_id in satirlar:
+        if soru_id not in sorular:
+            # TestSorusu.puan ile aynı kural: özel puan yoksa sorunun puanı
+            sorular[soru_id] = (tip, ozel_puan if ozel_puan else soru_puani, [])
+        if secenek_id is not None:
+            sorular[soru_id][2].append(secenek_id)
+    return CevapAnahtari([
+        (soru_id, tip, puan or 0, tuple(dogrular))
+        for soru_id, (tip, puan, dogrular) in sorular.items()
+    ])
+
+
+def _cache_anahtari(versiyon, test_id):
+    return f'cevap_anahtari:{versiyon}:{test_id}'
+
+
+def cevap_anahtari(test_id, cache=True):
+    """Testin cevap anahtarı; soru veya seçenek değişince cache'ten düşer"""
+    anahtar = None
+    if cache:
+        versiyon = versiyon_oku(CEVAP_ANAHTARI_VERSIYON_KEY)
+        if versiyon is not None:
+            anahtar = _cache_anahtari(versiyon, test_id)
+            veri = json_oku(anahtar)
+            if veri is not None:
+                return CevapAnahtari.jsondan(veri)
+
+    derlenen = cevap_anahtari_derle(test_id)
+    if anahtar:
+        json_yaz(anahtar, derlenen.json(), CEVAP_ANAHTARI_CACHE_TTL)
+    return derlenen
+
+
+def _dogru_mu(tip, dogrular, cevap):
+    if tip == 'coklu_secim':
+        return set(dogrular) == set(cevap.secilen_secenekler or [])
+    # Tekli seçimde (eski davranış gibi) ilk doğru seçenek esas alınır
+    return bool(dogrular) and cevap.secilen_secenek_id == dogrular[0]
+
+
+def sonuc_degerlendir(sonuc, anahtar=None, cevaplar=None, gecme_puani=None):
+    """
+    Sonucun tüm cevaplarını anahtara göre puanlar; TestCevap ve TestSonuc
+    alanlarını günceller (commit çağırana aittir).
+    cevaplar verilmezse sonucun cevapları tek sorguda okunur.
+    """
+    if anahtar is None:
+        anahtar = cevap_anahtari(sonuc.test_id)
+    if cevaplar is None:
+        cevaplar = TestCevap.query.filter_by(sonuc_id=sonuc.id).all()
+    if gecme_puani is None:
+        gecme_puani = sonuc.test.gecme_puani
+
+    cevap_map = {c.soru_id: c for c in cevaplar}
+    dogru = yanlis = bos = alinan_puan = 0
+
+    for soru_id, tip, puan, dogrular in anahtar.sorular:
+        cevap = cevap_map.get(soru_id)
+        if not cevap or (not cevap.secilen_secenek_id and not cevap.secilen_secenekler):
+            bos += 1
+            if cevap:
+                cevap.dogru = False
+                cevap.alinan_puan = 0
+            continue
+
+        dogru_mu = _dogru_mu(tip, dogrular, cevap)
+        cevap.dogru = dogru_mu
+        if dogru_mu:
+            dogru += 1
+            cevap.alinan_puan = puan
+            alinan_puan += puan
+        else:
+            yanlis += 1
+            cevap.alinan_puan = 0
+
+    sonuc.dogru_sayisi = dogru
+    sonuc.yanlis_sayisi = yanlis
+    sonuc.bos_sayisi = bos
+    sonuc.alinan_puan = alinan_puan
+    sonuc.yuzde = round((alinan_puan / sonuc.toplam_puan * 100), 1) if sonuc.toplam_puan else 0
+    sonuc.gecti = sonuc.yuzde >= (gecme_puani or 0)
+    return sonuc
+
+
+def test_yeniden_degerlendir(test):
+    """
+    Testin tamamlanmış tüm sonuçlarını güncel anahtara göre yeniden puanlar.
+    Anahtar bir kez (cache'siz) derlenir, cevaplar parça parça toplu okunur.
+    Dönüş: değerlendirilen sonuç sayısı (commit çağırana aittir)
+    """
+    anahtar = cevap_anahtari(test.id, cache=False)
+    toplam_puan = anahtar.toplam_puan
+    sonuclar = TestSonuc.query.filter_by(test_id=test.id, tamamlandi=True).order_by(TestSonuc.id).all()
+
+    for i in range(0, len(sonuclar), YENIDEN_DEGERLENDIRME_PARCA):
+        parca = sonuclar[i:i + YENIDEN_DEGERLENDIRME_PARCA]
+        cevaplar = {}
+        for cevap in TestCevap.query.filter(TestCevap.sonuc_id.in_([s.id for s in parca])):
+            cevaplar.setdefault(cevap.sonuc_id, []).append(cevap)
+        for sonuc in parca:
+            sonuc.toplam_puan = toplam_puan
+            sonuc_degerlendir(sonuc, anahtar, cevaplar.get(sonuc.id, []), test.gecme_puani)
+
+    return len(sonuclar)
+
+
+# ============================================================
+# CACHE INVALIDATION
+# ============================================================
+
+def cevap_anahtari_cache_temizle(test_ids=None):
+    """Verilen testlerin (None ise tüm testlerin) cevap anahtarı cache'ini siler"""
+    if not has_app_context():
+        return
+    if test_ids is None:
+        versiyon_artir(CEVAP_ANAHTARI_VERSIYON_KEY)
+        return
+    versiyon = versiyon_oku(CEVAP_ANAHTARI_VERSIYON_KEY)
+    if versiyon is None:
+        return
+    anahtar_sil(*[_cache_anahtari(versiyon, test_id) for test_id in test_ids])
+
+
+def _soru_anahtari_degisti(soru):
+    durum = inspect(soru)
+    return any(durum.attrs[alan].history.has_changes() for alan in ('puan', 'soru_tipi'))
+
+
+def _cevap_anahtari_degisikligi(session, yeni, degisen, silinen):
+    """Seçenek veya sorunun puanı / tipi değişirse TUMU, yoksa soru listesi değişen testler"""
+    test_ids = set()
+    for obj in chain(yeni, degisen, silinen):
+        if isinstance(obj, SoruSecenegi):
+            return TUMU
+        if isinstance(obj, TestSorusu):
+            test_id = obj.test_id or (obj.test.id if obj.test else None)
+            if test_id:
+                test_ids.add(test_id)
+    if any(isinstance(obj, Soru) and _soru_anahtari_degisti(obj) for obj in degisen):
+        return TUMU
+    return test_ids
+
+
+# Soru düzenlemede seçenekler query.delete() ile silinir; toplu yazımlar da izlenir
+degisiklik_izle((SoruSecenegi, TestSorusu, Soru), 'cevap_anahtari_degisti',
+                cevap_anahtari_cache_temizle, secici=_cevap_anahtari_degisikligi)
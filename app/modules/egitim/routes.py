@@ -4,10 +4,9 @@ TG Portal - Eğitim Routes
 Eğitim yönetimi, katılımcı takibi
 """
 from datetime import datetime, date
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, current_app, send_file
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
-import os
 import random
 
 from app import db
@@ -22,7 +21,11 @@ from app.models.quiz import (
 from app.models.ik import Calisan, Pozisyon
 from app.models.proje import Proje, HedefKadro
 from app.models.base import CalisanDurumu
-from app.utils import permission_required, paginate_query
+from app.utils import permission_required, paginate_query, gun_kosulu
+from app.depolama import dosya_kaydet, dosya_var_mi, dosya_gonder, dosya_sil
+from app.modules.egitim.degerlendirme import (
+    cevap_anahtari, sonuc_degerlendir, test_yeniden_degerlendir
+)
 
 egitim_bp = Blueprint('egitim', __name__)
 
@@ -148,8 +151,7 @@ def liste():
     elif tarih == 'gelecek':
         query = query.filter(Egitim.baslangic_tarihi >= datetime.now())
     elif tarih == 'bugun':
-        bugun = date.today()
-        query = query.filter(db.func.date(Egitim.baslangic_tarihi) == bugun)
+        query = query.filter(gun_kosulu(Egitim.baslangic_tarihi))
     
     query = query.order_by(Egitim.baslangic_tarihi.desc())
     pagination = paginate_query(query, page, 20)
@@ -644,19 +646,7 @@ def materyal_yukle(id):
     
     if dosya and allowed_file(dosya.filename):
         filename = secure_filename(dosya.filename)
-        # Benzersiz isim oluştur
-        import uuid
-        unique_filename = f"{uuid.uuid4().hex}_{filename}"
-        
-        # Upload klasörü
-        upload_folder = os.path.join(current_app.config.get('UPLOAD_FOLDER', 'uploads'), 'egitim', str(id))
-        os.makedirs(upload_folder, exist_ok=True)
-        
-        filepath = os.path.join(upload_folder, unique_filename)
-        dosya.save(filepath)
-        
-        # Dosya boyutu
-        file_size = os.path.getsize(filepath)
+        depo_dosyasi = dosya_kaydet(dosya)
         
         materyal = EgitimMateryali(
             egitim_id=id,
@@ -664,8 +654,8 @@ def materyal_yukle(id):
             aciklama=request.form.get('aciklama', '').strip() or None,
             materyal_tipi=get_materyal_tipi(filename),
             dosya_adi=filename,
-            dosya_yolu=filepath,
-            dosya_boyut=file_size,
+            dosya_yolu=depo_dosyasi.yol,
+            dosya_boyut=depo_dosyasi.boyut,
             mime_type=dosya.content_type,
             yukleyen_id=current_user.id
         )
@@ -700,11 +690,11 @@ def materyal_indir(id):
     """Materyali indir"""
     materyal = EgitimMateryali.query.get_or_404(id)
     
-    if not materyal.dosya_yolu or not os.path.exists(materyal.dosya_yolu):
+    if not dosya_var_mi(materyal.dosya_yolu):
         flash('Dosya bulunamadı.', 'danger')
         return redirect(url_for('egitim.detay', id=materyal.egitim_id))
     
-    return send_file(
+    return dosya_gonder(
         materyal.dosya_yolu,
         download_name=materyal.dosya_adi,
         as_attachment=True
@@ -718,10 +708,10 @@ def materyal_embed(id):
     """Materyal embed (iframe için)"""
     materyal = EgitimMateryali.query.get_or_404(id)
     
-    if not materyal.dosya_yolu or not os.path.exists(materyal.dosya_yolu):
+    if not dosya_var_mi(materyal.dosya_yolu):
         return "Dosya bulunamadı", 404
     
-    return send_file(
+    return dosya_gonder(
         materyal.dosya_yolu,
         mimetype=materyal.mime_type
     )
@@ -740,8 +730,7 @@ def materyal_sil(id):
     egitim_id = materyal.egitim_id
     
     # Dosyayı da sil
-    if materyal.dosya_yolu and os.path.exists(materyal.dosya_yolu):
-        os.remove(materyal.dosya_yolu)
+    dosya_sil(materyal.dosya_yolu)
     
     db.session.delete(materyal)
     db.session.commit()
@@ -1113,6 +1102,19 @@ def test_soru_sirala(id):
     return jsonify({'success': True})
 
 
+@egitim_bp.route('/test/<int:id>/yeniden-degerlendir', methods=['POST'])
+@login_required
+@permission_required('egitim.edit')
+def test_sonuclari_yeniden_degerlendir(id):
+    """Testin tamamlanmış tüm sonuçlarını güncel cevap anahtarıyla yeniden puanla"""
+    test = Test.query.get_or_404(id)
+    adet = test_yeniden_degerlendir(test)
+    db.session.commit()
+
+    flash(f'{adet} sonuç yeniden değerlendirildi.', 'success')
+    return redirect(url_for('egitim.test_detay', id=id))
+
+
 # ============================================================
 # TEST ÇÖZME
 # ============================================================
@@ -1165,7 +1167,7 @@ def test_baslat(id):
         sonuc = TestSonuc(
             test_id=id,
             calisan_id=calisan.id,
-            toplam_puan=test.toplam_puan
+            toplam_puan=cevap_anahtari(id).toplam_puan
         )
         db.session.add(sonuc)
         db.session.commit()
@@ -1264,52 +1266,8 @@ def test_coz(sonuc_id):
 
 
 def _hesapla_sonuc(sonuc):
-    """Test sonucunu hesapla"""
-    test = sonuc.test
-    
-    dogru = 0
-    yanlis = 0
-    bos = 0
-    alinan_puan = 0
-    
-    for ts in test.test_sorulari.all():
-        soru = ts.soru
-        cevap = sonuc.cevaplar.filter_by(soru_id=soru.id).first()
-        
-        if not cevap or (not cevap.secilen_secenek_id and not cevap.secilen_secenekler):
-            bos += 1
-            if cevap:
-                cevap.dogru = False
-                cevap.alinan_puan = 0
-            continue
-        
-        # Doğru mu kontrol et
-        if soru.soru_tipi == 'coklu_secim':
-            # Çoklu seçim
-            dogru_ids = set(s.id for s in soru.dogru_secenekler)
-            secilen_ids = set(cevap.secilen_secenekler or [])
-            dogru_mu = dogru_ids == secilen_ids
-        else:
-            # Tekli seçim
-            dogru_secenek = soru.dogru_secenek
-            dogru_mu = dogru_secenek and cevap.secilen_secenek_id == dogru_secenek.id
-        
-        cevap.dogru = dogru_mu
-        
-        if dogru_mu:
-            dogru += 1
-            cevap.alinan_puan = ts.puan
-            alinan_puan += ts.puan
-        else:
-            yanlis += 1
-            cevap.alinan_puan = 0
-    
-    sonuc.dogru_sayisi = dogru
-    sonuc.yanlis_sayisi = yanlis
-    sonuc.bos_sayisi = bos
-    sonuc.alinan_puan = alinan_puan
-    sonuc.yuzde = round((alinan_puan / sonuc.toplam_puan * 100), 1) if sonuc.toplam_puan > 0 else 0
-    sonuc.gecti = sonuc.yuzde >= test.gecme_puani
+    """Test sonucunu hesapla (derlenmiş cevap anahtarıyla tek geçişte)"""
+    sonuc_degerlendir(sonuc)
 
 
 @egitim_bp.route('/test/sonuc/<int:sonuc_id>')
@@ -1329,9 +1287,10 @@ def test_sonuc(sonuc_id):
         return redirect(url_for('egitim.test_liste'))
     
     # Cevapları al
+    cevap_map = {c.soru_id: c for c in sonuc.cevaplar.all()}
     cevaplar = []
-    for ts in test.test_sorulari.order_by(TestSorusu.sira).all():
-        cevap = sonuc.cevaplar.filter_by(soru_id=ts.soru_id).first()
+    for ts in test.test_sorulari.options(db.joinedload(TestSorusu.soru)).order_by(TestSorusu.sira).all():
+        cevap = cevap_map.get(ts.soru_id)
         cevaplar.append({
             'soru': ts.soru,
             'cevap': cevap
@@ -3,13 +3,10 @@
 TG Portal - Filo Routes
 Araç yönetimi
 """
-import os
 import pandas as pd
-from decimal import Decimal
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, current_app, make_response
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
 from datetime import datetime, date
-from werkzeug.utils import secure_filename
 from app import db
 from app.models.filo import Arac, FiloIslem, YakitKayit, Sigorta, Muayene, Kaza
 from app.models.filo_update import AracTeslim, KazaFotograf, IkameArac, TrafikCezasi, VARSAYILAN_AKSESUARLAR
@@ -18,6 +15,10 @@ from app.models.ik import Calisan
 from app.models.proje import Proje
 from app.models.tedarikci import Tedarikci
 from app.utils import permission_required
+from app.arama import arama_uygula
+from app.depolama import dosya_kaydet
+from app.pdf import pdf_gonder
+from app.modules.filo.yakit_import import yakit_excel_import, eksik_kolonlari_bul
 
 filo_bp = Blueprint('filo', __name__)
 
@@ -35,13 +36,7 @@ def liste():
     query = Arac.query.filter_by(is_deleted=False)
     
     if search:
-        query = query.filter(
-            db.or_(
-                Arac.plaka.ilike(f'%{search}%'),
-                Arac.marka.ilike(f'%{search}%'),
-                Arac.model.ilike(f'%{search}%')
-            )
-        )
+        query = arama_uygula(query, Arac, search)
     
     if durum:
         query = query.filter_by(durum=AracDurumu(durum))
@@ -270,12 +265,7 @@ def api_araclar():
     query = Arac.query.filter_by(is_deleted=False)
     
     if q:
-        query = query.filter(
-            db.or_(
-                Arac.plaka.ilike(f'%{q}%'),
-                Arac.marka.ilike(f'%{q}%')
-            )
-        )
+        query = arama_uygula(query, Arac, q)
     
     araclar = query.order_by(Arac.plaka).limit(20).all()
     return jsonify([{'id': a.id, 'text': a.display_name} for a in araclar])
@@ -306,120 +296,19 @@ def yakit_import():
             # Excel'i oku
             df = pd.read_excel(file)
             
-            # Kolon mapping
-            kolon_mapping = {
-                'PLAKA': 'plaka',
-                'YAKIT TİPİ': 'yakit_tipi',
-                'İSTASYON': 'istasyon',
-                'İŞLEM TARİHİ': 'tarih',
-                'MİKTAR': 'miktar',
-                'TUTAR': 'tutar'
-            }
-            
             # Gerekli kolonları kontrol et
-            eksik_kolonlar = [k for k in ['PLAKA', 'İŞLEM TARİHİ', 'MİKTAR', 'TUTAR'] if k not in df.columns]
+            eksik_kolonlar = eksik_kolonlari_bul(df)
             if eksik_kolonlar:
                 flash(f'Eksik kolonlar: {", ".join(eksik_kolonlar)}', 'danger')
                 return redirect(request.url)
             
-            eklenen = 0
-            atlanan = 0
-            hatalar = []
-            
-            for index, row in df.iterrows():
-                try:
-                    # Plakayı normalize et
-                    plaka = str(row['PLAKA']).upper().replace(' ', '').strip()
-                    
-                    # Aracı bul
-                    arac = Arac.query.filter_by(plaka=plaka, is_deleted=False).first()
-                    if not arac:
-                        hatalar.append(f"Satır {index+2}: {plaka} plakası sistemde bulunamadı")
-                        atlanan += 1
-                        continue
-                    
-                    # Tarihi parse et
-                    tarih_str = str(row['İŞLEM TARİHİ'])
-                    try:
-                        # "31/12/2025 22:46" formatı
-                        tarih = datetime.strptime(tarih_str, '%d/%m/%Y %H:%M')
-                    except:
-                        try:
-                            # Alternatif formatlar
-                            tarih = pd.to_datetime(row['İŞLEM TARİHİ'])
-                        except:
-                            hatalar.append(f"Satır {index+2}: Tarih formatı hatalı: {tarih_str}")
-                            atlanan += 1
-                            continue
-                    
-                    # Miktarı parse et (31,65 LT formatı)
-                    miktar_str = str(row['MİKTAR']).replace(' LT', '').replace(',', '.').strip()
-                    try:
-                        litre = Decimal(miktar_str)
-                    except:
-                        hatalar.append(f"Satır {index+2}: Miktar formatı hatalı: {row['MİKTAR']}")
-                        atlanan += 1
-                        continue
-                    
-                    # Tutarı parse et (1695,17 TL formatı)
-                    tutar_str = str(row['TUTAR']).replace(' TL', '').replace(',', '.').strip()
-                    try:
-                        tutar = Decimal(tutar_str)
-                    except:
-                        hatalar.append(f"Satır {index+2}: Tutar formatı hatalı: {row['TUTAR']}")
-                        atlanan += 1
-                        continue
-                    
-                    # Birim fiyat hesapla
-                    birim_fiyat = tutar / litre if litre > 0 else Decimal('0')
-                    
-                    # Yakıt tipini belirle
-                    yakit_tipi_str = str(row.get('YAKIT TİPİ', '')).upper().strip()
-                    if 'MOTORİN' in yakit_tipi_str or 'DIZEL' in yakit_tipi_str:
-                        yakit_tipi = YakitTipi.DIZEL
-                    elif 'KURŞUNSUZ' in yakit_tipi_str or 'BENZİN' in yakit_tipi_str:
-                        yakit_tipi = YakitTipi.BENZIN
-                    elif 'LPG' in yakit_tipi_str:
-                        yakit_tipi = YakitTipi.LPG
-                    else:
-                        yakit_tipi = arac.yakit_tipi or YakitTipi.DIZEL
-                    
-                    # İstasyon adı
-                    istasyon = str(row.get('İSTASYON', '')).strip()[:100]
-                    
-                    # Duplicate kontrolü (aynı araç, aynı tarih, aynı miktar)
-                    mevcut = YakitKayit.query.filter(
-                        YakitKayit.arac_id == arac.id,
-                        YakitKayit.tarih == tarih,
-                        YakitKayit.litre == litre
-                    ).first()
-                    
-                    if mevcut:
-                        atlanan += 1
-                        continue
-                    
-                    # Yakıt kaydı oluştur
-                    yakit = YakitKayit(
-                        arac_id=arac.id,
-                        tarih=tarih,
-                        km=arac.km or 0,  # Mevcut km (Excel'de yok)
-                        yakit_tipi=yakit_tipi,
-                        litre=litre,
-                        birim_fiyat=birim_fiyat,
-                        tutar=tutar,
-                        istasyon_adi=istasyon,
-                        full_depo=True
-                    )
-                    
-                    db.session.add(yakit)
-                    eklenen += 1
-                    
-                except Exception as e:
-                    hatalar.append(f"Satır {index+2}: {str(e)}")
-                    atlanan += 1
-            
+            sonuc = yakit_excel_import(df)
             db.session.commit()
             
+            eklenen = sonuc['eklenen']
+            atlanan = sonuc['atlanan']
+            hatalar = sonuc['hatalar']
+            
             flash(f'{eklenen} yakıt kaydı eklendi, {atlanan} kayıt atlandı.', 'success')
             
             if hatalar[:10]:  # İlk 10 hatayı göster
@@ -505,11 +394,7 @@ def arac_teslim(id):
         if 'fotograflar' in request.files:
             for file in request.files.getlist('fotograflar'):
                 if file and file.filename:
-                    filename = secure_filename(f"{arac.plaka}_{datetime.now().strftime('%Y%m%d%H%M%S')}_{file.filename}")
-                    upload_path = os.path.join(current_app.config.get('UPLOAD_FOLDER', 'uploads'), 'teslim')
-                    os.makedirs(upload_path, exist_ok=True)
-                    file.save(os.path.join(upload_path, filename))
-                    fotograflar.append(f"teslim/{filename}")
+                    fotograflar.append(dosya_kaydet(file, turev=True).yol)
         
         teslim.fotograflar = fotograflar
         
@@ -570,11 +455,7 @@ def arac_iade(id):
         if 'fotograflar' in request.files:
             for file in request.files.getlist('fotograflar'):
                 if file and file.filename:
-                    filename = secure_filename(f"{arac.plaka}_{datetime.now().strftime('%Y%m%d%H%M%S')}_{file.filename}")
-                    upload_path = os.path.join(current_app.config.get('UPLOAD_FOLDER', 'uploads'), 'teslim')
-                    os.makedirs(upload_path, exist_ok=True)
-                    file.save(os.path.join(upload_path, filename))
-                    fotograflar.append(f"teslim/{filename}")
+                    fotograflar.append(dosya_kaydet(file, turev=True).yol)
         
         iade.fotograflar = fotograflar
         
@@ -612,20 +493,16 @@ def teslim_detay(id):
 @login_required
 @permission_required('filo.view')
 def teslim_pdf(id):
-    """Teslim/iade PDF oluştur"""
+    """Teslim/iade PDF (kayıt değişmedikçe cache'ten)"""
     teslim = AracTeslim.query.get_or_404(id)
     
-    # HTML şablonunu render et ve PDF'e çevir
-    html = render_template('filo/teslim_pdf.html', 
-                          teslim=teslim,
-                          aksesuarlar=VARSAYILAN_AKSESUARLAR)
-    
-    # WeasyPrint veya başka bir PDF kütüphanesi ile PDF oluştur
-    # Şimdilik HTML olarak döndür
-    from flask import make_response
-    response = make_response(html)
-    response.headers['Content-Type'] = 'text/html; charset=utf-8'
-    # response.headers['Content-Disposition'] = f'attachment; filename=teslim_{teslim.id}.pdf'
+    response, hata = pdf_gonder('teslim', teslim, 'filo/teslim_pdf.html',
+                                f'teslim_{teslim.id}.pdf',
+                                teslim=teslim,
+                                aksesuarlar=VARSAYILAN_AKSESUARLAR)
+    if hata:
+        flash(hata, 'warning')
+        return redirect(url_for('filo.teslim_detay', id=id))
     return response
 
 
@@ -693,16 +570,13 @@ def kaza_ekle(id):
         # Fotoğrafları kaydet
         for file in request.files.getlist('fotograflar'):
             if file and file.filename:
-                filename = secure_filename(f"kaza_{kaza.id}_{datetime.now().strftime('%Y%m%d%H%M%S')}_{file.filename}")
-                upload_path = os.path.join(current_app.config.get('UPLOAD_FOLDER', 'uploads'), 'kaza')
-                os.makedirs(upload_path, exist_ok=True)
-                file.save(os.path.join(upload_path, filename))
+                depo_dosyasi = dosya_kaydet(file, turev=True)
                 
                 foto = KazaFotograf(
                     kaza_id=kaza.id,
                     dosya_adi=file.filename,
-                    dosya_yolu=f"kaza/{filename}",
-                    dosya_boyut=file.content_length,
+                    dosya_yolu=depo_dosyasi.yol,
+                    dosya_boyut=depo_dosyasi.boyut,
                     mime_type=file.content_type,
                     yukleyen_id=current_user.id
                 )
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+TG Portal - Filo Yakıt İçe Aktarma Motoru
+Akaryakıt kartı ekstrelerini satır satır değil, kolon bazında işler:
+plakalar tek sorguda çözülür, mükerrer kayıtlar tek anti-join ile ayıklanır
+ve kalan satırlar toplu INSERT ile eklenir.
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+import pandas as pd
+from sqlalchemy import insert
+from app import db
+from app.models.filo import Arac, YakitKayit
+from app.models.base import YakitTipi
+
+
+ZORUNLU_KOLONLAR = ['PLAKA', 'İŞLEM TARİHİ', 'MİKTAR', 'TUTAR']
+
+# Tek INSERT ifadesinde gönderilecek satır sayısı
+INSERT_BATCH = 1000
+
+KURUS = Decimal('0.01')
+
+
+def eksik_kolonlari_bul(df):
+    """Excel'de bulunmayan zorunlu kolonları döndürür"""
+    return [k for k in ZORUNLU_KOLONLAR if k not in df.columns]
+
+
+def _metin(df, kolon):
+    """Opsiyonel kolonu boş string ile doldurulmuş metin serisi olarak döndürür"""
+    if kolon not in df.columns:
+        return pd.Series('', index=df.index)
+    return df[kolon].fillna('').astype(str)
+
+
+def _sayi_parse(seri, birim):
+    """'31,65 LT' / '1695,17 TL' formatındaki kolonu Decimal serisine çevirir"""
+    temiz = (seri.astype(str)
+             .str.replace(f' {birim}', '', regex=False)
+             .str.replace(',', '.', regex=False)
+             .str.strip())
+    gecerli = pd.to_numeric(temiz, errors='coerce').notna()
+    degerler = pd.Series(None, index=seri.index, dtype=object)
+    degerler[gecerli] = temiz[gecerli].map(
+        lambda s: Decimal(s).quantize(KURUS, rounding=ROUND_HALF_UP)
+    )
+    return degerler, gecerli
+
+
+def _tarih_parse(seri):
+    """'31/12/2025 22:46' formatını, olmazsa pandas'ın genel çözümlemesini dener"""
+    tarih = pd.to_datetime(seri.astype(str), format='%d/%m/%Y %H:%M', errors='coerce')
+    kalan = tarih.isna() & seri.notna()
+    if kalan.any():
+        tarih[kalan] = pd.to_datetime(seri[kalan], format='mixed', errors='coerce')
+    return tarih
+
+
+def _yakit_tipi_belirle(seri, arac_yakit_tipi):
+    """YAKIT TİPİ metninden enum üretir, tanınmayanlarda aracın yakıt tipini kullanır"""
+    tip = seri.str.upper().str.strip()
+    sonuc = arac_yakit_tipi.fillna(YakitTipi.DIZEL).astype(object)
+    # Sıra önemli: orijinal kontrol sırasının tersinden yazılır, ilk eşleşen kazanır
+    sonuc[tip.str.contains('LPG', regex=False)] = YakitTipi.LPG
+    sonuc[tip.str.contains('KURŞUNSUZ|BENZİN', regex=True)] = YakitTipi.BENZIN
+    sonuc[tip.str.contains('MOTORİN|DIZEL', regex=True)] = YakitTipi.DIZEL
+    return sonuc
+
+
+def yakit_excel_import(df):
+    """
+    Yakıt ekstresini içe aktarır.
+
+    Çağıran taraf commit etmekten sorumludur.
+    Dönüş: {'eklenen': int, 'atlanan': int, 'hatalar': [str, ...]}
+    """
+    df = df.reset_index(drop=True)
+    satir_no = df.index + 2  # Excel başlık satırı + 1 tabanlı
+    hata = pd.Series(None, index=df.index, dtype=object)
+
+    # Kolon bazlı normalizasyon
+    plaka = df['PLAKA'].astype(str).str.upper().str.replace(' ', '', regex=False).str.strip()
+    tarih = _tarih_parse(df['İŞLEM TARİHİ'])
+    litre, litre_gecerli = _sayi_parse(df['MİKTAR'], 'LT')
+    tutar, tutar_gecerli = _sayi_parse(df['TUTAR'], 'TL')
+
+    # Plakaları tek sorguda çöz
+    araclar = db.session.query(Arac.id, Arac.plaka, Arac.km, Arac.yakit_tipi).filter(
+        Arac.plaka.in_(plaka.unique().tolist()),
+        Arac.is_deleted == False
+    ).all()
+    arac_df = pd.DataFrame(araclar, columns=['arac_id', 'plaka', 'arac_km', 'arac_yakit_tipi'])
+    arac_df = arac_df.set_index('plaka')
+    arac_id = plaka.map(arac_df['arac_id'])
+
+    # Hata mesajları: orijinal kontrol sırasının tersinden yazılır, ilk hata kazanır
+    ham_tutar = df['TUTAR'].astype(str)
+    ham_miktar = df['MİKTAR'].astype(str)
+    ham_tarih = df['İŞLEM TARİHİ'].astype(str)
+    maske = ~tutar_gecerli
+    hata[maske] = 'Satır ' + satir_no[maske].astype(str) + ': Tutar formatı hatalı: ' + ham_tutar[maske]
+    maske = ~litre_gecerli
+    hata[maske] = 'Satır ' + satir_no[maske].astype(str) + ': Miktar formatı hatalı: ' + ham_miktar[maske]
+    maske = tarih.isna()
+    hata[maske] = 'Satır ' + satir_no[maske].astype(str) + ': Tarih formatı hatalı: ' + ham_tarih[maske]
+    maske = arac_id.isna()
+    hata[maske] = 'Satır ' + satir_no[maske].astype(str) + ': ' + plaka[maske] + ' plakası sistemde bulunamadı'
+
+    hatali = hata.notna()
+    hatalar = hata[hatali].tolist()
+
+    aday = pd.DataFrame({
+        'arac_id': arac_id[~hatali].astype(int),
+        'tarih': tarih[~hatali],
+        'litre': litre[~hatali],
+        'tutar': tutar[~hatali],
+        'yakit_tipi_metin': _metin(df, 'YAKIT TİPİ')[~hatali],
+        'istasyon_adi': _metin(df, 'İSTASYON')[~hatali].str.strip().str[:100],
+    })
+
+    # Dosya içindeki tekrarlar
+    aday = aday.drop_duplicates(subset=['arac_id', 'tarih', 'litre'])
+
+    # Veritabanındaki kayıtlarla tek anti-join
+    if not aday.empty:
+        mevcut = db.session.query(YakitKayit.arac_id, YakitKayit.tarih, YakitKayit.litre).filter(
+            YakitKayit.arac_id.in_(aday['arac_id'].unique().tolist()),
+            YakitKayit.tarih >= aday['tarih'].min().to_pydatetime(),
+            YakitKayit.tarih <= aday['tarih'].max().to_pydatetime()
+        ).all()
+        if mevcut:
+            mevcut_df = pd.DataFrame(mevcut, columns=['arac_id', 'tarih', 'litre'])
+            mevcut_df['tarih'] = pd.to_datetime(mevcut_df['tarih'])
+            aday = aday.merge(mevcut_df.drop_duplicates(), on=['arac_id', 'tarih', 'litre'],
+                              how='left', indicator=True)
+            aday = aday[aday['_merge'] == 'left_only'].drop(columns='_merge')
+
+    atlanan = len(df) - len(aday)
+
+    if aday.empty:
+        return {'eklenen': 0, 'atlanan': atlanan, 'hatalar': hatalar}
+
+    arac_bilgi = arac_df.reset_index().set_index('arac_id')
+    yakit_tipi = _yakit_tipi_belirle(aday['yakit_tipi_metin'],
+                                     aday['arac_id'].map(arac_bilgi['arac_yakit_tipi']))
+    km = aday['arac_id'].map(arac_bilgi['arac_km']).fillna(0).astype(int)
+
+    kayitlar = [
+        {
+            'arac_id': int(a_id),
+            'tarih': t.to_pydatetime(),
+            'km': int(k),  # Mevcut km (Excel'de yok)
+            'yakit_tipi': y_tipi,
+            'litre': l,
+            'birim_fiyat': (tt / l).quantize(KURUS, rounding=ROUND_HALF_UP) if l > 0 else Decimal('0'),
+            'tutar': tt,
+            'istasyon_adi': ist,
+            'full_depo': True,
+        }
+        for a_id, t, k, y_tipi, l, tt, ist in zip(
+            aday['arac_id'], aday['tarih'], km, yakit_tipi,
+            aday['litre'], aday['tutar'], aday['istasyon_adi']
+        )
+    ]
+
+    for i in range(0, len(kayitlar), INSERT_BATCH):
+        db.session.execute(insert(YakitKayit), kayitlar[i:i + INSERT_BATCH])
+
+    return {'eklenen': len(kayitlar), 'atlanan': atlanan, 'hatalar': hatalar}
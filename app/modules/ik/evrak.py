@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+TG Portal - Aday Evrak Tamamlanma Motoru
+Adayların eksik zorunlu evrakları, aday başına sorgu atmak yerine
+(aday x zorunlu evrak tipi) çiftleri üzerinde tek NOT EXISTS sorgusuyla
+hesaplanır. Tek aday için sonuç isteğe bağlı olarak Redis'te saklanır.
+"""
+
+from itertools import chain
+
+from flask import has_app_context
+from sqlalchemy import exists, func, select, true
+
+from app import db
+from app.cache import (
+    TUMU, anahtar_sil, degisiklik_izle, json_oku, json_yaz, versiyon_artir, versiyon_oku
+)
+from app.models.ik import Aday, AdayEvrak, EvrakTipi
+
+
+# Eksik evrak listesinde yüklenmiş sayılan durumlar
+KABUL_DURUMLARI = ('yuklendi', 'onaylandi')
+# İşe alım için yalnızca onaylı evraklar sayılır
+ONAY_DURUMLARI = ('onaylandi',)
+
+# Evrak takibi yapılmayan aday durumları
+KAPALI_ADAY_DURUMLARI = ('red', 'iptal', 'ise_alindi')
+
+EVRAK_TIPI_VERSIYON_KEY = 'evrak_tipi:versiyon'
+EVRAK_DURUMU_CACHE_TTL = 600  # saniye
+
+
+class EvrakDurumu:
+    """Bir adayın zorunlu evrak durumu"""
+    __slots__ = ('zorunlu_sayi', 'eksik')
+
+    def __init__(self, zorunlu_sayi, eksik):
+        self.zorunlu_sayi = zorunlu_sayi
+        self.eksik = eksik  # eksik EvrakTipi listesi (sıraya göre)
+
+    @property
+    def tamamlanan(self):
+        return self.zorunlu_sayi - len(self.eksik)
+
+    @property
+    def oran(self):
+        """Tamamlanma yüzdesi (zorunlu evrak yoksa 100)"""
+        if self.zorunlu_sayi == 0:
+            return 100
+        return int((self.tamamlanan / self.zorunlu_sayi) * 100)
+
+    @property
+    def tamam(self):
+        return not self.eksik
+
+
+def zorunlu_evrak_tipleri():
+    """Aktif zorunlu evrak tipleri (görüntüleme sırasına göre)"""
+    return EvrakTipi.query.filter_by(zorunlu=True, aktif=True).order_by(
+        EvrakTipi.sira, EvrakTipi.id
+    ).all()
+
+
+def acik_aday_kosullari():
+    """Evrak takibi yapılan adaylar"""
+    return (Aday.is_deleted == False, Aday.durum.notin_(KAPALI_ADAY_DURUMLARI))
+
+
+def _eksik_kosulu(durumlar):
+    """(Aday, EvrakTipi) çiftinde kabul edilen durumda evrak yok"""
+    return ~exists().where(
+        AdayEvrak.aday_id == Aday.id,
+        AdayEvrak.evrak_tipi_id == EvrakTipi.id,
+        AdayEvrak.durum.in_(durumlar)
+    )
+
+
+def _eksik_ciftleri(aday_kosullari, durumlar):
+    return select(Aday.id.label('aday_id'), EvrakTipi.id.label('evrak_tipi_id')).select_from(
+        Aday
+    ).join(EvrakTipi, true()).where(
+        EvrakTipi.zorunlu == True,
+        EvrakTipi.aktif == True,
+        _eksik_kosulu(durumlar),
+        *aday_kosullari
+    )
+
+
+def eksik_evrak_tipleri(aday_kosullari, durumlar=KABUL_DURUMLARI):
+    """
+    Koşula uyan adayların eksik zorunlu evrak tipi id'leri (tek sorgu).
+    Dönüş: {aday_id: [evrak_tipi_id, ...]} - yalnızca eksiği olan adaylar
+    """
+    sonuc = {}
+    for aday_id, tip_id in db.session.execute(_eksik_ciftleri(aday_kosullari, durumlar)):
+        sonuc.setdefault(aday_id, []).append(tip_id)
+    return sonuc
+
+
+def evrak_durumlari(aday_kosullari, durumlar=KABUL_DURUMLARI, tipler=None):
+    """
+    Koşula uyan ve eksiği olan adayların EvrakDurumu'ları.
+    Dönüş: {aday_id: EvrakDurumu}
+    """
+    if tipler is None:
+        tipler = zorunlu_evrak_tipleri()
+    if not tipler:
+        return {}
+    sira = {t.id: i for i, t in enumerate(tipler)}
+    tip_map = {t.id: t for t in tipler}
+    return {
+        aday_id: EvrakDurumu(len(tipler), [tip_map[i] for i in sorted(tip_ids, key=sira.get)])
+        for aday_id, tip_ids in eksik_evrak_tipleri(aday_kosullari, durumlar).items()
+    }
+
+
+def eksik_evrakli_aday_sayisi(durumlar=ONAY_DURUMLARI):
+    """Açık adaylardan en az bir zorunlu evrakı eksik olanların sayısı (tek sorgu)"""
+    eksik_var = exists().select_from(EvrakTipi).where(
+        EvrakTipi.zorunlu == True,
+        EvrakTipi.aktif == True,
+        _eksik_kosulu(durumlar)
+    )
+    return db.session.execute(
+        select(func.count()).select_from(Aday).where(*acik_aday_kosullari(), eksik_var)
+    ).scalar()
+
+
+def _cache_anahtari(versiyon, aday_id, durumlar):
+    return f"evrak_durumu:{versiyon}:{'-'.join(durumlar)}:{aday_id}"
+
+
+def aday_evrak_durumu(aday_id, durumlar=KABUL_DURUMLARI, cache=False):
+    """
+    Tek adayın zorunlu evrak durumu. cache=True ise eksik tip id'leri
+    Redis'te saklanır; adayın evrakı veya evrak tipleri değişince silinir.
+    İşe alım gibi kesin kontrollerde cache kullanılmamalıdır.
+    """
+    tipler = zorunlu_evrak_tipleri()
+
+    anahtar = None
+    eksik_ids = None
+    if cache:
+        versiyon = versiyon_oku(EVRAK_TIPI_VERSIYON_KEY)
+        if versiyon is not None:
+            anahtar = _cache_anahtari(versiyon, aday_id, durumlar)
+            eksik_ids = json_oku(anahtar)
+
+    if eksik_ids is None:
+        eksik_ids = eksik_evrak_tipleri((Aday.id == aday_id,), durumlar).get(aday_id, [])
+        if anahtar:
+            json_yaz(anahtar, eksik_ids, EVRAK_DURUMU_CACHE_TTL)
+
+    eksik = set(eksik_ids)
+    return EvrakDurumu(len(tipler), [t for t in tipler if t.id in eksik])
+
+
+# ============================================================
+# CACHE INVALIDATION
+# ============================================================
+
+def evrak_durumu_cache_temizle(aday_ids=None):
+    """Verilen adayların (None ise tüm adayların) evrak durumu cache'ini siler"""
+    if not has_app_context():
+        return
+    if aday_ids is None:
+        versiyon_artir(EVRAK_TIPI_VERSIYON_KEY)
+        return
+    versiyon = versiyon_oku(EVRAK_TIPI_VERSIYON_KEY)
+    if versiyon is None:
+        return
+    anahtar_sil(*[
+        _cache_anahtari(versiyon, aday_id, durumlar)
+        for aday_id in aday_ids
+        for durumlar in (KABUL_DURUMLARI, ONAY_DURUMLARI)
+    ])
+
+
+def _evrak_degisikligi(session, yeni, degisen, silinen):
+    """Evrak tipi değişirse TUMU, yoksa evrakı değişen adayların id'leri"""
+    aday_ids = set()
+    for obj in chain(yeni, degisen, silinen):
+        if isinstance(obj, EvrakTipi):
+            return TUMU
+        aday_id = obj.aday_id or (obj.aday.id if obj.aday else None)
+        if aday_id:
+            aday_ids.add(aday_id)
+    return aday_ids
+
+
+degisiklik_izle((AdayEvrak, EvrakTipi), 'evrak_degisti', evrak_durumu_cache_temizle,
+                secici=_evrak_degisikligi)
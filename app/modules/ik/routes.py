@@ -6,11 +6,10 @@ Güncellenmiş versiyon: Evrak yönetimi, İşten çıkış, Aday→Çalışan d
 
 from datetime import datetime, date
 from decimal import Decimal
-from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, send_file, jsonify
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
 from app.models.ik import ZimmetTipi, Zimmet, ZimmetLog
 from werkzeug.utils import secure_filename
-import os
 
 from app import db
 from app.models.ik import (
@@ -19,6 +18,12 @@ from app.models.ik import (
 )
 from app.models.base import CalisanDurumu
 from app.utils import permission_required, paginate_query
+from app.arama import arama_uygula
+from app.depolama import dosya_kaydet, dosya_gonder
+from app.modules.ik.evrak import (
+    ONAY_DURUMLARI, acik_aday_kosullari, aday_evrak_durumu,
+    eksik_evrakli_aday_sayisi, evrak_durumlari
+)
 
 ik_bp = Blueprint('ik', __name__)
 
@@ -43,17 +48,9 @@ def dashboard():
         Aday.durum.in_(['basvurdu', 'degerlendiriliyor', 'mulakat'])
     ).count()
     bekleyen_izin = Izin.query.filter_by(durum='beklemede').count()
-    eksik_evrak_aday = 0
-    
-    # Eksik evraklı aday sayısı
-    for aday in Aday.query.filter(Aday.is_deleted==False, Aday.durum.notin_(['red', 'iptal', 'ise_alindi'])).all():
-        zorunlu = EvrakTipi.query.filter_by(zorunlu=True, aktif=True).count()
-        yuklenen = aday.evraklar.join(EvrakTipi).filter(
-            EvrakTipi.zorunlu == True,
-            AdayEvrak.durum == 'onaylandi'
-        ).count()
-        if yuklenen < zorunlu:
-            eksik_evrak_aday += 1
+    
+    # Eksik evraklı aday sayısı (tek sorgu)
+    eksik_evrak_aday = eksik_evrakli_aday_sayisi()
     
     # Departman bazlı dağılım
     departman_stats = db.session.query(
@@ -106,15 +103,7 @@ def liste():
     if durum:
         query = query.filter(Calisan.durum == CalisanDurumu(durum))
     if search:
-        search_filter = f'%{search}%'
-        query = query.filter(
-            db.or_(
-                Calisan.ad.ilike(search_filter),
-                Calisan.soyad.ilike(search_filter),
-                Calisan.sicil_no.ilike(search_filter),
-                Calisan.email.ilike(search_filter)
-            )
-        )
+        query = arama_uygula(query, Calisan, search)
     
     query = query.order_by(Calisan.ad, Calisan.soyad)
     pagination = paginate_query(query, page, 20)
@@ -347,22 +336,9 @@ def aday_detay(id):
     aday = Aday.query.get_or_404(id)
     evrak_tipleri = EvrakTipi.query.filter_by(aktif=True).order_by(EvrakTipi.sira).all()
     
-    # Evrak tamamlanma oranı hesapla
-    zorunlu_evraklar = EvrakTipi.query.filter_by(zorunlu=True, aktif=True).count()
-    if zorunlu_evraklar == 0:
-        evrak_tamamlanma = 100
-    else:
-        yuklenen = aday.evraklar.join(EvrakTipi).filter(
-            EvrakTipi.zorunlu == True,
-            AdayEvrak.durum == 'onaylandi'
-        ).count()
-        evrak_tamamlanma = int((yuklenen / zorunlu_evraklar) * 100)
-    
-    # Eksik evraklar
-    yuklenen_tipler = [e.evrak_tipi_id for e in aday.evraklar.filter(
-        AdayEvrak.durum.in_(['yuklendi', 'onaylandi'])
-    ).all()]
-    eksik_evraklar = [t for t in EvrakTipi.query.filter_by(zorunlu=True, aktif=True).all() if t.id not in yuklenen_tipler]
+    # Evrak tamamlanma oranı (onaylı) ve eksik evraklar (yüklenmemiş)
+    evrak_tamamlanma = aday_evrak_durumu(aday.id, ONAY_DURUMLARI, cache=True).oran
+    eksik_evraklar = aday_evrak_durumu(aday.id, cache=True).eksik
     
     ise_alim_hazir = len(eksik_evraklar) == 0 and aday.kvkk_onay
     
@@ -425,26 +401,18 @@ def aday_evrak_yukle(id):
     if dosya and allowed_file(dosya.filename):
         evrak_tipi_id = int(request.form['evrak_tipi_id'])
         
-        # Dosya adı oluştur
         filename = secure_filename(dosya.filename)
-        ext = filename.rsplit('.', 1)[1].lower()
-        new_filename = f"aday_{id}_{evrak_tipi_id}_{datetime.now().strftime('%Y%m%d%H%M%S')}.{ext}"
         
-        # Klasör oluştur
-        upload_folder = os.path.join(current_app.config['UPLOAD_FOLDER'], 'evraklar', 'adaylar', str(id))
-        os.makedirs(upload_folder, exist_ok=True)
-        
-        # Dosyayı kaydet
-        filepath = os.path.join(upload_folder, new_filename)
-        dosya.save(filepath)
+        # Dosyayı depoya kaydet
+        depo_dosyasi = dosya_kaydet(dosya)
         
         # Veritabanına ekle
         evrak = AdayEvrak(
             aday_id=id,
             evrak_tipi_id=evrak_tipi_id,
             dosya_adi=filename,
-            dosya_yolu=filepath,
-            dosya_boyut=os.path.getsize(filepath),
+            dosya_yolu=depo_dosyasi.yol,
+            dosya_boyut=depo_dosyasi.boyut,
             mime_type=dosya.content_type,
             yukleyen_id=current_user.id
         )
@@ -494,7 +462,16 @@ def evrak_reddet(id):
 def evrak_indir(id):
     """Evrak indir"""
     evrak = AdayEvrak.query.get_or_404(id)
-    return send_file(evrak.dosya_yolu, as_attachment=True, download_name=evrak.dosya_adi)
+    return dosya_gonder(evrak.dosya_yolu, as_attachment=True, download_name=evrak.dosya_adi)
+
+
+@ik_bp.route('/evrak/<int:id>/goster')
+@login_required
+@permission_required('ik.view')
+def evrak_goster(id):
+    """Evrakı tarayıcıda göster (tam disk yolu saklanan eski kayıtlar için)"""
+    evrak = AdayEvrak.query.get_or_404(id)
+    return dosya_gonder(evrak.dosya_yolu, download_name=evrak.dosya_adi, mimetype=evrak.mime_type)
 
 
 @ik_bp.route('/evrak-tipleri')
@@ -531,25 +508,17 @@ def evrak_tipi_ekle():
 @permission_required('ik.view')
 def eksik_evraklar():
     """Eksik evrakları olan adaylar"""
-    adaylar_data = []
-    
-    for aday in Aday.query.filter(Aday.is_deleted==False, Aday.durum.notin_(['red', 'iptal', 'ise_alindi'])).all():
-        zorunlu_tipler = EvrakTipi.query.filter_by(zorunlu=True, aktif=True).all()
-        yuklenen_tipler = [e.evrak_tipi_id for e in aday.evraklar.filter(
-            AdayEvrak.durum.in_(['yuklendi', 'onaylandi'])
-        ).all()]
-        eksik = [t for t in zorunlu_tipler if t.id not in yuklenen_tipler]
-        
-        if eksik:
-            zorunlu_count = len(zorunlu_tipler)
-            yuklenen_count = zorunlu_count - len(eksik)
-            oran = int((yuklenen_count / zorunlu_count) * 100) if zorunlu_count > 0 else 0
-            
-            adaylar_data.append({
-                'aday': aday,
-                'eksik': eksik,
-                'oran': oran
-            })
+    durumlar = evrak_durumlari(acik_aday_kosullari())
+    
+    adaylar = Aday.query.options(db.joinedload(Aday.pozisyon)).filter(
+        Aday.id.in_(durumlar.keys())
+    ).order_by(Aday.id).all() if durumlar else []
+    
+    adaylar_data = [{
+        'aday': aday,
+        'eksik': durumlar[aday.id].eksik,
+        'oran': durumlar[aday.id].oran
+    } for aday in adaylar]
     
     return render_template('ik/eksik_evraklar.html', adaylar=adaylar_data)
 
@@ -565,12 +534,8 @@ def aday_calisana_donustur(id):
     """Adayı çalışana dönüştür"""
     aday = Aday.query.get_or_404(id)
     
-    # Evrak kontrolü
-    zorunlu_tipler = EvrakTipi.query.filter_by(zorunlu=True, aktif=True).all()
-    yuklenen_tipler = [e.evrak_tipi_id for e in aday.evraklar.filter(
-        AdayEvrak.durum == 'onaylandi'
-    ).all()]
-    eksik = [t for t in zorunlu_tipler if t.id not in yuklenen_tipler]
+    # Evrak kontrolü (cache'siz - kesin kontrol)
+    eksik = aday_evrak_durumu(aday.id, ONAY_DURUMLARI).eksik
     
     if eksik:
         flash('Tüm zorunlu evraklar onaylanmadan işe alım yapılamaz.', 'danger')
@@ -4,42 +4,50 @@ TG Portal - Public Kariyer Sayfası
 Açık pozisyonları görüntüleme ve doğrudan başvuru - Login gerektirmez
 """
 
-from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app
+from flask import Blueprint, render_template, redirect, url_for, flash, request
 from datetime import datetime
 from app import db
+from app.depolama import dosya_kaydet
 from app.models.ik import Aday, KAYNAK_TURLERI
-from app.models.proje import HedefKadro, Proje, Musteri
+from app.models.proje import HedefKadro, Proje, Musteri, KADRO_SAYILARI
 
 kariyer_bp = Blueprint('kariyer', __name__)
 
+# Ekranda gösterilen fotoğraflar: küçük/orta boy türevleri üretilir
+GORSEL_ALANLARI = {'foto', 'kimlik_on', 'kimlik_arka', 'ehliyet_foto'}
+
 
 @kariyer_bp.route('/')
 def pozisyonlar():
     """Açık pozisyonları listele"""
-    # Aktif projelerdeki eksik kadrolu pozisyonları getir
-    kadrolar = HedefKadro.query.join(Proje).join(Musteri).filter(
+    # Aktif projelerdeki eksik kadrolu pozisyonlar (eksik kontrolü SQL'de)
+    acik_kosullar = (
         Proje.aktif == True,
         Musteri.aktif == True,
-        HedefKadro.is_deleted == False
-    ).all()
+        HedefKadro.is_deleted == False,
+        HedefKadro.hedef_sayi > HedefKadro.mevcut_sayi
+    )
     
-    # Sadece eksik kadrosu olanları filtrele
-    acik_pozisyonlar = [k for k in kadrolar if k.eksik_sayi > 0]
+    # İl filtresi için açık pozisyonu olan iller
+    iller = [il for (il,) in db.session.query(HedefKadro.il).join(Proje).join(Musteri).filter(
+        *acik_kosullar, HedefKadro.il.isnot(None), HedefKadro.il != ''
+    ).distinct().order_by(HedefKadro.il)]
     
-    # İllere göre grupla
-    iller = set()
-    for k in acik_pozisyonlar:
-        if k.il:
-            iller.add(k.il)
+    query = HedefKadro.query.join(Proje).join(Musteri).options(
+        KADRO_SAYILARI,
+        db.contains_eager(HedefKadro.proje).contains_eager(Proje.musteri)
+    ).filter(*acik_kosullar)
     
     # Filtreler
     il_filtre = request.args.get('il')
     if il_filtre:
-        acik_pozisyonlar = [k for k in acik_pozisyonlar if k.il == il_filtre]
+        query = query.filter(HedefKadro.il == il_filtre)
+    
+    acik_pozisyonlar = query.order_by(HedefKadro.oncelik, HedefKadro.id).all()
     
     return render_template('kariyer/pozisyonlar.html', 
                          pozisyonlar=acik_pozisyonlar,
-                         iller=sorted(iller),
+                         iller=iller,
                          il_filtre=il_filtre)
 
 
@@ -169,23 +177,14 @@ def basvuru_form(token):
         aday.vardiyali_calisabilir = request.form.get('vardiyali_calisabilir') == 'on'
         aday.seyahat_engeli = request.form.get('seyahat_engeli') == 'on'
         
-        # Dosya yüklemeleri
-        import os
-        from werkzeug.utils import secure_filename
-        
-        upload_folder = os.path.join(current_app.root_path, 'static', 'uploads', 'adaylar', str(aday.id))
-        os.makedirs(upload_folder, exist_ok=True)
-        
+        # Dosya yüklemeleri (depoda; statik klasörden herkese açık sunulmaz)
         file_fields = ['foto', 'cv_dosya', 'kimlik_on', 'kimlik_arka', 'ehliyet_foto', 
                       'diploma_foto', 'src_foto', 'ikametgah', 'adli_sicil']
         
         for field in file_fields:
             file = request.files.get(field)
             if file and file.filename:
-                filename = secure_filename(f"{field}_{aday.id}_{file.filename}")
-                filepath = os.path.join(upload_folder, filename)
-                file.save(filepath)
-                setattr(aday, field, f"uploads/adaylar/{aday.id}/{filename}")
+                setattr(aday, field, dosya_kaydet(file, turev=field in GORSEL_ALANLARI).yol)
         
         # Başvuruyu tamamla
         aday.basvuru_tamamlandi = True
@@ -5,10 +5,8 @@ TG Portal - Masraf Modülü Routes
 
 from datetime import datetime, date
 from decimal import Decimal
-import os
-import uuid
 
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, current_app, send_file
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
 
@@ -18,6 +16,7 @@ from app.models.ik import Calisan
 from app.models.proje import Proje
 from app.models.onay import OnayServisi
 from app.utils import permission_required, paginate_query
+from app.depolama import dosya_kaydet, dosya_var_mi, dosya_gonder, dosya_sil
 
 masraf_bp = Blueprint('masraf', __name__)
 
@@ -161,17 +160,8 @@ def ekle():
         if 'dosya' in request.files:
             file = request.files['dosya']
             if file and file.filename and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                unique_name = f"{uuid.uuid4().hex}_{filename}"
-                
-                upload_folder = os.path.join(current_app.config.get('UPLOAD_FOLDER', 'uploads'), 'masraf', str(masraf.id))
-                os.makedirs(upload_folder, exist_ok=True)
-                
-                filepath = os.path.join(upload_folder, unique_name)
-                file.save(filepath)
-                
-                masraf.dosya_adi = filename
-                masraf.dosya_yolu = filepath
+                masraf.dosya_adi = secure_filename(file.filename)
+                masraf.dosya_yolu = dosya_kaydet(file).yol
                 masraf.dosya_tipi = file.content_type
         
         db.session.commit()
@@ -235,21 +225,11 @@ def duzenle(id):
         if 'dosya' in request.files:
             file = request.files['dosya']
             if file and file.filename and allowed_file(file.filename):
-                # Eski dosyayı sil
-                if masraf.dosya_yolu and os.path.exists(masraf.dosya_yolu):
-                    os.remove(masraf.dosya_yolu)
-                
-                filename = secure_filename(file.filename)
-                unique_name = f"{uuid.uuid4().hex}_{filename}"
-                
-                upload_folder = os.path.join(current_app.config.get('UPLOAD_FOLDER', 'uploads'), 'masraf', str(masraf.id))
-                os.makedirs(upload_folder, exist_ok=True)
-                
-                filepath = os.path.join(upload_folder, unique_name)
-                file.save(filepath)
+                # Eski dosyayı bırak
+                dosya_sil(masraf.dosya_yolu)
                 
-                masraf.dosya_adi = filename
-                masraf.dosya_yolu = filepath
+                masraf.dosya_adi = secure_filename(file.filename)
+                masraf.dosya_yolu = dosya_kaydet(file).yol
                 masraf.dosya_tipi = file.content_type
         
         db.session.commit()
@@ -354,13 +334,13 @@ def dosya_indir(id):
         flash('Bu dosyaya erişim yetkiniz yok.', 'danger')
         return redirect(url_for('masraf.liste'))
     
-    if not masraf.dosya_yolu or not os.path.exists(masraf.dosya_yolu):
+    if not dosya_var_mi(masraf.dosya_yolu):
         flash('Dosya bulunamadı.', 'warning')
         return redirect(url_for('masraf.detay', id=id))
     
-    return send_file(masraf.dosya_yolu, 
-                     download_name=masraf.dosya_adi,
-                     as_attachment=True)
+    return dosya_gonder(masraf.dosya_yolu,
+                        download_name=masraf.dosya_adi,
+                        as_attachment=True)
 
 
 # ============================================================
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+TG Portal - Bekleyen Onay Sayacı
+Header rozeti için kullanıcı başına bekleyen onay sayısı Redis'te tutulur.
+Sayı indeksli bir COUNT ile hesaplanır; talep oluşturma, onay, red, iptal ve
+adım geçişlerinde etkilenen onaylayıcıların sayacı commit sonrası düşürülür.
+"""
+
+from itertools import chain
+
+from flask import has_app_context
+from sqlalchemy import inspect
+
+from app.bildirim import hemen_yayinla
+from app.cache import anahtar_sil, degisiklik_izle, json_oku, json_yaz
+from app.models.onay import OnayKaydi, OnayTalebi, OnayServisi
+
+
+BEKLEYEN_SAYAC_TTL = 300  # saniye
+
+
+def _sayac_anahtari(kullanici_id):
+    return f'onay:bekleyen:{kullanici_id}'
+
+
+def bekleyen_onay_sayisi(kullanici_id):
+    """Kullanıcının bekleyen onay sayısı (Redis'te yoksa COUNT ile hesaplanır)"""
+    anahtar = _sayac_anahtari(kullanici_id)
+    sayi = json_oku(anahtar)
+    if sayi is None:
+        sayi = OnayServisi.bekleyen_sayisi(kullanici_id)
+        json_yaz(anahtar, sayi, BEKLEYEN_SAYAC_TTL)
+    return sayi
+
+
+def bekleyen_sayac_temizle(kullanici_ids):
+    """Verilen kullanıcıların bekleyen onay sayacını siler"""
+    if not has_app_context() or not kullanici_ids:
+        return
+    anahtar_sil(*[_sayac_anahtari(k) for k in kullanici_ids])
+
+
+# ============================================================
+# CACHE INVALIDATION
+# ============================================================
+
+def _degisti(obj, alan):
+    return inspect(obj).attrs[alan].history.has_changes()
+
+
+def _bekleyen_degisikligi(session, yeni, degisen, silinen):
+    """Bekleyen sayısı değişecek onaylayıcıların id'leri"""
+    kullanici_ids = set()
+    talep_ids = set()
+    kayitlar = [obj for obj in chain(yeni, silinen) if isinstance(obj, OnayKaydi)]
+    for obj in degisen:
+        if isinstance(obj, OnayKaydi):
+            if _degisti(obj, 'durum') or _degisti(obj, 'onaylayici_id'):
+                kayitlar.append(obj)
+        elif obj.id and _degisti(obj, 'durum'):
+            talep_ids.add(obj.id)
+    for obj in kayitlar:
+        # Onaylayıcı değiştiyse hem eski hem yeni kullanıcı etkilenir
+        gecmis = inspect(obj).attrs['onaylayici_id'].history
+        kullanici_ids.update(k for k in gecmis.sum() if k)
+
+    if talep_ids:
+        # Talebin durumu değişince bekleyen tüm onaylayıcıların sayısı değişir
+        with session.no_autoflush:
+            kullanici_ids.update(k for (k,) in session.query(OnayKaydi.onaylayici_id).filter(
+                OnayKaydi.talep_id.in_(talep_ids),
+                OnayKaydi.durum == 'bekliyor'
+            ) if k)
+    return kullanici_ids
+
+
+def _bekleyen_degisti(kullanici_ids=None):
+    if kullanici_ids is None:
+        # Toplu yazım: kullanıcı bilinmiyor, sayaçlar TTL dolunca yenilenir
+        return
+    bekleyen_sayac_temizle(kullanici_ids)
+    # Sayaç silindikten sonra: istemci rozeti yeniden sorunca güncel sayıyı alır
+    hemen_yayinla(kullanici_ids, 'onay_bekleyen')
+
+
+degisiklik_izle((OnayKaydi, OnayTalebi), 'onay_bekleyen_ids', _bekleyen_degisti,
+                secici=_bekleyen_degisikligi)
@@ -11,13 +11,17 @@ from flask_login import login_required, current_user
 from app import db
 from app.models.onay import (
     OnayTipi, OnayAkisi, OnayAdimi, OnayTalebi, OnayKaydi, 
-    YetkiDevri, OnayServisi
+    YetkiDevri, OnayServisi, referans_modeli, referans_kayitlari
 )
 from app.models.core import User
-from app.utils import permission_required, paginate_query
+from app.utils import permission_required, paginate_query, gun_kosulu
+from app.modules.onay.bekleyen import bekleyen_onay_sayisi
 
 onay_bp = Blueprint('onay', __name__)
 
+# Bekleyen onaylar sayfa boyutu
+BEKLEYEN_SAYFA_BOYUTU = 50
+
 
 # ============================================================
 # BEKLEYEN ONAYLAR (Ana Sayfa)
@@ -26,8 +30,19 @@ onay_bp = Blueprint('onay', __name__)
 @onay_bp.route('/')
 @login_required
 def index():
-    """Bekleyen onaylar dashboard"""
-    bekleyenler = OnayServisi.bekleyen_onaylar(current_user.id)
+    """Bekleyen onaylar dashboard (acil önce, talep tarihine göre sayfalı)"""
+    sonra = _imlec_oku(request.args.get('sonra'))
+    bekleyenler = OnayServisi.bekleyen_onaylar(
+        current_user.id, limit=BEKLEYEN_SAYFA_BOYUTU + 1, sonra=sonra
+    )
+    
+    sonraki_imlec = None
+    if len(bekleyenler) > BEKLEYEN_SAYFA_BOYUTU:
+        bekleyenler = bekleyenler[:BEKLEYEN_SAYFA_BOYUTU]
+        sonraki_imlec = _imlec_yaz(bekleyenler[-1])
+    
+    # Referans kayıtları tablo başına tek sorguyla
+    referanslar = referans_kayitlari([k.talep for k in bekleyenler])
     
     # Acil olanları ayır
     acil_onaylar = [k for k in bekleyenler if k.talep.acil]
@@ -35,18 +50,26 @@ def index():
     
     # İstatistikler
     stats = {
-        'bekleyen': len(bekleyenler),
-        'acil': len(acil_onaylar),
+        'bekleyen': bekleyen_onay_sayisi(current_user.id),
+        'acil': db.session.query(db.func.count(OnayKaydi.id)).join(OnayKaydi.talep).filter(
+            OnayKaydi.onaylayici_id == current_user.id,
+            OnayKaydi.durum == 'bekliyor',
+            OnayTalebi.durum == 'bekliyor',
+            OnayTalebi.acil == True
+        ).scalar(),
         'bugun_onaylanan': OnayKaydi.query.filter(
             OnayKaydi.onaylayici_id == current_user.id,
             OnayKaydi.durum == 'onaylandi',
-            db.func.date(OnayKaydi.islem_tarihi) == date.today()
+            gun_kosulu(OnayKaydi.islem_tarihi)
         ).count()
     }
     
     return render_template('onay/index.html',
                           acil_onaylar=acil_onaylar,
                           normal_onaylar=normal_onaylar,
+                          referanslar=referanslar,
+                          ilk_sayfa=sonra is None,
+                          sonraki_imlec=sonraki_imlec,
                           stats=stats)
 
 
@@ -128,6 +151,32 @@ def reddet(id):
     return redirect(url_for('onay.index'))
 
 
+@onay_bp.route('/toplu', methods=['POST'])
+@login_required
+def toplu_islem():
+    """Seçilen onay kayıtlarını toplu onayla / reddet"""
+    kayit_ids = request.form.getlist('kayit_ids', type=int)
+    islem = request.form.get('islem')
+    not_ = request.form.get('not', '').strip()
+    
+    if islem not in ('onayla', 'reddet') or not kayit_ids:
+        flash('İşlem yapılacak kayıt seçin.', 'warning')
+        return redirect(url_for('onay.index'))
+    
+    if islem == 'reddet' and not not_:
+        flash('Red nedeni zorunludur.', 'warning')
+        return redirect(url_for('onay.index'))
+    
+    islenen, hatalar = OnayServisi.toplu_islem(kayit_ids, current_user.id, islem, not_ or None)
+    
+    if islenen:
+        flash(f"{islenen} talep {'onaylandı' if islem == 'onayla' else 'reddedildi'}.",
+              'success' if islem == 'onayla' else 'info')
+    if hatalar:
+        flash(f'{len(hatalar)} kayıt işlenemedi: {hatalar[0][1]}', 'danger')
+    return redirect(url_for('onay.index'))
+
+
 # ============================================================
 # TALEPLERİM (Kullanıcının kendi talepleri)
 # ============================================================
@@ -380,17 +429,28 @@ def admin_talepler():
 # ============================================================
 
 def _get_referans_kayit(tablo, id):
-    """Referans tablosundan kaydı getir"""
-    # Dinamik olarak ilgili modeli bul
-    model_map = {
-        'izinler': 'Izin',
-        'masraflar': 'Masraf',
-        'arac_talepleri': 'AracTalebi',
-        # Diğer tablolar eklenecek
-    }
-    
-    # Şimdilik basit bir dict döndür
-    return {'tablo': tablo, 'id': id}
+    """Referans tablosundan kaydı getir (model kayıtlı değilse None)"""
+    model = referans_modeli(tablo)
+    if model is None:
+        return None
+    return model.query.get(id)
+
+
+def _imlec_yaz(kayit):
+    """Sayfanın son satırından sonraki sayfa imlecini üretir"""
+    talep = kayit.talep
+    return f"{int(bool(talep.acil))}_{talep.talep_tarihi.isoformat()}_{kayit.id}"
+
+
+def _imlec_oku(deger):
+    """İmleci (acil, talep_tarihi, kayit_id) olarak çözer; geçersizse None"""
+    if not deger:
+        return None
+    try:
+        acil, tarih, kayit_id = deger.split('_')
+        return bool(int(acil)), datetime.fromisoformat(tarih), int(kayit_id)
+    except ValueError:
+        return None
 
 
 # ============================================================
@@ -400,6 +460,11 @@ def _get_referans_kayit(tablo, id):
 @onay_bp.route('/api/bekleyen-sayi')
 @login_required
 def api_bekleyen_sayi():
-    """Bekleyen onay sayısı (header badge için)"""
-    sayi = len(OnayServisi.bekleyen_onaylar(current_user.id))
-    return jsonify({'sayi': sayi})
+    """Bekleyen onay sayısı (header badge için, If-None-Match ile 304 döner)"""
+    sayi = bekleyen_onay_sayisi(current_user.id)
+    response = jsonify({'sayi': sayi})
+    response.set_etag(f'onay-bekleyen-{current_user.id}-{sayi}')
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add('Cookie')
+    return response.make_conditional(request)
@@ -8,7 +8,7 @@ from flask import Blueprint, render_template, redirect, url_for, flash, request,
 from flask_login import login_required, current_user
 from datetime import datetime, date
 from app import db
-from app.models.proje import Musteri, Proje, HedefKadro
+from app.models.proje import Musteri, Proje, HedefKadro, KADRO_SAYILARI, PROJE_SAYILARI
 from app.models.ik import Aday, Calisan
 from app.utils import permission_required
 
@@ -84,7 +84,8 @@ def musteri_ekle():
 def musteri_detay(id):
     """Müşteri detayı"""
     musteri = Musteri.query.get_or_404(id)
-    projeler = musteri.projeler.filter_by(is_deleted=False).order_by(Proje.created_at.desc()).all()
+    projeler = musteri.projeler.options(PROJE_SAYILARI).filter_by(is_deleted=False)\
+        .order_by(Proje.created_at.desc()).all()
     
     return render_template('proje/musteri_detay.html',
                          musteri=musteri,
@@ -135,7 +136,7 @@ def proje_liste():
     musteri_id = request.args.get('musteri_id', type=int)
     aktif = request.args.get('aktif', '')
     
-    query = Proje.query.filter_by(is_deleted=False)
+    query = Proje.query.options(PROJE_SAYILARI, db.joinedload(Proje.musteri)).filter_by(is_deleted=False)
     
     if search:
         query = query.filter(Proje.ad.ilike(f'%{search}%'))
@@ -190,8 +191,9 @@ def proje_detay(id):
     """Proje detayı"""
     from app.models.filo import Arac
     
-    proje = Proje.query.get_or_404(id)
-    kadrolar = proje.kadrolar.filter_by(is_deleted=False).order_by(HedefKadro.oncelik, HedefKadro.pozisyon_adi).all()
+    proje = Proje.query.options(PROJE_SAYILARI).filter_by(id=id).first_or_404()
+    kadrolar = proje.kadrolar.options(KADRO_SAYILARI).filter_by(is_deleted=False)\
+        .order_by(HedefKadro.oncelik, HedefKadro.pozisyon_adi).all()
     
     # Projeye atanmış araçlar
     araclar = Arac.query.filter_by(proje_id=id, is_deleted=False).order_by(Arac.plaka).all()
@@ -248,7 +250,8 @@ def kadro_liste():
     proje_id = request.args.get('proje_id', type=int)
     q = request.args.get('q', '').strip()
     
-    query = HedefKadro.query.filter_by(is_deleted=False)
+    query = HedefKadro.query.options(KADRO_SAYILARI, db.joinedload(HedefKadro.proje))\
+        .filter_by(is_deleted=False)
     
     if proje_id:
         query = query.filter_by(proje_id=proje_id)
@@ -311,7 +314,7 @@ def kadro_ekle(proje_id):
 @permission_required('proje.view')
 def kadro_detay(id):
     """Kadro detayı - adaylar ve çalışanlar"""
-    kadro = HedefKadro.query.get_or_404(id)
+    kadro = HedefKadro.query.options(KADRO_SAYILARI).filter_by(id=id).first_or_404()
     
     adaylar = kadro.adaylar.filter_by(is_deleted=False).order_by(Aday.created_at.desc()).all()
     calisanlar = kadro.calisanlar.filter_by(is_deleted=False).all()
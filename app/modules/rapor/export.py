@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+TG Portal - Akışlı (streaming) rapor export'u
+Satırlar server-side cursor (yield_per) ile parça parça okunur, ilişkiler
+tek JOIN ile yüklenir; çıktı parça parça yanıta yazılır. Satır sayısı ne
+olursa olsun bellek kullanımı sabit kalır.
+"""
+
+import csv
+import io
+import tempfile
+
+from sqlalchemy.orm import joinedload
+
+from app.models.masraf import Masraf
+from app.models.sozlesme import Sozlesme
+from app.models.talep import Talep
+
+
+# Server-side cursor'dan tek seferde çekilen satır sayısı
+YIELD_PER = 1000
+
+# Yanıta yazılan parça boyutu (byte)
+CHUNK_BOYUTU = 64 * 1024
+
+FORMATLAR = {
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'tsv': ('text/tab-separated-values; charset=utf-8', 'tsv'),
+}
+
+
+def _tarih(d, fmt='%d.%m.%Y'):
+    return d.strftime(fmt) if d else ''
+
+
+def _masraf_query():
+    return Masraf.query.options(
+        joinedload(Masraf.kategori),
+        joinedload(Masraf.calisan)
+    ).filter_by(is_deleted=False).order_by(Masraf.masraf_tarihi.desc())
+
+
+def _masraf_satir(m):
+    return [
+        _tarih(m.masraf_tarihi),
+        m.baslik,
+        m.kategori.ad if m.kategori else '',
+        float(m.tl_karsiligi or 0),
+        m.durum_text,
+        m.calisan.full_name if m.calisan else ''
+    ]
+
+
+def _sozlesme_query():
+    return Sozlesme.query.options(
+        joinedload(Sozlesme.tip),
+        joinedload(Sozlesme.musteri),
+        joinedload(Sozlesme.tedarikci)
+    ).filter_by(is_deleted=False).order_by(Sozlesme.bitis_tarihi)
+
+
+def _sozlesme_satir(s):
+    if s.musteri:
+        taraf = s.musteri.ad
+    elif s.tedarikci:
+        taraf = s.tedarikci.display_name
+    else:
+        taraf = s.diger_taraf or '-'
+    return [
+        s.sozlesme_no or str(s.id),
+        s.baslik,
+        s.tip.ad if s.tip else '',
+        taraf,
+        _tarih(s.baslangic_tarihi),
+        _tarih(s.bitis_tarihi),
+        float(s.tutar or 0),
+        s.durum_text
+    ]
+
+
+def _talep_query():
+    return Talep.query.options(
+        joinedload(Talep.kategori),
+        joinedload(Talep.olusturan)
+    ).filter_by(is_deleted=False).order_by(Talep.created_at.desc())
+
+
+def _talep_satir(t):
+    return [
+        t.talep_no,
+        t.konu,
+        t.kategori.ad if t.kategori else '',
+        t.oncelik_text,
+        t.durum_text,
+        t.olusturan.full_name if t.olusturan else '',
+        _tarih(t.created_at, '%d.%m.%Y %H:%M')
+    ]
+
+
+# modul: (sayfa adı, başlıklar, query fabrikası, satır fonksiyonu)
+EXPORT_TANIMLARI = {
+    'masraf': ('Masraflar', ['Tarih', 'Başlık', 'Kategori', 'Tutar', 'Durum', 'Çalışan'],
+               _masraf_query, _masraf_satir),
+    'sozlesme': ('Sözleşmeler', ['No', 'Başlık', 'Tip', 'Taraf', 'Başlangıç', 'Bitiş', 'Tutar', 'Durum'],
+                 _sozlesme_query, _sozlesme_satir),
+    'talep': ('Talepler', ['No', 'Konu', 'Kategori', 'Öncelik', 'Durum', 'Oluşturan', 'Tarih'],
+              _talep_query, _talep_satir),
+}
+
+
+def satirlari_getir(modul):
+    """Modülün export satırlarını server-side cursor ile üretir"""
+    _, _, query_fabrikasi, satir_fonksiyonu = EXPORT_TANIMLARI[modul]
+    for kayit in query_fabrikasi().yield_per(YIELD_PER):
+        yield satir_fonksiyonu(kayit)
+
+
+def metin_akisi(modul, ayirici=','):
+    """CSV/TSV çıktısını parça parça üretir (Excel için UTF-8 BOM ile)"""
+    _, basliklar, _, _ = EXPORT_TANIMLARI[modul]
+    tampon = io.StringIO()
+    writer = csv.writer(tampon, delimiter=ayirici)
+
+    tampon.write('\ufeff')
+    writer.writerow(basliklar)
+    for satir in satirlari_getir(modul):
+        writer.writerow(satir)
+        if tampon.tell() >= CHUNK_BOYUTU:
+            yield tampon.getvalue().encode('utf-8')
+            tampon.seek(0)
+            tampon.truncate()
+    if tampon.tell():
+        yield tampon.getvalue().encode('utf-8')
+
+
+def xlsx_olustur(modul):
+    """
+    openpyxl write-only modunda geçici dosyaya yazar.
+    Satırlar bellekte tutulmaz; dönen dosya okunmaya hazır konumdadır.
+    """
+    import openpyxl
+    from openpyxl.utils import get_column_letter
+
+    sayfa_adi, basliklar, _, _ = EXPORT_TANIMLARI[modul]
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(title=sayfa_adi)
+
+    # Write-only modda sütun genişlikleri ilk satırdan önce verilmeli
+    for col in range(1, len(basliklar) + 1):
+        ws.column_dimensions[get_column_letter(col)].width = 15
+
+    ws.append(basliklar)
+    for satir in satirlari_getir(modul):
+        ws.append(satir)
+
+    dosya = tempfile.TemporaryFile()
+    wb.save(dosya)
+    dosya.seek(0)
+    return dosya
+
+
+def dosya_akisi(dosya):
+    """Dosyayı parça parça okuyup kapatır"""
+    try:
+        while True:
+            parca = dosya.read(CHUNK_BOYUTU)
+            if not parca:
+                break
+            yield parca
+    finally:
+        dosya.close()
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+TG Portal - Rapor Özetlerinin Bakımı
+Kaynak tablolara (Masraf, SatinAlmaTalebi, SatinAlmaSiparisi, Talep,
+Calisan) yazan her flush, etkilenen ayları aynı transaction içinde
+rapor_ozet_kuyrugu'na ekler; eski ve yeni tarih farklıysa iki ay da
+eklenir. Toplu query.update()/delete() yazımlarında kaynağın tamamı
+kuyruğa alınır. `flask rapor-ozetleri` kuyruktaki her (kaynak, ay)
+dilimini silip tarih aralığı sorgusuyla yeniden toplar; --tam tüm
+dilimleri baştan hesaplar (ilk kurulum, ham SQL ile yapılan değişiklikler).
+"""
+
+import enum
+from collections import namedtuple
+from datetime import date
+
+from sqlalchemy import and_, case, event, extract, func, insert, inspect
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models.ik import Calisan
+from app.models.masraf import Masraf
+from app.models.rapor import KUYRUGA_ELLE_YAZILIR, RaporOzeti, RaporOzetKuyrugu
+from app.models.satinalma import SatinAlmaTalebi, SatinAlmaSiparisi
+from app.models.talep import Talep
+from app.utils import aralik_kosulu, donem_araligi, donem_kosulu
+
+
+OzetKaynagi = namedtuple('OzetKaynagi', 'model tarih gruplar')
+
+
+def _ay(deger):
+    return date(deger.year, deger.month, 1) if deger else None
+
+
+# ============================================================
+# KAYNAK TANIMLARI
+# ============================================================
+
+def _masraf_gruplari(kosul):
+    return db.session.query(
+        Masraf.kategori_id.label('kategori_id'),
+        Masraf.durum.label('durum'),
+        Calisan.departman_id.label('departman_id'),
+        func.count(Masraf.id).label('adet'),
+        func.sum(Masraf.tl_karsiligi).label('tutar')
+    ).outerjoin(Calisan, Calisan.id == Masraf.calisan_id).filter(
+        Masraf.is_deleted == False, kosul
+    ).group_by(Masraf.kategori_id, Masraf.durum, Calisan.departman_id)
+
+
+def _satinalma_talebi_gruplari(kosul):
+    return db.session.query(
+        SatinAlmaTalebi.kategori_id.label('kategori_id'),
+        SatinAlmaTalebi.durum.label('durum'),
+        SatinAlmaTalebi.oncelik.label('oncelik'),
+        func.count(SatinAlmaTalebi.id).label('adet')
+    ).filter(
+        SatinAlmaTalebi.is_deleted == False, kosul
+    ).group_by(SatinAlmaTalebi.kategori_id, SatinAlmaTalebi.durum, SatinAlmaTalebi.oncelik)
+
+
+def _satinalma_siparisi_gruplari(kosul):
+    return db.session.query(
+        SatinAlmaSiparisi.durum.label('durum'),
+        func.count(SatinAlmaSiparisi.id).label('adet'),
+        func.sum(SatinAlmaSiparisi.toplam_tutar).label('tutar')
+    ).filter(
+        SatinAlmaSiparisi.is_deleted == False, kosul
+    ).group_by(SatinAlmaSiparisi.durum)
+
+
+def _talep_gruplari(kosul):
+    return db.session.query(
+        Talep.kategori_id.label('kategori_id'),
+        Talep.durum.label('durum'),
+        Talep.oncelik.label('oncelik'),
+        func.count(Talep.id).label('adet'),
+        func.sum(case((Talep.sla_asildi == True, 1), else_=0)).label('sla_asim')
+    ).filter(
+        Talep.is_deleted == False, kosul
+    ).group_by(Talep.kategori_id, Talep.durum, Talep.oncelik)
+
+
+def _calisan_gruplari(kosul):
+    return db.session.query(
+        Calisan.departman_id.label('departman_id'),
+        Calisan.durum.label('durum'),
+        func.count(Calisan.id).label('adet')
+    ).filter(
+        Calisan.is_deleted == False, kosul
+    ).group_by(Calisan.departman_id, Calisan.durum)
+
+
+# Kaynak adı -> (model, dönemi belirleyen tarih kolonu, gruplama sorgusu)
+KAYNAKLAR = {
+    'masraf': OzetKaynagi(Masraf, Masraf.masraf_tarihi, _masraf_gruplari),
+    'satinalma_talebi': OzetKaynagi(SatinAlmaTalebi, SatinAlmaTalebi.talep_tarihi, _satinalma_talebi_gruplari),
+    'satinalma_siparisi': OzetKaynagi(SatinAlmaSiparisi, SatinAlmaSiparisi.siparis_tarihi, _satinalma_siparisi_gruplari),
+    'talep': OzetKaynagi(Talep, Talep.created_at, _talep_gruplari),
+    'calisan': OzetKaynagi(Calisan, Calisan.ise_baslama, _calisan_gruplari),
+}
+
+_MODEL_KAYNAKLARI = {tanim.model: kaynak for kaynak, tanim in KAYNAKLAR.items()}
+
+
+# ============================================================
+# YENİDEN HESAPLAMA
+# ============================================================
+
+def dilimi_yenile(kaynak, donem):
+    """Kaynağın bir ayını (donem None ise tarihsiz kayıtlarını) yeniden toplar"""
+    tanim = KAYNAKLAR[kaynak]
+    if donem is None:
+        kosul = tanim.tarih.is_(None)
+        mevcut = RaporOzeti.donem.is_(None)
+    else:
+        kosul = aralik_kosulu(tanim.tarih, *donem_araligi(donem.year, donem.month))
+        mevcut = RaporOzeti.donem == donem
+
+    RaporOzeti.query.filter(RaporOzeti.kaynak == kaynak, mevcut).delete(synchronize_session=False)
+
+    satirlar = []
+    for satir in tanim.gruplar(kosul):
+        degerler = satir._mapping
+        durum = degerler.get('durum')
+        satirlar.append({
+            'kaynak': kaynak,
+            'donem': donem,
+            'kategori_id': degerler.get('kategori_id'),
+            'durum': durum.value if isinstance(durum, enum.Enum) else durum,
+            'departman_id': degerler.get('departman_id'),
+            'oncelik': degerler.get('oncelik'),
+            'adet': degerler['adet'],
+            'tutar': degerler.get('tutar'),
+            'sla_asim': degerler.get('sla_asim'),
+        })
+    if satirlar:
+        db.session.execute(insert(RaporOzeti), satirlar)
+    return len(satirlar)
+
+
+def kaynagi_yenile(kaynak):
+    """Kaynağın tüm aylarını yeniden toplar; yenilenen dilim sayısını döndürür"""
+    tanim = KAYNAKLAR[kaynak]
+    donemler = {None}
+    donemler.update(
+        date(int(yil), int(ay), 1)
+        for yil, ay in db.session.query(
+            extract('year', tanim.tarih), extract('month', tanim.tarih)
+        ).filter(tanim.tarih.isnot(None)).distinct()
+    )
+    # Kaynakta artık kaydı kalmayan aylar da silinsin
+    donemler.update(
+        donem for (donem,) in db.session.query(RaporOzeti.donem).filter(
+            RaporOzeti.kaynak == kaynak
+        ).distinct()
+    )
+    for donem in donemler:
+        dilimi_yenile(kaynak, donem)
+    return len(donemler)
+
+
+def tumunu_yenile():
+    """Tüm kaynakları baştan hesaplar ve kuyruğu boşaltır"""
+    dilim = sum(kaynagi_yenile(kaynak) for kaynak in KAYNAKLAR)
+    RaporOzetKuyrugu.query.delete(synchronize_session=False)
+    db.session.commit()
+    return dilim
+
+
+def kuyrugu_isle(parti=500):
+    """
+    Kuyruktaki dilimleri yeniden hesaplar (PostgreSQL'de SKIP LOCKED ile).
+    Dönüş: yenilenen dilim sayısı
+    """
+    kayitlar = RaporOzetKuyrugu.query.order_by(RaporOzetKuyrugu.id).limit(
+        parti
+    ).with_for_update(skip_locked=True).all()
+    if not kayitlar:
+        return 0
+
+    tamlar = {k.kaynak for k in kayitlar if k.tam and k.kaynak in KAYNAKLAR}
+    dilimler = {
+        (k.kaynak, k.donem) for k in kayitlar
+        if not k.tam and k.kaynak in KAYNAKLAR and k.kaynak not in tamlar
+    }
+
+    yenilenen = sum(kaynagi_yenile(kaynak) for kaynak in tamlar)
+    for kaynak, donem in dilimler:
+        dilimi_yenile(kaynak, donem)
+    yenilenen += len(dilimler)
+
+    RaporOzetKuyrugu.query.filter(
+        RaporOzetKuyrugu.id.in_([k.id for k in kayitlar])
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return yenilenen
+
+
+# ============================================================
+# DEĞİŞİKLİK OLAYLARI
+# ============================================================
+
+@event.listens_for(Session, 'after_flush')
+def _rapor_degisikligi_izle(session, flush_context):
+    """Flush edilen kaynak kayıtlarının eski ve yeni aylarını kuyruğa ekler"""
+    dilimler = set()
+    tamlar = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        kaynak = _MODEL_KAYNAKLARI.get(type(obj))
+        if kaynak is None:
+            continue
+        # Flush sonrası: yeni kayıtların varsayılan tarihleri (created_at) dolmuş olur
+        durum = inspect(obj)
+        anahtar = KAYNAKLAR[kaynak].tarih.key
+        dilimler.add((kaynak, _ay(getattr(obj, anahtar))))
+        for eski in durum.attrs[anahtar].history.deleted:
+            dilimler.add((kaynak, _ay(eski)))
+        # Masraf özetindeki departman çalışanınkinden gelir
+        if kaynak == 'calisan' and durum.attrs.departman_id.history.deleted:
+            tamlar.add('masraf')
+
+    satirlar = [{'kaynak': k, 'donem': d, 'tam': False} for k, d in dilimler]
+    satirlar += [{'kaynak': k, 'donem': None, 'tam': True} for k in tamlar]
+    if satirlar:
+        RaporOzetKuyrugu.ekle(session, satirlar)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _rapor_toplu_yazim_izle(orm_execute_state):
+    """
+    Toplu yazımlarda hangi ayların değiştiği bilinmez: satır değiştiyse
+    kaynağın tamamı. Ayları bilen yazımlar KUYRUGA_ELLE_YAZILIR ile çalışır.
+    """
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete
+            or orm_execute_state.is_insert):
+        return
+    if orm_execute_state.execution_options.get(KUYRUGA_ELLE_YAZILIR):
+        return
+    mapper = orm_execute_state.bind_mapper
+    kaynak = _MODEL_KAYNAKLARI.get(mapper.class_) if mapper is not None else None
+    if kaynak is None:
+        return
+    sonuc = orm_execute_state.invoke_statement()
+    if sonuc.rowcount:
+        RaporOzetKuyrugu.ekle(orm_execute_state.session, [{'kaynak': kaynak, 'donem': None, 'tam': True}])
+    return sonuc
+
+
+@event.listens_for(Session, 'after_commit')
+def _rapor_dilimlerini_temizle(session):
+    session.info.pop('rapor_dilimleri', None)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _rapor_dilimlerini_geri_al(session):
+    session.info.pop('rapor_dilimleri', None)
+
+
+# ============================================================
+# OKUMA
+# ============================================================
+
+def ozet_kosulu(kaynak, yil=None, ay=None):
+    """Kaynağın özet satırlarını yıl / ay aralığıyla süzen koşul"""
+    return and_(RaporOzeti.kaynak == kaynak, donem_kosulu(RaporOzeti.donem, yil, ay))
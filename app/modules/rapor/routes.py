@@ -6,14 +6,13 @@ Tüm modüller için merkezi raporlama
 
 from datetime import datetime, date, timedelta
 from decimal import Decimal
-import io
 
-from flask import Blueprint, render_template, request, jsonify, Response
+from flask import Blueprint, render_template, request, jsonify, Response, stream_with_context
 from flask_login import login_required, current_user
 from sqlalchemy import func, extract, case
 
 from app import db
-from app.utils import permission_required
+from app.utils import permission_required, donem_kosulu
 
 # Modelleri import et
 from app.models.ik import Calisan, Departman
@@ -22,9 +21,19 @@ from app.models.sozlesme import Sozlesme, SozlesmeTipi
 from app.models.satinalma import SatinAlmaTalebi, SatinAlmaSiparisi, SatinAlmaKategorisi
 from app.models.talep import Talep, TalepKategorisi
 from app.models.core import User
+from app.models.rapor import RaporOzeti
+from app.modules.rapor.ozet import ozet_kosulu
+from app.modules.sozlesme.bitis import bitis_pencereleri
 
 rapor_bp = Blueprint('rapor', __name__)
 
+TALEP_ACIK_DURUMLAR = ['acik', 'atandi', 'devam_ediyor', 'beklemede']
+
+
+def _taze_mi():
+    """?fresh=1: özet tabloları yerine ham tablolardan canlı hesapla"""
+    return request.args.get('fresh') == '1'
+
 
 # ============================================================
 # ANA DASHBOARD
@@ -46,7 +55,12 @@ def dashboard():
 @login_required
 @permission_required('rapor.view')
 def ik_rapor():
-    """İK raporları"""
+    """İK raporları (?fresh=1: özet yerine canlı sorgu)"""
+    veri = _ik_canli() if _taze_mi() else _ik_ozetten()
+    return render_template('rapor/ik_rapor.html', **veri)
+
+
+def _ik_canli():
     from app.models.base import CalisanDurumu
     
     # Genel istatistikler
@@ -76,10 +90,47 @@ def ik_rapor():
         Calisan.ise_baslama >= date.today() - timedelta(days=365)
     ).group_by('yil', 'ay').order_by('yil', 'ay').all()
     
-    return render_template('rapor/ik_rapor.html',
-                          stats=stats,
-                          departman_dagilim=departman_dagilim,
-                          aylik_ise_alim=aylik_ise_alim)
+    return dict(stats=stats,
+                departman_dagilim=departman_dagilim,
+                aylik_ise_alim=aylik_ise_alim)
+
+
+def _ik_ozetten():
+    from app.models.base import CalisanDurumu
+    
+    kosul = ozet_kosulu('calisan')
+    durumlar = dict(db.session.query(
+        RaporOzeti.durum, func.sum(RaporOzeti.adet)
+    ).filter(kosul).group_by(RaporOzeti.durum).all())
+    stats = {
+        'toplam': int(sum(durumlar.values())),
+        'aktif': int(durumlar.get(CalisanDurumu.AKTIF.value) or 0),
+        'izinli': int(durumlar.get(CalisanDurumu.IZINLI.value) or 0),
+        'ayrildi': int(durumlar.get(CalisanDurumu.AYRILDI.value) or 0),
+    }
+    
+    departman_dagilim = db.session.query(
+        Departman.ad,
+        func.sum(RaporOzeti.adet).label('sayi')
+    ).join(RaporOzeti, RaporOzeti.departman_id == Departman.id).filter(
+        kosul,
+        RaporOzeti.durum == CalisanDurumu.AKTIF.value
+    ).group_by(Departman.ad).all()
+    
+    # Aylık işe alım (son 12 ay; ay bazında)
+    baslangic = (date.today() - timedelta(days=365)).replace(day=1)
+    aylik_ise_alim = db.session.query(
+        extract('year', RaporOzeti.donem).label('yil'),
+        extract('month', RaporOzeti.donem).label('ay'),
+        func.sum(RaporOzeti.adet).label('sayi')
+    ).filter(
+        kosul,
+        RaporOzeti.donem >= baslangic
+    ).group_by('yil', 'ay').order_by('yil', 'ay').all()
+    
+    return dict(stats=stats,
+                departman_dagilim=departman_dagilim,
+                aylik_ise_alim=aylik_ise_alim)
 
 
 # ============================================================
@@ -90,16 +141,18 @@ def ik_rapor():
 @login_required
 @permission_required('rapor.view')
 def masraf_rapor():
-    """Masraf raporları"""
+    """Masraf raporları (?fresh=1: özet yerine canlı sorgu)"""
     yil = request.args.get('yil', date.today().year, type=int)
     ay = request.args.get('ay', type=int)
     
+    veri = _masraf_canli(yil, ay) if _taze_mi() else _masraf_ozetten(yil, ay)
+    return render_template('rapor/masraf_rapor.html', yil=yil, ay=ay, **veri)
+
+
+def _masraf_canli(yil, ay):
     # Genel istatistikler
     query = Masraf.query.filter_by(is_deleted=False)
-    if yil:
-        query = query.filter(extract('year', Masraf.masraf_tarihi) == yil)
-    if ay:
-        query = query.filter(extract('month', Masraf.masraf_tarihi) == ay)
+    query = query.filter(donem_kosulu(Masraf.masraf_tarihi, yil, ay))
     
     stats = {
         'toplam_tutar': query.with_entities(func.sum(Masraf.tl_karsiligi)).scalar() or 0,
@@ -115,7 +168,7 @@ def masraf_rapor():
         func.count(Masraf.id).label('adet')
     ).join(Masraf, Masraf.kategori_id == MasrafKategorisi.id).filter(
         Masraf.is_deleted == False,
-        extract('year', Masraf.masraf_tarihi) == yil
+        donem_kosulu(Masraf.masraf_tarihi, yil)
     ).group_by(MasrafKategorisi.ad).all()
     
     # Aylık trend
@@ -124,15 +177,46 @@ def masraf_rapor():
         func.sum(Masraf.tl_karsiligi).label('toplam')
     ).filter(
         Masraf.is_deleted == False,
-        extract('year', Masraf.masraf_tarihi) == yil
+        donem_kosulu(Masraf.masraf_tarihi, yil)
     ).group_by('ay').order_by('ay').all()
     
-    return render_template('rapor/masraf_rapor.html',
-                          stats=stats,
-                          kategori_dagilim=kategori_dagilim,
-                          aylik_trend=aylik_trend,
-                          yil=yil,
-                          ay=ay)
+    return dict(stats=stats,
+                kategori_dagilim=kategori_dagilim,
+                aylik_trend=aylik_trend)
+
+
+def _masraf_ozetten(yil, ay):
+    toplam_tutar, toplam_adet, onaylanan, bekleyen = db.session.query(
+        func.sum(RaporOzeti.tutar),
+        func.sum(RaporOzeti.adet),
+        func.sum(case((RaporOzeti.durum == 'onaylandi', RaporOzeti.tutar))),
+        func.sum(case((RaporOzeti.durum == 'onay_bekliyor', RaporOzeti.adet)))
+    ).filter(ozet_kosulu('masraf', yil, ay)).one()
+    stats = {
+        'toplam_tutar': toplam_tutar or 0,
+        'toplam_adet': int(toplam_adet or 0),
+        'onaylanan': onaylanan or 0,
+        'bekleyen': int(bekleyen or 0),
+    }
+    
+    kategori_dagilim = db.session.query(
+        MasrafKategorisi.ad,
+        func.sum(RaporOzeti.tutar).label('toplam'),
+        func.sum(RaporOzeti.adet).label('adet')
+    ).join(RaporOzeti, RaporOzeti.kategori_id == MasrafKategorisi.id).filter(
+        ozet_kosulu('masraf', yil)
+    ).group_by(MasrafKategorisi.ad).all()
+    
+    aylik_trend = db.session.query(
+        extract('month', RaporOzeti.donem).label('ay'),
+        func.sum(RaporOzeti.tutar).label('toplam')
+    ).filter(
+        ozet_kosulu('masraf', yil)
+    ).group_by('ay').order_by('ay').all()
+    
+    return dict(stats=stats,
+                kategori_dagilim=kategori_dagilim,
+                aylik_trend=aylik_trend)
 
 
 # ============================================================
@@ -165,12 +249,7 @@ def sozlesme_rapor():
     ).group_by(SozlesmeTipi.ad).all()
     
     # Yaklaşan bitiş (30 gün)
-    yaklasan = Sozlesme.query.filter(
-        Sozlesme.is_deleted == False,
-        Sozlesme.durum == 'aktif',
-        Sozlesme.bitis_tarihi <= date.today() + timedelta(days=30),
-        Sozlesme.bitis_tarihi >= date.today()
-    ).order_by(Sozlesme.bitis_tarihi).all()
+    yaklasan = bitis_pencereleri().sozlesmeler(30)
     
     return render_template('rapor/sozlesme_rapor.html',
                           stats=stats,
@@ -186,19 +265,24 @@ def sozlesme_rapor():
 @login_required
 @permission_required('rapor.view')
 def satinalma_rapor():
-    """Satın alma raporları"""
+    """Satın alma raporları (?fresh=1: özet yerine canlı sorgu)"""
     yil = request.args.get('yil', date.today().year, type=int)
     
+    veri = _satinalma_canli(yil) if _taze_mi() else _satinalma_ozetten(yil)
+    return render_template('rapor/satinalma_rapor.html', yil=yil, **veri)
+
+
+def _satinalma_canli(yil):
     # Genel istatistikler
     stats = {
         'toplam_talep': SatinAlmaTalebi.query.filter_by(is_deleted=False).filter(
-            extract('year', SatinAlmaTalebi.talep_tarihi) == yil
+            donem_kosulu(SatinAlmaTalebi.talep_tarihi, yil)
         ).count(),
         'toplam_siparis': SatinAlmaSiparisi.query.filter_by(is_deleted=False).filter(
-            extract('year', SatinAlmaSiparisi.siparis_tarihi) == yil
+            donem_kosulu(SatinAlmaSiparisi.siparis_tarihi, yil)
         ).count(),
         'toplam_harcama': SatinAlmaSiparisi.query.filter_by(is_deleted=False).filter(
-            extract('year', SatinAlmaSiparisi.siparis_tarihi) == yil
+            donem_kosulu(SatinAlmaSiparisi.siparis_tarihi, yil)
         ).with_entities(func.sum(SatinAlmaSiparisi.toplam_tutar)).scalar() or 0,
         'bekleyen': SatinAlmaTalebi.query.filter_by(is_deleted=False, durum='onay_bekliyor').count(),
     }
@@ -209,7 +293,7 @@ def satinalma_rapor():
         func.count(SatinAlmaTalebi.id).label('adet')
     ).join(SatinAlmaTalebi, SatinAlmaTalebi.kategori_id == SatinAlmaKategorisi.id).filter(
         SatinAlmaTalebi.is_deleted == False,
-        extract('year', SatinAlmaTalebi.talep_tarihi) == yil
+        donem_kosulu(SatinAlmaTalebi.talep_tarihi, yil)
     ).group_by(SatinAlmaKategorisi.ad).all()
     
     # Aylık harcama
@@ -218,14 +302,44 @@ def satinalma_rapor():
         func.sum(SatinAlmaSiparisi.toplam_tutar).label('toplam')
     ).filter(
         SatinAlmaSiparisi.is_deleted == False,
-        extract('year', SatinAlmaSiparisi.siparis_tarihi) == yil
+        donem_kosulu(SatinAlmaSiparisi.siparis_tarihi, yil)
     ).group_by('ay').order_by('ay').all()
     
-    return render_template('rapor/satinalma_rapor.html',
-                          stats=stats,
-                          kategori_dagilim=kategori_dagilim,
-                          aylik_harcama=aylik_harcama,
-                          yil=yil)
+    return dict(stats=stats,
+                kategori_dagilim=kategori_dagilim,
+                aylik_harcama=aylik_harcama)
+
+
+def _satinalma_ozetten(yil):
+    talep_kosulu = ozet_kosulu('satinalma_talebi', yil)
+    siparis_kosulu = ozet_kosulu('satinalma_siparisi', yil)
+    toplam_siparis, toplam_harcama = db.session.query(
+        func.sum(RaporOzeti.adet), func.sum(RaporOzeti.tutar)
+    ).filter(siparis_kosulu).one()
+    stats = {
+        'toplam_talep': int(db.session.query(func.sum(RaporOzeti.adet)).filter(talep_kosulu).scalar() or 0),
+        'toplam_siparis': int(toplam_siparis or 0),
+        'toplam_harcama': toplam_harcama or 0,
+        'bekleyen': int(db.session.query(func.sum(RaporOzeti.adet)).filter(
+            ozet_kosulu('satinalma_talebi'), RaporOzeti.durum == 'onay_bekliyor'
+        ).scalar() or 0),
+    }
+    
+    kategori_dagilim = db.session.query(
+        SatinAlmaKategorisi.ad,
+        func.sum(RaporOzeti.adet).label('adet')
+    ).join(RaporOzeti, RaporOzeti.kategori_id == SatinAlmaKategorisi.id).filter(
+        talep_kosulu
+    ).group_by(SatinAlmaKategorisi.ad).all()
+    
+    aylik_harcama = db.session.query(
+        extract('month', RaporOzeti.donem).label('ay'),
+        func.sum(RaporOzeti.tutar).label('toplam')
+    ).filter(siparis_kosulu).group_by('ay').order_by('ay').all()
+    
+    return dict(stats=stats,
+                kategori_dagilim=kategori_dagilim,
+                aylik_harcama=aylik_harcama)
 
 
 # ============================================================
@@ -236,22 +350,50 @@ def satinalma_rapor():
 @login_required
 @permission_required('rapor.view')
 def talep_rapor():
-    """Talep raporları"""
+    """Talep raporları (?fresh=1: özet yerine canlı sorgu)"""
     yil = request.args.get('yil', date.today().year, type=int)
     ay = request.args.get('ay', type=int)
     
+    veri = _talep_canli(yil, ay) if _taze_mi() else _talep_ozetten(yil, ay)
+    stats = veri['stats']
+
+    # Öncelik dict (template bunu bekliyor)
+    oncelik = {"dusuk": 0, "normal": 0, "yuksek": 0, "kritik": 0}
+    for onc, adet in veri['oncelik_dagilim']:
+        if not onc:
+            continue
+        if onc in oncelik:
+            oncelik[onc] = int(adet or 0)
+
+    # Template uyumluluğu: "cozen"
+    # (istersen sadece cozuldu da yapabiliriz)
+    stats["cozen"] = int(stats.get("cozuldu", 0) + stats.get("kapatildi", 0))
+
+    # Aylık trend'i dict'e çevir (tojson rahat serialize etsin)
+    aylik_trend_dict = {int(ay): int(toplam) for ay, toplam in veri['aylik_trend']}
+    
+    return render_template('rapor/talep_rapor.html',
+                          stats=stats,
+                          kategori_dagilim=veri['kategori_dagilim'],
+                          kategori_detay=veri['kategori_detay'],
+                          oncelik=oncelik,
+                          aylik_trend=aylik_trend_dict,
+                          yil=yil,
+                          ay=ay)
+
+
+def _talep_canli(yil, ay):
     query = Talep.query.filter_by(is_deleted=False)
-    if yil:
-        query = query.filter(extract('year', Talep.created_at) == yil)
-    if ay:
-        query = query.filter(extract('month', Talep.created_at) == ay)
+    query = query.filter(donem_kosulu(Talep.created_at, yil, ay))
     
     # Genel istatistikler
     stats = {
         'toplam': query.count(),
-        'acik': query.filter(Talep.durum.in_(['acik', 'atandi', 'devam_ediyor', 'beklemede'])).count(),
+        'acik': query.filter(Talep.durum.in_(TALEP_ACIK_DURUMLAR)).count(),
         'cozuldu': query.filter(Talep.durum == 'cozuldu').count(),
         'kapatildi': query.filter(Talep.durum == 'kapatildi').count(),
+        # SLA aşımı (sweeper tarafından işaretlenen kalıcı kolon)
+        'sla_asim': query.filter(Talep.sla_asildi == True).count(),
     }
     
     # Kategori dağılımı
@@ -260,7 +402,7 @@ def talep_rapor():
         func.count(Talep.id).label('adet')
     ).join(Talep, Talep.kategori_id == TalepKategorisi.id).filter(
         Talep.is_deleted == False,
-        extract('year', Talep.created_at) == yil
+        donem_kosulu(Talep.created_at, yil)
     ).group_by(TalepKategorisi.ad).all()
     
     # Öncelik dağılımı
@@ -269,7 +411,7 @@ def talep_rapor():
         func.count(Talep.id).label('adet')
     ).filter(
         Talep.is_deleted == False,
-        extract('year', Talep.created_at) == yil
+        donem_kosulu(Talep.created_at, yil)
     ).group_by(Talep.oncelik).all()
     
     # Aylık trend
@@ -278,45 +420,66 @@ def talep_rapor():
         func.count(Talep.id).label('toplam')
     ).filter(
         Talep.is_deleted == False,
-        extract('year', Talep.created_at) == yil
+        donem_kosulu(Talep.created_at, yil)
     ).group_by('ay').order_by('ay').all()
 
-        # Öncelik dict (template bunu bekliyor)
-    oncelik = {"dusuk": 0, "normal": 0, "yuksek": 0, "kritik": 0}
-    for onc, adet in oncelik_dagilim:
-        if not onc:
-            continue
-        if onc in oncelik:
-            oncelik[onc] = int(adet or 0)
-
-    # SLA aşımı (modelde sla_asim bool varsayımı)
-    stats["sla_asim"] = query.filter(Talep.sla_asim == True).count()
-
-    # Template uyumluluğu: "cozen"
-    # (istersen sadece cozuldu da yapabiliriz)
-    stats["cozen"] = int(stats.get("cozuldu", 0) + stats.get("kapatildi", 0))
-
     # Kategori detay (kategori adı, talep adedi, SLA aşımı)
     kategori_detay = db.session.query(
         TalepKategorisi.ad,
         func.count(Talep.id).label('adet'),
-        func.sum(case((Talep.sla_asim == True, 1), else_=0)).label('sla_asim')
+        func.sum(case((Talep.sla_asildi == True, 1), else_=0)).label('sla_asim')
     ).join(Talep, Talep.kategori_id == TalepKategorisi.id).filter(
         Talep.is_deleted == False,
-        extract('year', Talep.created_at) == yil
+        donem_kosulu(Talep.created_at, yil)
     ).group_by(TalepKategorisi.ad).order_by(func.count(Talep.id).desc()).all()
-
-    # Aylık trend'i dict'e çevir (tojson rahat serialize etsin)
-    aylik_trend_dict = {int(ay): int(toplam) for ay, toplam in aylik_trend}
     
-    return render_template('rapor/talep_rapor.html',
-                          stats=stats,
-                          kategori_dagilim=kategori_dagilim,
-                          kategori_detay=kategori_detay,
-                          oncelik=oncelik,
-                          aylik_trend=aylik_trend_dict,
-                          yil=yil,
-                          ay=ay)
+    return dict(stats=stats,
+                kategori_dagilim=kategori_dagilim,
+                oncelik_dagilim=oncelik_dagilim,
+                aylik_trend=aylik_trend,
+                kategori_detay=kategori_detay)
+
+
+def _talep_ozetten(yil, ay):
+    toplam, acik, cozuldu, kapatildi, sla_asim = db.session.query(
+        func.sum(RaporOzeti.adet),
+        func.sum(case((RaporOzeti.durum.in_(TALEP_ACIK_DURUMLAR), RaporOzeti.adet))),
+        func.sum(case((RaporOzeti.durum == 'cozuldu', RaporOzeti.adet))),
+        func.sum(case((RaporOzeti.durum == 'kapatildi', RaporOzeti.adet))),
+        func.sum(RaporOzeti.sla_asim)
+    ).filter(ozet_kosulu('talep', yil, ay)).one()
+    stats = {
+        'toplam': int(toplam or 0),
+        'acik': int(acik or 0),
+        'cozuldu': int(cozuldu or 0),
+        'kapatildi': int(kapatildi or 0),
+        'sla_asim': int(sla_asim or 0),
+    }
+    
+    yil_kosulu = ozet_kosulu('talep', yil)
+    kategori_detay = db.session.query(
+        TalepKategorisi.ad,
+        func.sum(RaporOzeti.adet).label('adet'),
+        func.sum(RaporOzeti.sla_asim).label('sla_asim')
+    ).join(RaporOzeti, RaporOzeti.kategori_id == TalepKategorisi.id).filter(
+        yil_kosulu
+    ).group_by(TalepKategorisi.ad).order_by(func.sum(RaporOzeti.adet).desc()).all()
+    
+    oncelik_dagilim = db.session.query(
+        RaporOzeti.oncelik,
+        func.sum(RaporOzeti.adet).label('adet')
+    ).filter(yil_kosulu).group_by(RaporOzeti.oncelik).all()
+    
+    aylik_trend = db.session.query(
+        extract('month', RaporOzeti.donem).label('ay'),
+        func.sum(RaporOzeti.adet).label('toplam')
+    ).filter(yil_kosulu).group_by('ay').order_by('ay').all()
+    
+    return dict(stats=stats,
+                kategori_dagilim=[(ad, adet) for ad, adet, _ in kategori_detay],
+                oncelik_dagilim=oncelik_dagilim,
+                aylik_trend=aylik_trend,
+                kategori_detay=kategori_detay)
 
 
 
@@ -328,84 +491,29 @@ def talep_rapor():
 @login_required
 @permission_required('rapor.export')
 def export_excel(modul):
-    """Excel export"""
-    try:
-        import openpyxl
-        from openpyxl.utils import get_column_letter
-    except ImportError:
-        return "openpyxl yüklü değil", 500
-    
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    
-    if modul == 'masraf':
-        ws.title = 'Masraflar'
-        headers = ['Tarih', 'Başlık', 'Kategori', 'Tutar', 'Durum', 'Çalışan']
-        ws.append(headers)
-        
-        masraflar = Masraf.query.filter_by(is_deleted=False).order_by(Masraf.masraf_tarihi.desc()).all()
-        for m in masraflar:
-            ws.append([
-                m.masraf_tarihi.strftime('%d.%m.%Y') if m.masraf_tarihi else '',
-                m.baslik,
-                m.kategori.ad if m.kategori else '',
-                float(m.tl_karsiligi or 0),
-                m.durum_text,
-                m.calisan.ad_soyad if m.calisan else ''
-            ])
-    
-    elif modul == 'sozlesme':
-        ws.title = 'Sözleşmeler'
-        headers = ['No', 'Başlık', 'Tip', 'Taraf', 'Başlangıç', 'Bitiş', 'Tutar', 'Durum']
-        ws.append(headers)
-        
-        sozlesmeler = Sozlesme.query.filter_by(is_deleted=False).order_by(Sozlesme.bitis_tarihi).all()
-        for s in sozlesmeler:
-            ws.append([
-                s.sozlesme_no or str(s.id),
-                s.baslik,
-                s.tip.ad if s.tip else '',
-                s.taraf_adi,
-                s.baslangic_tarihi.strftime('%d.%m.%Y'),
-                s.bitis_tarihi.strftime('%d.%m.%Y'),
-                float(s.tutar or 0),
-                s.durum_text
-            ])
-    
-    elif modul == 'talep':
-        ws.title = 'Talepler'
-        headers = ['No', 'Konu', 'Kategori', 'Öncelik', 'Durum', 'Oluşturan', 'Tarih']
-        ws.append(headers)
-        
-        talepler = Talep.query.filter_by(is_deleted=False).order_by(Talep.created_at.desc()).all()
-        for t in talepler:
-            ws.append([
-                t.talep_no,
-                t.konu,
-                t.kategori.ad if t.kategori else '',
-                t.oncelik_text,
-                t.durum_text,
-                t.olusturan.full_name if t.olusturan else '',
-                t.created_at.strftime('%d.%m.%Y %H:%M')
-            ])
-    
-    else:
+    """Excel / CSV / TSV export (?format=xlsx|csv|tsv), akışlı yanıt"""
+    from app.modules.rapor.export import (EXPORT_TANIMLARI, FORMATLAR, metin_akisi,
+                                          xlsx_olustur, dosya_akisi)
+
+    if modul not in EXPORT_TANIMLARI:
         return "Geçersiz modül", 400
-    
-    # Sütun genişliklerini ayarla
-    for col in range(1, len(headers) + 1):
-        ws.column_dimensions[get_column_letter(col)].width = 15
-    
-    # Response
-    output = io.BytesIO()
-    wb.save(output)
-    output.seek(0)
-    
-    return Response(
-        output.getvalue(),
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        headers={'Content-Disposition': f'attachment; filename={modul}_rapor.xlsx'}
-    )
+
+    fmt = request.args.get('format', 'xlsx')
+    if fmt not in FORMATLAR:
+        return "Geçersiz format", 400
+    mimetype, uzanti = FORMATLAR[fmt]
+    headers = {'Content-Disposition': f'attachment; filename={modul}_rapor.{uzanti}'}
+
+    if fmt == 'xlsx':
+        try:
+            dosya = xlsx_olustur(modul)
+        except ImportError:
+            return "openpyxl yüklü değil", 500
+        return Response(dosya_akisi(dosya), mimetype=mimetype, headers=headers)
+
+    ayirici = '\t' if fmt == 'tsv' else ','
+    return Response(stream_with_context(metin_akisi(modul, ayirici)),
+                    mimetype=mimetype, headers=headers)
 
 
 # ============================================================
@@ -424,12 +532,11 @@ def api_ozet():
         'sozlesme': Sozlesme.query.filter_by(is_deleted=False, durum='aktif').count(),
         'acik_talep': Talep.query.filter(
             Talep.is_deleted == False,
-            Talep.durum.in_(['acik', 'atandi', 'devam_ediyor', 'beklemede'])
+            Talep.durum.in_(TALEP_ACIK_DURUMLAR)
         ).count(),
         'bu_ay_masraf': Masraf.query.filter(
             Masraf.is_deleted == False,
-            extract('month', Masraf.masraf_tarihi) == date.today().month,
-            extract('year', Masraf.masraf_tarihi) == date.today().year
+            donem_kosulu(Masraf.masraf_tarihi, date.today().year, date.today().month)
         ).with_entities(func.sum(Masraf.tl_karsiligi)).scalar() or 0,
     }
     
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+TG Portal - Dönem Filtresi Sorgu Planları
+`flask tarih-filtre-plani` geçici bir tabloya sentetik kayıt yükler ve
+rapor / dashboard filtrelerinin eski (extract(), func.date()) ve yeni
+(app.utils aralık koşulları) biçimlerinin sorgu planlarını ve sürelerini
+yan yana yazar. Tablo bağlantı kapanınca silinir; gerçek tablolara dokunmaz.
+"""
+
+import time
+from datetime import date, datetime, timedelta
+
+import sqlalchemy as sa
+
+from app import db
+from app.utils import donem_kosulu, gun_kosulu
+
+
+GUN_SAYISI = 5 * 365  # Kayıtlar son beş yıla dağıtılır
+PARTI = 10000
+
+_metadata = sa.MetaData()
+
+# Rapor tablolarındaki (is_deleted, tarih) indekslerinin karşılığı
+plan_olcum = sa.Table(
+    'plan_olcum', _metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('is_deleted', sa.Boolean, nullable=False),
+    sa.Column('tarih', sa.Date, nullable=False),
+    sa.Column('zaman', sa.DateTime, nullable=False),
+    sa.Column('tutar', sa.Numeric(14, 2)),
+    sa.Index('ix_plan_olcum_is_deleted_tarih', 'is_deleted', 'tarih'),
+    sa.Index('ix_plan_olcum_is_deleted_zaman', 'is_deleted', 'zaman'),
+    prefixes=['TEMPORARY'],
+)
+
+
+def _satirlar(satir, bugun):
+    ilk_gun = bugun - timedelta(days=GUN_SAYISI - 1)
+    for i in range(1, satir + 1):
+        # Deterministik dağılım: tekrar çalıştırmada aynı veri
+        tarih = ilk_gun + timedelta(days=(i * 7919) % GUN_SAYISI)
+        yield {
+            'id': i,
+            'is_deleted': i % 20 == 0,
+            'tarih': tarih,
+            'zaman': datetime.combine(tarih, datetime.min.time()) + timedelta(seconds=(i * 104729) % 86400),
+            'tutar': i % 1000,
+        }
+
+
+def _yukle(conn, satir, bugun):
+    parti = []
+    for kayit in _satirlar(satir, bugun):
+        parti.append(kayit)
+        if len(parti) == PARTI:
+            conn.execute(plan_olcum.insert(), parti)
+            parti = []
+    if parti:
+        conn.execute(plan_olcum.insert(), parti)
+
+
+def _plan(conn, sorgu):
+    """Sorgunun planı (PostgreSQL'de EXPLAIN ANALYZE) ve süresi (ms)"""
+    derlenmis = sorgu.compile(dialect=conn.dialect)
+    if derlenmis.positional:
+        parametreler = tuple(derlenmis.params[ad] for ad in derlenmis.positiontup)
+    else:
+        parametreler = derlenmis.params
+    if conn.dialect.name == 'postgresql':
+        explain = 'EXPLAIN (ANALYZE, BUFFERS) '
+    elif conn.dialect.name == 'sqlite':
+        explain = 'EXPLAIN QUERY PLAN '
+    else:
+        explain = 'EXPLAIN '
+    satirlar = conn.exec_driver_sql(explain + str(derlenmis), parametreler).fetchall()
+    plan = [satir[-1] if conn.dialect.name == 'sqlite' else satir[0] for satir in satirlar]
+
+    baslangic = time.perf_counter()
+    conn.execute(sorgu).fetchall()
+    return plan, (time.perf_counter() - baslangic) * 1000
+
+
+def olcumler(bugun):
+    """(başlık, eski koşul, yeni koşul) listesi"""
+    t = plan_olcum.c
+    yil, ay = bugun.year, bugun.month
+    return [
+        ('Aylık dönem (masraf_rapor, api_ozet, satın alma dashboard)',
+         sa.and_(sa.extract('year', t.tarih) == yil, sa.extract('month', t.tarih) == ay),
+         donem_kosulu(t.tarih, yil, ay)),
+        ('Yıllık dönem (kategori dağılımı, aylık trend)',
+         sa.extract('year', t.tarih) == yil,
+         donem_kosulu(t.tarih, yil)),
+        ('Bugün (get_talep_istatistikleri, onay.index)',
+         sa.func.date(t.zaman) == bugun,
+         gun_kosulu(t.zaman, bugun)),
+    ]
+
+
+def planlari_yaz(satir, yaz=print):
+    """Sentetik veriyi yükler, her filtre için eski / yeni planları yazar"""
+    bugun = date.today()
+    t = plan_olcum.c
+    with db.engine.connect() as conn:
+        plan_olcum.create(conn)
+        try:
+            baslangic = time.perf_counter()
+            _yukle(conn, satir, bugun)
+            conn.execute(sa.text('ANALYZE plan_olcum' if conn.dialect.name == 'postgresql' else 'ANALYZE'))
+            yaz(f'{satir} kayıt {time.perf_counter() - baslangic:.1f} sn\'de yüklendi ({conn.dialect.name}).')
+
+            for baslik, eski, yeni in olcumler(bugun):
+                yaz(f'\n=== {baslik}')
+                for etiket, kosul in (('ÖNCE', eski), ('SONRA', yeni)):
+                    sorgu = sa.select(sa.func.count(), sa.func.sum(t.tutar)).where(
+                        t.is_deleted == False, kosul
+                    )
+                    plan, sure = _plan(conn, sorgu)
+                    yaz(f'--- {etiket} ({sure:.1f} ms)')
+                    for adim in plan:
+                        yaz(f'    {adim}')
+        finally:
+            plan_olcum.drop(conn)
+            conn.rollback()
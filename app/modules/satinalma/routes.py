@@ -21,7 +21,7 @@ from app.models.satinalma import (
 from app.models.tedarikci import Tedarikci
 from app.models.proje import Proje
 from app.models.onay import OnayServisi
-from app.utils import permission_required, paginate_query
+from app.utils import permission_required, paginate_query, donem_kosulu
 
 satinalma_bp = Blueprint('satinalma', __name__)
 
@@ -51,8 +51,7 @@ def dashboard():
         'bekleyen_siparisler': SatinAlmaSiparisi.query.filter_by(is_deleted=False, durum='siparis_verildi').count(),
         'bu_ay_toplam': db.session.query(db.func.sum(SatinAlmaSiparisi.toplam_tutar)).filter(
             SatinAlmaSiparisi.is_deleted == False,
-            db.extract('month', SatinAlmaSiparisi.siparis_tarihi) == date.today().month,
-            db.extract('year', SatinAlmaSiparisi.siparis_tarihi) == date.today().year
+            donem_kosulu(SatinAlmaSiparisi.siparis_tarihi, date.today().year, date.today().month)
         ).scalar() or 0
     }
     
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+TG Portal - Sözleşme Bitiş Pencereleri
+Bitişine 7 / 30 / 90 gün kalan aktif sözleşmeler tek sorguda hesaplanır ve
+Redis'te o güne ait anahtarda saklanır. `flask sozlesme-yasam-dongusu`
+süresi dolanları güncelledikten sonra günün pencerelerini önceden hesaplar;
+dashboard, rapor.sozlesme_rapor ve api_yaklasan buradan okur. Sözleşmelere
+yazılınca versiyon sayacı artar ve sonraki okuma yeniden hesaplar.
+"""
+
+from datetime import date, timedelta
+
+from flask import has_app_context
+from sqlalchemy.orm import joinedload
+
+from app.cache import degisiklik_izle, json_oku, json_yaz, versiyon_oku, versiyon_artir
+from app.models.sozlesme import (
+    Sozlesme, SozlesmeTipi, get_yaklasan_sozlesmeler, kalan_gun_rengi
+)
+
+
+PENCERELER = (7, 30, 90)  # gün
+SOZLESME_VERSIYON_KEY = 'sozlesme:versiyon'
+PENCERE_CACHE_TTL = 24 * 3600  # saniye; anahtar zaten güne bağlı
+
+# Bu modellere yazılınca pencereler geçersiz olur
+PENCERE_MODELLERI = (Sozlesme, SozlesmeTipi)
+
+
+def _kayit(sozlesme):
+    """Sözleşmenin listelerde gösterilen alanları (JSON'a yazılabilir)"""
+    return {
+        'id': sozlesme.id,
+        'baslik': sozlesme.baslik,
+        'taraf_adi': sozlesme.taraf_adi,
+        'tip': {'ad': sozlesme.tip.ad} if sozlesme.tip else None,
+        'bitis_tarihi': sozlesme.bitis_tarihi.isoformat(),
+        'tutar': float(sozlesme.tutar) if sozlesme.tutar is not None else None,
+    }
+
+
+def pencereleri_hesapla(bugun=None):
+    """Günün bitiş pencerelerini veritabanından hesaplar (cache'siz)"""
+    bugun = bugun or date.today()
+    sozlesmeler = Sozlesme.query.options(
+        joinedload(Sozlesme.tip), joinedload(Sozlesme.musteri), joinedload(Sozlesme.tedarikci)
+    ).filter(
+        Sozlesme.is_deleted == False,
+        Sozlesme.durum == 'aktif',
+        Sozlesme.bitis_tarihi >= bugun,
+        Sozlesme.bitis_tarihi <= bugun + timedelta(days=max(PENCERELER))
+    ).order_by(Sozlesme.bitis_tarihi).all()
+
+    return {
+        'tarih': bugun.isoformat(),
+        'sayilar': {
+            str(gun): sum(1 for s in sozlesmeler if s.bitis_tarihi <= bugun + timedelta(days=gun))
+            for gun in PENCERELER
+        },
+        'sozlesmeler': [_kayit(s) for s in sozlesmeler],
+    }
+
+
+def _anahtar(versiyon, bugun):
+    return f'sozlesme:pencereler:{versiyon}:{bugun.isoformat()}'
+
+
+def pencereleri_yenile():
+    """Günün pencerelerini hesaplayıp cache'e yazar (günlük iş)"""
+    bugun = date.today()
+    veri = pencereleri_hesapla(bugun)
+    versiyon = versiyon_oku(SOZLESME_VERSIYON_KEY)
+    if versiyon is not None:
+        json_yaz(_anahtar(versiyon, bugun), veri, PENCERE_CACHE_TTL)
+    return veri
+
+
+class BitisPencereleri:
+    """Cache'lenmiş pencereler üzerinde sayı ve liste okuma"""
+
+    def __init__(self, veri):
+        self.bugun = date.fromisoformat(veri['tarih'])
+        self._sayilar = veri['sayilar']
+        self._sozlesmeler = veri['sozlesmeler']
+
+    def _satir(self, kayit):
+        # Şablonlar s.bitis_tarihi.strftime / s.kalan_gun_renk kullanır
+        bitis = date.fromisoformat(kayit['bitis_tarihi'])
+        kalan = (bitis - self.bugun).days
+        return dict(kayit, bitis_tarihi=bitis, kalan_gun=kalan, kalan_gun_renk=kalan_gun_rengi(kalan))
+
+    def sayi(self, gun):
+        """Bitişine `gun` gün kalan aktif sözleşme sayısı"""
+        if str(gun) in self._sayilar:
+            return self._sayilar[str(gun)]
+        return len(self.sozlesmeler(gun))
+
+    def sozlesmeler(self, gun):
+        """Bitişine `gun` gün kalan aktif sözleşmeler (bitiş tarihine göre)"""
+        if gun > max(PENCERELER):
+            # Pencere dışı: canlı sorgu
+            return [self._satir(_kayit(s)) for s in get_yaklasan_sozlesmeler(gun)]
+        sinir = (self.bugun + timedelta(days=gun)).isoformat()
+        return [self._satir(k) for k in self._sozlesmeler if k['bitis_tarihi'] <= sinir]
+
+
+def bitis_pencereleri():
+    """
+    Günün bitiş pencereleri. Redis varsa versiyonlu ve güne bağlı anahtarla
+    saklanır; yoksa veya erişilemezse doğrudan hesaplanır.
+    """
+    bugun = date.today()
+    versiyon = versiyon_oku(SOZLESME_VERSIYON_KEY)
+    if versiyon is None:
+        return BitisPencereleri(pencereleri_hesapla(bugun))
+
+    anahtar = _anahtar(versiyon, bugun)
+    veri = json_oku(anahtar)
+    if veri is None:
+        veri = pencereleri_hesapla(bugun)
+        json_yaz(anahtar, veri, PENCERE_CACHE_TTL)
+    return BitisPencereleri(veri)
+
+
+def pencere_cache_temizle():
+    """Bitiş pencereleri cache'ini geçersiz kılar"""
+    if has_app_context():
+        versiyon_artir(SOZLESME_VERSIYON_KEY)
+
+
+# ============================================================
+# CACHE INVALIDATION
+# ============================================================
+
+degisiklik_izle(PENCERE_MODELLERI, 'sozlesme_degisti', pencere_cache_temizle)
@@ -5,23 +5,20 @@ TG Portal - Sözleşme Modülü Routes
 
 from datetime import datetime, date, timedelta
 from decimal import Decimal
-import os
-import uuid
 
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, current_app, send_file
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
 
 from app import db
-from app.models.sozlesme import (
-    Sozlesme, SozlesmeTipi, SozlesmeEk,
-    get_yaklasan_sozlesmeler, get_sona_eren_sozlesmeler
-)
+from app.models.sozlesme import Sozlesme, SozlesmeTipi, SozlesmeEk
+from app.modules.sozlesme.bitis import bitis_pencereleri
 from app.models.proje import Musteri
 from app.models.tedarikci import Tedarikci
 from app.models.ik import Calisan
 from app.models.base import CalisanDurumu
 from app.utils import permission_required, paginate_query
+from app.depolama import dosya_kaydet, dosya_var_mi, dosya_gonder, dosya_sil
 
 sozlesme_bp = Blueprint('sozlesme', __name__)
 
@@ -43,16 +40,18 @@ def dashboard():
     """Sözleşme dashboard"""
     from sqlalchemy import func
     
+    pencereler = bitis_pencereleri()
+    
     # İstatistikler
     stats = {
         'toplam': Sozlesme.query.filter_by(is_deleted=False).count(),
         'aktif': Sozlesme.query.filter_by(is_deleted=False, durum='aktif').count(),
-        'yaklasan_30': len(get_yaklasan_sozlesmeler(30)),
-        'yaklasan_7': len(get_yaklasan_sozlesmeler(7)),
+        'yaklasan_30': pencereler.sayi(30),
+        'yaklasan_7': pencereler.sayi(7),
     }
     
     # Yaklaşan sözleşmeler
-    yaklasan = get_yaklasan_sozlesmeler(30)
+    yaklasan = pencereler.sozlesmeler(30)
     
     # Tip bazlı dağılım
     tip_dagilim = db.session.query(
@@ -181,17 +180,8 @@ def ekle():
         if 'dosya' in request.files:
             file = request.files['dosya']
             if file and file.filename and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                unique_name = f"{uuid.uuid4().hex}_{filename}"
-                
-                upload_folder = os.path.join(current_app.config.get('UPLOAD_FOLDER', 'uploads'), 'sozlesme', str(sozlesme.id))
-                os.makedirs(upload_folder, exist_ok=True)
-                
-                filepath = os.path.join(upload_folder, unique_name)
-                file.save(filepath)
-                
-                sozlesme.dosya_adi = filename
-                sozlesme.dosya_yolu = filepath
+                sozlesme.dosya_adi = secure_filename(file.filename)
+                sozlesme.dosya_yolu = dosya_kaydet(file).yol
         
         db.session.commit()
         
@@ -268,21 +258,11 @@ def duzenle(id):
         if 'dosya' in request.files:
             file = request.files['dosya']
             if file and file.filename and allowed_file(file.filename):
-                # Eski dosyayı sil
-                if sozlesme.dosya_yolu and os.path.exists(sozlesme.dosya_yolu):
-                    os.remove(sozlesme.dosya_yolu)
-                
-                filename = secure_filename(file.filename)
-                unique_name = f"{uuid.uuid4().hex}_{filename}"
+                # Eski dosyayı bırak
+                dosya_sil(sozlesme.dosya_yolu)
                 
-                upload_folder = os.path.join(current_app.config.get('UPLOAD_FOLDER', 'uploads'), 'sozlesme', str(sozlesme.id))
-                os.makedirs(upload_folder, exist_ok=True)
-                
-                filepath = os.path.join(upload_folder, unique_name)
-                file.save(filepath)
-                
-                sozlesme.dosya_adi = filename
-                sozlesme.dosya_yolu = filepath
+                sozlesme.dosya_adi = secure_filename(file.filename)
+                sozlesme.dosya_yolu = dosya_kaydet(file).yol
         
         db.session.commit()
         
@@ -369,13 +349,13 @@ def dosya_indir(id):
     """Sözleşme dosyasını indir"""
     sozlesme = Sozlesme.query.get_or_404(id)
     
-    if not sozlesme.dosya_yolu or not os.path.exists(sozlesme.dosya_yolu):
+    if not dosya_var_mi(sozlesme.dosya_yolu):
         flash('Dosya bulunamadı.', 'warning')
         return redirect(url_for('sozlesme.detay', id=id))
     
-    return send_file(sozlesme.dosya_yolu,
-                     download_name=sozlesme.dosya_adi,
-                     as_attachment=True)
+    return dosya_gonder(sozlesme.dosya_yolu,
+                        download_name=sozlesme.dosya_adi,
+                        as_attachment=True)
 
 
 # ============================================================
@@ -403,20 +383,13 @@ def ek_ekle(id):
         return redirect(url_for('sozlesme.detay', id=id))
     
     filename = secure_filename(file.filename)
-    unique_name = f"{uuid.uuid4().hex}_{filename}"
-    
-    upload_folder = os.path.join(current_app.config.get('UPLOAD_FOLDER', 'uploads'), 'sozlesme', str(sozlesme.id), 'ekler')
-    os.makedirs(upload_folder, exist_ok=True)
-    
-    filepath = os.path.join(upload_folder, unique_name)
-    file.save(filepath)
     
     ek = SozlesmeEk(
         sozlesme_id=sozlesme.id,
         baslik=request.form.get('baslik', '').strip() or filename,
         aciklama=request.form.get('aciklama', '').strip() or None,
         dosya_adi=filename,
-        dosya_yolu=filepath,
+        dosya_yolu=dosya_kaydet(file).yol,
         dosya_tipi=file.content_type
     )
     
@@ -434,13 +407,13 @@ def ek_indir(id):
     """Ek dosyayı indir"""
     ek = SozlesmeEk.query.get_or_404(id)
     
-    if not ek.dosya_yolu or not os.path.exists(ek.dosya_yolu):
+    if not dosya_var_mi(ek.dosya_yolu):
         flash('Dosya bulunamadı.', 'warning')
         return redirect(url_for('sozlesme.detay', id=ek.sozlesme_id))
     
-    return send_file(ek.dosya_yolu,
-                     download_name=ek.dosya_adi,
-                     as_attachment=True)
+    return dosya_gonder(ek.dosya_yolu,
+                        download_name=ek.dosya_adi,
+                        as_attachment=True)
 
 
 @sozlesme_bp.route('/ek/<int:id>/sil', methods=['POST'])
@@ -451,8 +424,7 @@ def ek_sil(id):
     ek = SozlesmeEk.query.get_or_404(id)
     sozlesme_id = ek.sozlesme_id
     
-    if ek.dosya_yolu and os.path.exists(ek.dosya_yolu):
-        os.remove(ek.dosya_yolu)
+    dosya_sil(ek.dosya_yolu)
     
     db.session.delete(ek)
     db.session.commit()
@@ -527,12 +499,12 @@ def tip_ekle():
 def api_yaklasan():
     """Yaklaşan sözleşmeler API"""
     gun = request.args.get('gun', 30, type=int)
-    sozlesmeler = get_yaklasan_sozlesmeler(gun)
+    sozlesmeler = bitis_pencereleri().sozlesmeler(gun)
     
     return jsonify([{
-        'id': s.id,
-        'baslik': s.baslik,
-        'taraf': s.taraf_adi,
-        'bitis': s.bitis_tarihi.strftime('%d.%m.%Y'),
-        'kalan_gun': s.kalan_gun
+        'id': s['id'],
+        'baslik': s['baslik'],
+        'taraf': s['taraf_adi'],
+        'bitis': s['bitis_tarihi'].strftime('%d.%m.%Y'),
+        'kalan_gun': s['kalan_gun']
     } for s in sozlesmeler])
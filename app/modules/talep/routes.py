@@ -4,10 +4,8 @@ TG Portal - Talep/Ticket Modülü Routes
 """
 
 from datetime import datetime, date
-import os
-import uuid
 
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, current_app, send_file
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
 
@@ -18,6 +16,8 @@ from app.models.talep import (
 )
 from app.models.core import User
 from app.utils import permission_required, paginate_query
+from app.bildirim import yayinla
+from app.depolama import dosya_kaydet, dosya_var_mi, dosya_gonder
 
 talep_bp = Blueprint('talep', __name__)
 
@@ -28,6 +28,17 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def _talep_bildir(talep, olay, kullanici_ids):
+    """İşlemi yapan hariç kullanıcılara anlık bildirim (commit sonrası gider)"""
+    yayinla([k for k in kullanici_ids if k != current_user.id], olay, {
+        'talep_id': talep.id,
+        'talep_no': talep.talep_no,
+        'konu': talep.konu,
+        'durum': talep.durum,
+        'url': url_for('talep.detay', id=talep.id)
+    })
+
+
 # ============================================================
 # DASHBOARD
 # ============================================================
@@ -140,6 +151,8 @@ def yeni():
             talep.atanma_tarihi = datetime.utcnow()
             talep.durum = 'atandi'
         
+        talep.sla_hesapla(kategori)
+        
         db.session.add(talep)
         db.session.flush()
         
@@ -147,17 +160,11 @@ def yeni():
         if 'dosya' in request.files:
             file = request.files['dosya']
             if file and file.filename and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                unique_name = f"{uuid.uuid4().hex}_{filename}"
-                
-                upload_folder = os.path.join(current_app.config.get('UPLOAD_FOLDER', 'uploads'), 'talep', str(talep.id))
-                os.makedirs(upload_folder, exist_ok=True)
-                
-                filepath = os.path.join(upload_folder, unique_name)
-                file.save(filepath)
-                
-                talep.dosya_adi = filename
-                talep.dosya_yolu = filepath
+                talep.dosya_adi = secure_filename(file.filename)
+                talep.dosya_yolu = dosya_kaydet(file).yol
+        
+        if talep.atanan_id:
+            _talep_bildir(talep, 'talep_atandi', [talep.atanan_id])
         
         db.session.commit()
         
@@ -193,15 +200,18 @@ def detay(id):
     else:
         yorumlar = talep.yorumlar.filter_by(dahili=False).order_by(TalepYorum.created_at).all()
     
-    # Destek ekibi listesi (atama için)
+    # Destek ekibi ve kategori listesi (atama / kategori değişimi için)
     destek_ekibi = []
+    kategoriler = []
     if is_destek:
         destek_ekibi = User.query.filter_by(is_active=True).order_by(User.first_name).all()
+        kategoriler = TalepKategorisi.query.filter_by(aktif=True).order_by(TalepKategorisi.sira).all()
     
     return render_template('talep/detay.html',
                           talep=talep,
                           yorumlar=yorumlar,
                           destek_ekibi=destek_ekibi,
+                          kategoriler=kategoriler,
                           is_destek=is_destek)
 
 
@@ -238,23 +248,20 @@ def yorum_ekle(id):
     if 'dosya' in request.files:
         file = request.files['dosya']
         if file and file.filename and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            unique_name = f"{uuid.uuid4().hex}_{filename}"
-            
-            upload_folder = os.path.join(current_app.config.get('UPLOAD_FOLDER', 'uploads'), 'talep', str(talep.id), 'yorumlar')
-            os.makedirs(upload_folder, exist_ok=True)
-            
-            filepath = os.path.join(upload_folder, unique_name)
-            file.save(filepath)
-            
-            yorum.dosya_adi = filename
-            yorum.dosya_yolu = filepath
+            yorum.dosya_adi = secure_filename(file.filename)
+            yorum.dosya_yolu = dosya_kaydet(file).yol
     
     db.session.add(yorum)
     
     # İlk yanıt tarihini güncelle
     if is_destek and not talep.ilk_yanit_tarihi:
         talep.ilk_yanit_tarihi = datetime.utcnow()
+        # Sweeper çalışmadan gelen geç yanıt da aşım olarak kalsın
+        talep.sla_asim_kontrol()
+    
+    # Dahili notlar talep sahibine bildirilmez
+    _talep_bildir(talep, 'talep_yorum',
+                  [talep.atanan_id] if yorum.dahili else [talep.olusturan_id, talep.atanan_id])
     
     db.session.commit()
     
@@ -276,6 +283,8 @@ def durum_degistir(id):
     yeni_durum = request.form.get('durum')
     if yeni_durum in ['acik', 'atandi', 'devam_ediyor', 'beklemede', 'cozuldu', 'kapatildi']:
         eski_durum = talep.durum
+        # Geç kapatılan talep, sweeper çalışmadan önce de aşım olarak kalsın
+        talep.sla_asim_kontrol()
         talep.durum = yeni_durum
         
         # Özel durumlar
@@ -295,6 +304,7 @@ def durum_degistir(id):
                 dahili=True
             )
             db.session.add(yorum)
+            _talep_bildir(talep, 'talep_durum', [talep.olusturan_id, talep.atanan_id])
         
         db.session.commit()
         flash('Durum güncellendi.', 'success')
@@ -335,6 +345,8 @@ def ata(id):
         talep.atanma_tarihi = None
         talep.durum = 'acik'
     
+    talep.sla_hesapla()
+    _talep_bildir(talep, 'talep_atandi', [talep.olusturan_id, talep.atanan_id])
     db.session.commit()
     flash('Atama güncellendi.', 'success')
     return redirect(url_for('talep.detay', id=id))
@@ -360,6 +372,37 @@ def oncelik_degistir(id):
     return redirect(url_for('talep.detay', id=id))
 
 
+# ============================================================
+# KATEGORİ DEĞİŞTİR
+# ============================================================
+
+@talep_bp.route('/<int:id>/kategori', methods=['POST'])
+@login_required
+@permission_required('talep.admin')
+def kategori_degistir(id):
+    """Talebi başka kategoriye taşı (SLA yeniden hesaplanır)"""
+    talep = Talep.query.get_or_404(id)
+    
+    kategori = TalepKategorisi.query.get(request.form.get('kategori_id', type=int) or 0)
+    if kategori and kategori.id != talep.kategori_id:
+        eski_kategori = talep.kategori.ad if talep.kategori else '-'
+        talep.kategori = kategori
+        talep.sla_hesapla(kategori)
+        
+        yorum = TalepYorum(
+            talep_id=talep.id,
+            yazan_id=current_user.id,
+            icerik=f"Kategori değiştirildi: {eski_kategori} → {kategori.ad}",
+            tip='durum_degisikligi',
+            dahili=True
+        )
+        db.session.add(yorum)
+        db.session.commit()
+        flash('Kategori güncellendi.', 'success')
+    
+    return redirect(url_for('talep.detay', id=id))
+
+
 # ============================================================
 # DOSYA İNDİR
 # ============================================================
@@ -375,11 +418,11 @@ def dosya_indir(id):
         flash('Yetkiniz yok.', 'danger')
         return redirect(url_for('talep.liste'))
     
-    if not talep.dosya_yolu or not os.path.exists(talep.dosya_yolu):
+    if not dosya_var_mi(talep.dosya_yolu):
         flash('Dosya bulunamadı.', 'warning')
         return redirect(url_for('talep.detay', id=id))
     
-    return send_file(talep.dosya_yolu, download_name=talep.dosya_adi, as_attachment=True)
+    return dosya_gonder(talep.dosya_yolu, download_name=talep.dosya_adi, as_attachment=True)
 
 
 @talep_bp.route('/yorum/<int:id>/dosya')
@@ -394,11 +437,11 @@ def yorum_dosya_indir(id):
         flash('Yetkiniz yok.', 'danger')
         return redirect(url_for('talep.liste'))
     
-    if not yorum.dosya_yolu or not os.path.exists(yorum.dosya_yolu):
+    if not dosya_var_mi(yorum.dosya_yolu):
         flash('Dosya bulunamadı.', 'warning')
         return redirect(url_for('talep.detay', id=talep.id))
     
-    return send_file(yorum.dosya_yolu, download_name=yorum.dosya_adi, as_attachment=True)
+    return dosya_gonder(yorum.dosya_yolu, download_name=yorum.dosya_adi, as_attachment=True)
 
 
 # ============================================================
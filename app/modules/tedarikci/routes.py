@@ -9,6 +9,7 @@ from app import db
 from app.models.tedarikci import Tedarikci, TedarikciIletisim, TedarikciDegerlendirme
 from app.models.base import TedarikciTipi
 from app.utils import permission_required, paginate_query
+from app.arama import arama_uygula
 
 tedarikci_bp = Blueprint('tedarikci', __name__)
 
@@ -38,15 +39,7 @@ def liste():
     if aktif is not None and aktif != '':
         query = query.filter(Tedarikci.aktif == (aktif == '1'))
     if search:
-        search_filter = f'%{search}%'
-        query = query.filter(
-            db.or_(
-                Tedarikci.unvan.ilike(search_filter),
-                Tedarikci.kisa_ad.ilike(search_filter),
-                Tedarikci.vergi_no.ilike(search_filter),
-                Tedarikci.yetkili_adi.ilike(search_filter)
-            )
-        )
+        query = arama_uygula(query, Tedarikci, search)
     
     query = query.order_by(Tedarikci.unvan)
     pagination = paginate_query(query, page, per_page)
@@ -222,13 +215,7 @@ def api_search():
     query = Tedarikci.query.filter_by(is_deleted=False, aktif=True)
     
     if q:
-        search_filter = f'%{q}%'
-        query = query.filter(
-            db.or_(
-                Tedarikci.unvan.ilike(search_filter),
-                Tedarikci.kisa_ad.ilike(search_filter)
-            )
-        )
+        query = arama_uygula(query, Tedarikci, q)
     
     if tip:
         query = query.filter(Tedarikci.tip == TedarikciTipi(tip))
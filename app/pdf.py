@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+TG Portal - PDF Üretimi
+Yazdırılabilir belgeler (araç teslim/iade formu; ileride sözleşme ve
+sipariş) WeasyPrint ile sunucu tarafında PDF'e çevrilir. Çeviri istek
+thread'inde değil, süreç başına sınırlı bir worker havuzunda yapılır.
+Üretilen PDF kaydın updated_at değeriyle anahtarlanıp diske yazılır;
+kayıt değişmedikçe sonraki indirmeler doğrudan diskten sunulur.
+
+gevent worker'larında havuz gerçek OS thread'leri kullanır; CPU yoğun
+çeviri sırasında hub diğer bağlantılara hizmet etmeye devam eder.
+"""
+
+import glob
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+
+from flask import current_app, render_template, send_file
+
+
+# Havuzda bekleyebilecek iş sayısı: worker sayısının katı
+KUYRUK_CARPANI = 4
+
+
+def _havuz_olustur(worker_sayisi):
+    try:
+        from gevent import monkey
+        if monkey.is_module_patched('threading'):
+            from gevent.threadpool import ThreadPoolExecutor as GeventThreadPoolExecutor
+            return GeventThreadPoolExecutor(max_workers=worker_sayisi)
+    except ImportError:
+        pass
+    return ThreadPoolExecutor(max_workers=worker_sayisi, thread_name_prefix='pdf-worker')
+
+
+def _url_getir(url):
+    """Yalnızca gömülü (data:) kaynaklara izin verilir; dışarıya istek atılmaz"""
+    from weasyprint import default_url_fetcher
+    if not url.startswith('data:'):
+        raise ValueError(f'PDF içinde harici kaynak kullanılamaz: {url[:80]}')
+    return default_url_fetcher(url)
+
+
+def _pdf_yaz(html, hedef, eski_desen):
+    """HTML'i PDF'e çevirip hedefe atomik olarak yazar (worker thread'inde)"""
+    from weasyprint import HTML
+    gecici = f'{hedef}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        HTML(string=html, url_fetcher=_url_getir).write_pdf(gecici)
+        os.replace(gecici, hedef)
+    finally:
+        if os.path.exists(gecici):
+            os.remove(gecici)
+    # Kaydın eski sürümlerine ait PDF'ler
+    for eski in glob.glob(eski_desen):
+        if eski != hedef:
+            try:
+                os.remove(eski)
+            except OSError:
+                pass
+
+
+class PdfUretici:
+    """Süreç içi PDF worker havuzu; aynı belge için tek üretim çalışır"""
+
+    def __init__(self, worker_sayisi):
+        self._havuz = _havuz_olustur(worker_sayisi)
+        self._limit = worker_sayisi * KUYRUK_CARPANI
+        self._kilit = threading.Lock()
+        self._suren = {}  # hedef yol -> future
+
+    def uret(self, hedef, html, eski_desen):
+        """Üretimi kuyruğa alır; havuz doluysa None döner"""
+        with self._kilit:
+            self._suren = {k: f for k, f in self._suren.items() if not f.done()}
+            future = self._suren.get(hedef)
+            if future is None:
+                if len(self._suren) >= self._limit:
+                    return None
+                future = self._havuz.submit(_pdf_yaz, html, hedef, eski_desen)
+                self._suren[hedef] = future
+            return future
+
+
+_uretici = None
+_uretici_kilit = threading.Lock()
+
+
+def get_uretici():
+    """Süreç başına tek üretici (fork sonrası ilk kullanımda oluşturulur)"""
+    global _uretici
+    with _uretici_kilit:
+        if _uretici is None:
+            _uretici = PdfUretici(current_app.config['PDF_WORKER_SAYISI'])
+        return _uretici
+
+
+def _cache_yolu(tur, kayit):
+    damga = kayit.updated_at.strftime('%Y%m%d%H%M%S%f')
+    klasor = current_app.config['PDF_CACHE_KLASORU']
+    os.makedirs(klasor, exist_ok=True)
+    onek = f"{tur}-{kayit.id}-v{current_app.config['PDF_SABLON_SURUMU']}"
+    return os.path.join(klasor, f'{onek}-{damga}.pdf'), os.path.join(klasor, f'{tur}-{kayit.id}-*.pdf')
+
+
+def pdf_gonder(tur, kayit, sablon, download_name, **baglam):
+    """
+    Kaydın PDF'ini gönderir; cache'te yoksa şablonu render edip havuzda
+    üretir ve PDF_BEKLEME_SANIYE kadar bekler.
+    Dönüş: (response, hata) - hata varsa response None
+    """
+    hedef, eski_desen = _cache_yolu(tur, kayit)
+
+    if not os.path.exists(hedef):
+        html = render_template(sablon, **baglam)
+        future = get_uretici().uret(hedef, html, eski_desen)
+        if future is None:
+            return None, 'PDF servisi şu an yoğun, lütfen biraz sonra tekrar deneyin.'
+        try:
+            future.result(timeout=current_app.config['PDF_BEKLEME_SANIYE'])
+        except FuturesTimeoutError:
+            # Üretim arka planda sürer; hazır olunca cache'ten sunulur
+            return None, 'PDF hazırlanıyor, birkaç saniye sonra tekrar deneyin.'
+        except Exception as e:
+            current_app.logger.error(f"PDF oluşturulamadı ({tur} {kayit.id}): {e}")
+            return None, 'PDF oluşturulamadı.'
+
+    response = send_file(hedef, mimetype='application/pdf', download_name=download_name,
+                         conditional=True, etag=os.path.basename(hedef)[:-4])
+    response.cache_control.private = True
+    return response, None
+
+
+def init_app(app):
+    """PDF ayarlarını uygulamaya bağlar (create_app içinden çağrılır)"""
+    app.config.setdefault('PDF_WORKER_SAYISI', 2)
+    app.config.setdefault('PDF_BEKLEME_SANIYE', 30)
+    app.config.setdefault('PDF_CACHE_KLASORU', os.path.join(app.config['UPLOAD_FOLDER'], 'pdf'))
+    # Şablonlar değişince artırılır; eski PDF'ler yeniden üretilir
+    app.config.setdefault('PDF_SABLON_SURUMU', 1)
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+TG Portal - İstek Bazlı SQL Profili
+Örneklenen isteklerde sorgu sayısı, toplam SQL süresi, en yavaş sorgular ve
+yalnızca parametreleri farklı tekrar eden sorgular (N+1 şüphesi) toplanır.
+Sonuç yanıt başlıklarına, tek satırlık JSON loga ve Ayarlar > SQL Profili
+sayfasına yansır. Örneklenmeyen isteklerde maliyet tek bir `g` kontrolüdür.
+"""
+
+import heapq
+import json
+import random
+import re
+import time
+from collections import Counter, deque
+
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.cache import liste_ekle, liste_oku
+
+
+PROFIL_LISTE_KEY = 'sql_profil:son'
+PROFIL_LISTE_LIMIT = 200
+
+# Redis yoksa süreç içinde tutulan son profiller
+_son_profiller = deque(maxlen=PROFIL_LISTE_LIMIT)
+
+_SAYI_RE = re.compile(r"\b\d+(\.\d+)?\b")
+_METIN_RE = re.compile(r"'(?:[^']|'')*'")
+_PARAM_LISTE_RE = re.compile(r"\(\s*(?:\?|%\(\w+\)s|%s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|%s|:\w+))*\s*\)")
+_BOSLUK_RE = re.compile(r"\s+")
+
+
+def sorgu_kalibi(statement):
+    """Sorguyu parametre ve literallerden arındırılmış kalıba çevirir"""
+    kalip = _METIN_RE.sub('?', statement)
+    kalip = _SAYI_RE.sub('?', kalip)
+    kalip = _PARAM_LISTE_RE.sub('(?)', kalip)
+    return _BOSLUK_RE.sub(' ', kalip).strip()
+
+
+class SqlProfil:
+    """Tek bir isteğin SQL ölçümleri"""
+    __slots__ = ('sayi', 'sure', 'yavaslar', 'sorgular', '_sira')
+
+    def __init__(self):
+        self.sayi = 0
+        self.sure = 0.0
+        self.yavaslar = []  # (süre, sıra, sorgu) min-heap
+        self.sorgular = Counter()
+        self._sira = 0
+
+    def ekle(self, statement, sure, yavas_limit):
+        self.sayi += 1
+        self.sure += sure
+        self.sorgular[statement] += 1
+        self._sira += 1
+        kayit = (sure, self._sira, statement)
+        if len(self.yavaslar) < yavas_limit:
+            heapq.heappush(self.yavaslar, kayit)
+        elif sure > self.yavaslar[0][0]:
+            heapq.heapreplace(self.yavaslar, kayit)
+
+    def ozet(self, tekrar_esigi, metin_limit=500):
+        # Parametreleri veya IN listesi uzunluğu farklı sorgular aynı kalıba düşer
+        kalip_sayilari = Counter()
+        for sorgu, adet in self.sorgular.items():
+            kalip_sayilari[sorgu_kalibi(sorgu)] += adet
+        return {
+            'sorgu_sayisi': self.sayi,
+            'sql_ms': round(self.sure * 1000, 1),
+            'yavaslar': [
+                {'sorgu': sorgu_kalibi(sorgu)[:metin_limit], 'ms': round(sure * 1000, 1)}
+                for sure, _, sorgu in sorted(self.yavaslar, reverse=True)
+            ],
+            'n_arti_bir': [
+                {'sorgu': kalip[:metin_limit], 'adet': adet}
+                for kalip, adet in kalip_sayilari.most_common() if adet >= tekrar_esigi
+            ],
+        }
+
+
+def _aktif_profil():
+    if not has_request_context():
+        return None
+    return g.get('_sql_profil')
+
+
+# Başlangıç zamanı bağlantıda değil execution context'te tutulur: hata veren
+# sorguda after_cursor_execute çağrılmaz, havuzdaki bağlantıda artık kalmaz
+@event.listens_for(Engine, 'before_cursor_execute')
+def _sorgu_basladi(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _aktif_profil() is not None:
+        context._sql_profil_baslangic = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _sorgu_bitti(conn, cursor, statement, parameters, context, executemany):
+    profil = _aktif_profil()
+    baslangic = getattr(context, '_sql_profil_baslangic', None)
+    if profil is None or baslangic is None:
+        return
+    profil.ekle(statement, time.perf_counter() - baslangic, g._sql_profil_yavas_limit)
+
+
+def _admin_mi():
+    from flask_login import current_user
+    return current_user.is_authenticated and current_user.is_admin
+
+
+def son_profiller(limit=PROFIL_LISTE_LIMIT):
+    """Son örneklenen isteklerin profilleri (yeniden eskiye)"""
+    kayitlar = liste_oku(PROFIL_LISTE_KEY, limit)
+    if kayitlar is None:
+        kayitlar = list(_son_profiller)[::-1][:limit]
+    return kayitlar
+
+
+def init_app(app):
+    """Profilleyiciyi uygulamaya bağlar (create_app içinden çağrılır)"""
+    app.config.setdefault('SQL_PROFIL_ORAN', 0.0)
+    app.config.setdefault('SQL_PROFIL_YAVAS_LIMIT', 5)
+    app.config.setdefault('SQL_PROFIL_TEKRAR_ESIGI', 5)
+    app.config.setdefault('SQL_PROFIL_BASLIK', True)
+
+    @app.before_request
+    def _profil_baslat():
+        if request.endpoint == 'static':
+            return
+        oran = app.config['SQL_PROFIL_ORAN']
+        if oran <= 0 or random.random() >= oran:
+            # Adminler başlıkla tek isteği profilleyebilir
+            if request.headers.get('X-SQL-Profil') != '1' or not _admin_mi():
+                return
+        g._sql_profil = SqlProfil()
+        g._sql_profil_yavas_limit = app.config['SQL_PROFIL_YAVAS_LIMIT']
+        g._sql_profil_baslangic = time.perf_counter()
+
+    @app.after_request
+    def _profil_bitir(response):
+        profil = g.pop('_sql_profil', None)
+        if profil is None:
+            return response
+
+        ozet = profil.ozet(app.config['SQL_PROFIL_TEKRAR_ESIGI'])
+        ozet.update({
+            'zaman': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'yol': request.path,
+            'endpoint': request.endpoint,
+            'metod': request.method,
+            'durum': response.status_code,
+            'istek_ms': round((time.perf_counter() - g._sql_profil_baslangic) * 1000, 1),
+        })
+
+        if app.config['SQL_PROFIL_BASLIK']:
+            response.headers['X-SQL-Count'] = str(ozet['sorgu_sayisi'])
+            response.headers['X-SQL-Time-Ms'] = str(ozet['sql_ms'])
+            response.headers['X-SQL-N1'] = str(len(ozet['n_arti_bir']))
+
+        log = {k: ozet[k] for k in ('yol', 'endpoint', 'metod', 'durum', 'istek_ms',
+                                    'sorgu_sayisi', 'sql_ms')}
+        log['n_arti_bir'] = [t['adet'] for t in ozet['n_arti_bir']]
+        app.logger.info('sql_profil %s', json.dumps(log, ensure_ascii=False))
+
+        if not liste_ekle(PROFIL_LISTE_KEY, ozet, PROFIL_LISTE_LIMIT):
+            _son_profiller.append(ozet)
+        return response
@@ -3,9 +3,11 @@
 TG Portal - Utility Functions & Decorators
 """
 
+from datetime import date, datetime, time, timedelta
 from functools import wraps
 from flask import abort, flash, redirect, url_for
 from flask_login import current_user
+from sqlalchemy import DateTime, and_, true
 
 
 def permission_required(permission):
@@ -98,3 +100,45 @@ def format_currency(amount, currency='TRY'):
 def enum_choices(enum_class):
     """Enum sınıfını form choices listesine çevirir"""
     return [(e.value, e.name.replace('_', ' ').title()) for e in enum_class]
+
+
+# Dönem filtreleri
+def donem_araligi(yil, ay=None):
+    """
+    (yıl, ay) dönemini yarı açık [başlangıç, bitiş) tarih aralığına çevirir;
+    ay verilmezse (ya da geçersizse) tüm yıl
+    """
+    if ay and 1 <= ay <= 12:
+        baslangic = date(yil, ay, 1)
+        bitis = date(yil + 1, 1, 1) if ay == 12 else date(yil, ay + 1, 1)
+    else:
+        baslangic, bitis = date(yil, 1, 1), date(yil + 1, 1, 1)
+    return baslangic, bitis
+
+
+def aralik_kosulu(kolon, baslangic, bitis):
+    """
+    kolon >= başlangıç AND kolon < bitiş. extract() / func.date() aksine
+    kolondaki b-tree indeksini kullanabilir. DateTime kolonlarda sınırlar
+    gün başına (00:00) çevrilir.
+    """
+    if isinstance(kolon.type, DateTime):
+        baslangic = datetime.combine(baslangic, time.min)
+        bitis = datetime.combine(bitis, time.min)
+    return and_(kolon >= baslangic, kolon < bitis)
+
+
+def donem_kosulu(kolon, yil=None, ay=None):
+    """
+    extract('year', kolon) == yil [AND extract('month', kolon) == ay] yerine
+    kullanılacak aralık koşulu; yıl yoksa filtre uygulanmaz
+    """
+    if not yil:
+        return true()
+    return aralik_kosulu(kolon, *donem_araligi(yil, ay))
+
+
+def gun_kosulu(kolon, gun=None):
+    """func.date(kolon) == gün yerine aralık koşulu (varsayılan: bugün)"""
+    gun = gun or date.today()
+    return aralik_kosulu(kolon, gun, gun + timedelta(days=1))
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""
+TG Portal - Gunicorn Ayarları
+Anlık bildirim (SSE) bağlantıları uzun süre açık kaldığı için gevent
+worker kullanılır; her bağlantı bir thread yerine bir greenlet tutar.
+"""
+
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 2))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gevent')
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+# Worker heartbeat zaman aşımı; gevent worker'da uzun SSE isteklerini etkilemez
+timeout = 60
+keepalive = 5
+
+
+def post_fork(server, worker):
+    # psycopg2 soketleri gevent hub'ını bloklamasın
+    if worker_class == 'gevent':
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
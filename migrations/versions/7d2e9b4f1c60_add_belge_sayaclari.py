@@ -0,0 +1,50 @@
+"""Add belge sayaclari
+
+Revision ID: 7d2e9b4f1c60
+Revises: a3f1c7d2e845
+Create Date: 2026-10-18 11:02:41.318274
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d2e9b4f1c60'
+down_revision = 'a3f1c7d2e845'
+branch_labels = None
+depends_on = None
+
+
+# (önek, tablo, kolon)
+NUMARALI_BELGELER = [
+    ('TLP', 'talepler', 'talep_no'),
+    ('SAT', 'satinalma_talepleri', 'talep_no'),
+    ('SIP', 'satinalma_siparisleri', 'siparis_no'),
+]
+
+
+def upgrade():
+    op.create_table('belge_sayaclari',
+    sa.Column('onek', sa.String(length=10), nullable=False),
+    sa.Column('yil', sa.Integer(), nullable=False),
+    sa.Column('deger', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('onek', 'yil')
+    )
+
+    # Sayaçları mevcut en büyük numaralardan başlat
+    if op.get_bind().dialect.name == 'postgresql':
+        for onek, tablo, kolon in NUMARALI_BELGELER:
+            op.execute(f"""
+                INSERT INTO belge_sayaclari (onek, yil, deger)
+                SELECT '{onek}',
+                       CAST(split_part({kolon}, '-', 2) AS integer),
+                       MAX(CAST(split_part({kolon}, '-', 3) AS integer))
+                FROM {tablo}
+                WHERE {kolon} ~ '^{onek}-[0-9]{{4}}-[0-9]+$'
+                GROUP BY 2
+            """)
+
+
+def downgrade():
+    op.drop_table('belge_sayaclari')
@@ -0,0 +1,41 @@
+"""Add tarih araligi indeksleri
+
+Revision ID: a3c5e8f1b2d7
+Revises: f2a9c3e7b154
+Create Date: 2026-10-18 21:14:52.903517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c5e8f1b2d7'
+down_revision = 'f2a9c3e7b154'
+branch_labels = None
+depends_on = None
+
+
+# Tablo -> (indeks adı, kolonlar)
+INDEKSLER = (
+    ('masraflar', 'ix_masraflar_is_deleted_masraf_tarihi', ['is_deleted', 'masraf_tarihi']),
+    ('talepler', 'ix_talepler_is_deleted_created_at', ['is_deleted', 'created_at']),
+    ('satinalma_talepleri', 'ix_satinalma_talepleri_is_deleted_talep_tarihi', ['is_deleted', 'talep_tarihi']),
+    ('satinalma_siparisleri', 'ix_satinalma_siparisleri_is_deleted_siparis_tarihi', ['is_deleted', 'siparis_tarihi']),
+    ('sozlesmeler', 'ix_sozlesmeler_durum_bitis_tarihi', ['durum', 'bitis_tarihi']),
+    ('onay_kayitlari', 'ix_onay_kayitlari_onaylayici_durum_islem_tarihi', ['onaylayici_id', 'durum', 'islem_tarihi']),
+    ('egitimler', 'ix_egitimler_baslangic_tarihi', ['baslangic_tarihi']),
+    ('calisanlar', 'ix_calisanlar_is_deleted_ise_baslama', ['is_deleted', 'ise_baslama']),
+)
+
+
+def upgrade():
+    for tablo, ad, kolonlar in INDEKSLER:
+        with op.batch_alter_table(tablo, schema=None) as batch_op:
+            batch_op.create_index(ad, kolonlar, unique=False)
+
+
+def downgrade():
+    for tablo, ad, _ in reversed(INDEKSLER):
+        with op.batch_alter_table(tablo, schema=None) as batch_op:
+            batch_op.drop_index(ad)
@@ -0,0 +1,49 @@
+"""Add talep sla kolonlari
+
+Revision ID: a3f1c7d2e845
+Revises: 4c69ee301536
+Create Date: 2026-10-18 10:21:07.552913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3f1c7d2e845'
+down_revision = '4c69ee301536'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('talepler', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('sla_yanit_bitis', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('sla_cozum_bitis', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('sla_asildi', sa.Boolean(), server_default=sa.false(), nullable=False))
+        batch_op.add_column(sa.Column('sla_asim_tarihi', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_talepler_sla_cozum_bitis_bekleyen', ['sla_cozum_bitis'], unique=False,
+                              postgresql_where=sa.text('sla_asildi = false'))
+
+    # Mevcut talepler için bitiş zamanlarını ve aşımları doldur
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("""
+            UPDATE talepler t SET
+                sla_yanit_bitis = COALESCE(t.atanma_tarihi, t.created_at) + k.sla_cevap * INTERVAL '1 hour',
+                sla_cozum_bitis = t.created_at + k.sla_cozum * INTERVAL '1 hour'
+            FROM talep_kategorileri k
+            WHERE k.id = t.kategori_id
+        """)
+        op.execute("""
+            UPDATE talepler SET sla_asildi = true, sla_asim_tarihi = sla_cozum_bitis
+            WHERE sla_cozum_bitis < COALESCE(cozum_tarihi, kapatma_tarihi, now() AT TIME ZONE 'utc')
+        """)
+
+
+def downgrade():
+    with op.batch_alter_table('talepler', schema=None) as batch_op:
+        batch_op.drop_index('ix_talepler_sla_cozum_bitis_bekleyen', postgresql_where=sa.text('sla_asildi = false'))
+        batch_op.drop_column('sla_asim_tarihi')
+        batch_op.drop_column('sla_asildi')
+        batch_op.drop_column('sla_cozum_bitis')
+        batch_op.drop_column('sla_yanit_bitis')
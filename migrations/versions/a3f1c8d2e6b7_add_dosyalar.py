@@ -0,0 +1,36 @@
+"""Add dosyalar (icerik adresli depo)
+
+Revision ID: a3f1c8d2e6b7
+Revises: e2c7f49a8b31
+Create Date: 2026-10-18 16:02:17.448390
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3f1c8d2e6b7'
+down_revision = 'e2c7f49a8b31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('dosyalar',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('ozet', sa.String(length=64), nullable=False),
+    sa.Column('boyut', sa.BigInteger(), nullable=False),
+    sa.Column('mime_tipi', sa.String(length=100), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('dosyalar', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_dosyalar_ozet'), ['ozet'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('dosyalar', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_dosyalar_ozet'))
+
+    op.drop_table('dosyalar')
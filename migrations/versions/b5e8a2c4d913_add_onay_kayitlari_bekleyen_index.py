@@ -0,0 +1,27 @@
+"""Add onay_kayitlari bekleyen index
+
+Revision ID: b5e8a2c4d913
+Revises: 7d2e9b4f1c60
+Create Date: 2026-10-18 13:42:18.204511
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e8a2c4d913'
+down_revision = '7d2e9b4f1c60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('onay_kayitlari', schema=None) as batch_op:
+        batch_op.create_index('ix_onay_kayitlari_onaylayici_bekleyen', ['onaylayici_id', 'talep_id'], unique=False,
+                              postgresql_where=sa.text("durum = 'bekliyor'"))
+
+
+def downgrade():
+    with op.batch_alter_table('onay_kayitlari', schema=None) as batch_op:
+        batch_op.drop_index('ix_onay_kayitlari_onaylayici_bekleyen', postgresql_where=sa.text("durum = 'bekliyor'"))
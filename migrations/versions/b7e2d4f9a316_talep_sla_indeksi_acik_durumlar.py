@@ -0,0 +1,37 @@
+"""Talep sla indeksi acik durumlar
+
+Revision ID: b7e2d4f9a316
+Revises: a3c5e8f1b2d7
+Create Date: 2026-10-18 22:03:17.418520
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e2d4f9a316'
+down_revision = 'a3c5e8f1b2d7'
+branch_labels = None
+depends_on = None
+
+
+# app/models/talep.py: ACIK_DURUMLAR ile aynı olmalı
+YENI_KOSUL = "sla_asildi = false AND durum IN ('acik', 'atandi', 'devam_ediyor', 'beklemede')"
+ESKI_KOSUL = 'sla_asildi = false'
+
+
+def _indeksi_degistir(kosul):
+    with op.batch_alter_table('talepler', schema=None) as batch_op:
+        batch_op.drop_index('ix_talepler_sla_cozum_bitis_bekleyen')
+        batch_op.create_index('ix_talepler_sla_cozum_bitis_bekleyen', ['sla_cozum_bitis'], unique=False,
+                              postgresql_where=sa.text(kosul))
+
+
+def upgrade():
+    # Zamanında kapanan taleplerin bayrağı false kalır; eski koşulda indeks tüm geçmişle büyüyordu
+    _indeksi_degistir(YENI_KOSUL)
+
+
+def downgrade():
+    _indeksi_degistir(ESKI_KOSUL)
@@ -0,0 +1,26 @@
+"""Sms son gecerlilik
+
+Revision ID: c4e1a7d93f25
+Revises: b7e2d4f9a316
+Create Date: 2026-10-18 22:41:06.275194
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e1a7d93f25'
+down_revision = 'b7e2d4f9a316'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('sms_mesajlari', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('son_gecerlilik', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('sms_mesajlari', schema=None) as batch_op:
+        batch_op.drop_column('son_gecerlilik')
@@ -0,0 +1,43 @@
+"""Add dosya turevleri
+
+Revision ID: c7d4e1a9f205
+Revises: a3f1c8d2e6b7
+Create Date: 2026-10-18 17:10:42.905113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d4e1a9f205'
+down_revision = 'a3f1c8d2e6b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('dosyalar', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('turev_durumu', sa.String(length=20), nullable=True))
+        batch_op.create_index(batch_op.f('ix_dosyalar_turev_durumu'), ['turev_durumu'], unique=False)
+
+    op.create_table('dosya_turevleri',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('dosya_id', sa.Integer(), nullable=False),
+    sa.Column('tur', sa.String(length=20), nullable=False),
+    sa.Column('turev_id', sa.Integer(), nullable=False),
+    sa.Column('genislik', sa.Integer(), nullable=True),
+    sa.Column('yukseklik', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['dosya_id'], ['dosyalar.id'], ),
+    sa.ForeignKeyConstraint(['turev_id'], ['dosyalar.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('dosya_id', 'tur', name='uq_dosya_turevleri_dosya_tur')
+    )
+
+
+def downgrade():
+    op.drop_table('dosya_turevleri')
+
+    with op.batch_alter_table('dosyalar', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_dosyalar_turev_durumu'))
+        batch_op.drop_column('turev_durumu')
@@ -0,0 +1,69 @@
+"""Add arama kolonlari
+
+Revision ID: d4b8e2f61a93
+Revises: c7d4e1a9f205
+Create Date: 2026-10-18 18:02:14.318406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4b8e2f61a93'
+down_revision = 'c7d4e1a9f205'
+branch_labels = None
+depends_on = None
+
+
+# app/arama.py: ARAMA_ALANLARI ve TR_KAYNAK/TR_HEDEF ile aynı olmalı
+ARAMA_ALANLARI = {
+    'calisanlar': ('ad', 'soyad', 'sicil_no', 'email'),
+    'araclar': ('plaka', 'marka', 'model'),
+    'tedarikciler': ('unvan', 'kisa_ad', 'vergi_no', 'yetkili_adi'),
+}
+
+
+def _metin(alanlar):
+    birlesim = " || ' ' || ".join(f"coalesce({alan}, '')" for alan in alanlar)
+    return f'tr_normalize({birlesim})'
+
+
+def upgrade():
+    # Arama kolonları yalnızca PostgreSQL'de (diğerlerinde ILIKE kullanılır)
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.execute("""
+        CREATE OR REPLACE FUNCTION tr_normalize(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE
+        AS $$ SELECT lower(translate($1, 'İIıŞşĞğÜüÖöÇçÂâÎîÛû', 'iiissgguuooccaaiiuu')) $$
+    """)
+
+    for tablo, alanlar in ARAMA_ALANLARI.items():
+        metin = _metin(alanlar)
+        op.execute(f"""
+            ALTER TABLE {tablo}
+                ADD COLUMN arama_metni text GENERATED ALWAYS AS ({metin}) STORED,
+                ADD COLUMN arama_vektoru tsvector
+                    GENERATED ALWAYS AS (to_tsvector('simple'::regconfig, {metin})) STORED
+        """)
+        op.create_index(f'ix_{tablo}_arama_metni_trgm', tablo, ['arama_metni'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'arama_metni': 'gin_trgm_ops'})
+        op.create_index(f'ix_{tablo}_arama_vektoru', tablo, ['arama_vektoru'], unique=False,
+                        postgresql_using='gin')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    for tablo in ARAMA_ALANLARI:
+        op.drop_index(f'ix_{tablo}_arama_vektoru', table_name=tablo)
+        op.drop_index(f'ix_{tablo}_arama_metni_trgm', table_name=tablo)
+        with op.batch_alter_table(tablo, schema=None) as batch_op:
+            batch_op.drop_column('arama_vektoru')
+            batch_op.drop_column('arama_metni')
+
+    op.execute('DROP FUNCTION IF EXISTS tr_normalize(text)')
@@ -0,0 +1,48 @@
+"""Talep sla yanit asimi
+
+Revision ID: d8b3f6a1c472
+Revises: c4e1a7d93f25
+Create Date: 2026-10-18 23:05:44.731826
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8b3f6a1c472'
+down_revision = 'c4e1a7d93f25'
+branch_labels = None
+depends_on = None
+
+
+# app/models/talep.py: ACIK_DURUMLAR ile aynı olmalı
+YANIT_KOSULU = ("sla_yanit_asildi = false AND ilk_yanit_tarihi IS NULL "
+                "AND durum IN ('acik', 'atandi', 'devam_ediyor', 'beklemede')")
+
+
+def upgrade():
+    with op.batch_alter_table('talepler', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('sla_yanit_asildi', sa.Boolean(), server_default=sa.false(), nullable=False))
+        batch_op.create_index('ix_talepler_sla_yanit_bitis_bekleyen', ['sla_yanit_bitis'], unique=False,
+                              postgresql_where=sa.text(YANIT_KOSULU))
+
+    if op.get_bind().dialect.name == 'postgresql':
+        # Yanıt süresi artık atamadan değil oluşturmadan sayılır
+        op.execute("""
+            UPDATE talepler t SET
+                sla_yanit_bitis = t.created_at + k.sla_cevap * INTERVAL '1 hour'
+            FROM talep_kategorileri k
+            WHERE k.id = t.kategori_id
+        """)
+        op.execute("""
+            UPDATE talepler SET sla_yanit_asildi = true
+            WHERE sla_yanit_bitis < COALESCE(ilk_yanit_tarihi, cozum_tarihi, kapatma_tarihi,
+                                             now() AT TIME ZONE 'utc')
+        """)
+
+
+def downgrade():
+    with op.batch_alter_table('talepler', schema=None) as batch_op:
+        batch_op.drop_index('ix_talepler_sla_yanit_bitis_bekleyen', postgresql_where=sa.text(YANIT_KOSULU))
+        batch_op.drop_column('sla_yanit_asildi')
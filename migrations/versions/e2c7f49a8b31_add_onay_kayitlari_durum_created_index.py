@@ -0,0 +1,26 @@
+"""Add onay_kayitlari durum created_at index
+
+Revision ID: e2c7f49a8b31
+Revises: b5e8a2c4d913
+Create Date: 2026-10-18 14:31:55.617203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2c7f49a8b31'
+down_revision = 'b5e8a2c4d913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('onay_kayitlari', schema=None) as batch_op:
+        batch_op.create_index('ix_onay_kayitlari_durum_created_at', ['durum', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('onay_kayitlari', schema=None) as batch_op:
+        batch_op.drop_index('ix_onay_kayitlari_durum_created_at')
@@ -0,0 +1,126 @@
+"""Aktivite loglari bolumleme
+
+Revision ID: e6f1a4c9d287
+Revises: d4b8e2f61a93
+Create Date: 2026-10-18 19:12:40.226871
+
+"""
+from datetime import date, datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6f1a4c9d287'
+down_revision = 'd4b8e2f61a93'
+branch_labels = None
+depends_on = None
+
+
+KOLONLAR = 'id, kullanici_id, eylem, modul, aciklama, detay, ip_adresi, user_agent, tarih'
+
+INDEKSLER = (
+    ('ix_aktivite_loglari_tarih_id', ['tarih', 'id']),
+    ('ix_aktivite_loglari_eylem_tarih', ['eylem', 'tarih']),
+    ('ix_aktivite_loglari_modul_tarih', ['modul', 'tarih']),
+    ('ix_aktivite_loglari_kullanici_tarih', ['kullanici_id', 'tarih']),
+)
+
+# Bu aydan sonra önceden oluşturulan bölüm sayısı (app/aktivite.py ile aynı)
+ILERI_BOLUM_SAYISI = 2
+
+
+def _ay_ekle(gun, ay):
+    yil, ay = divmod(gun.month - 1 + ay, 12)
+    return date(gun.year + yil, ay + 1, 1)
+
+
+def _bolumlu_upgrade():
+    op.execute("UPDATE aktivite_loglari SET tarih = now() AT TIME ZONE 'utc' WHERE tarih IS NULL")
+    op.execute('ALTER TABLE aktivite_loglari RENAME TO aktivite_loglari_eski')
+    op.execute('ALTER TABLE aktivite_loglari_eski RENAME CONSTRAINT aktivite_loglari_pkey TO aktivite_loglari_eski_pkey')
+    op.execute('ALTER SEQUENCE aktivite_loglari_id_seq OWNED BY NONE')
+
+    # Bölüm anahtarı birincil anahtarın parçası olmalı
+    op.execute("""
+        CREATE TABLE aktivite_loglari (
+            id integer NOT NULL DEFAULT nextval('aktivite_loglari_id_seq'),
+            kullanici_id integer REFERENCES users (id),
+            eylem varchar(50) NOT NULL,
+            modul varchar(50),
+            aciklama varchar(255),
+            detay text,
+            ip_adresi varchar(50),
+            user_agent varchar(255),
+            tarih timestamp without time zone NOT NULL,
+            CONSTRAINT aktivite_loglari_pkey PRIMARY KEY (id, tarih)
+        ) PARTITION BY RANGE (tarih)
+    """)
+    op.execute('ALTER SEQUENCE aktivite_loglari_id_seq OWNED BY aktivite_loglari.id')
+    op.execute('CREATE TABLE aktivite_loglari_varsayilan PARTITION OF aktivite_loglari DEFAULT')
+
+    # Mevcut kayıtların ilk ayından itibaren aylık bölümler
+    bu_ay = datetime.utcnow().date().replace(day=1)
+    en_eski = op.get_bind().execute(sa.text('SELECT min(tarih) FROM aktivite_loglari_eski')).scalar()
+    ay = en_eski.date().replace(day=1) if en_eski else bu_ay
+    while ay <= _ay_ekle(bu_ay, ILERI_BOLUM_SAYISI):
+        op.execute(
+            f"CREATE TABLE aktivite_loglari_{ay:%Y_%m} PARTITION OF aktivite_loglari "
+            f"FOR VALUES FROM ('{ay}') TO ('{_ay_ekle(ay, 1)}')"
+        )
+        ay = _ay_ekle(ay, 1)
+
+    op.execute(f'INSERT INTO aktivite_loglari ({KOLONLAR}) SELECT {KOLONLAR} FROM aktivite_loglari_eski')
+    op.execute('DROP TABLE aktivite_loglari_eski')
+
+    # Bölümlü tabloda oluşturulan indeksler tüm bölümlere uygulanır
+    for ad, kolonlar in INDEKSLER:
+        op.create_index(ad, 'aktivite_loglari', kolonlar, unique=False)
+
+
+def _bolumlu_downgrade():
+    op.execute('ALTER TABLE aktivite_loglari RENAME TO aktivite_loglari_bolumlu')
+    op.execute('ALTER TABLE aktivite_loglari_bolumlu RENAME CONSTRAINT aktivite_loglari_pkey TO aktivite_loglari_bolumlu_pkey')
+    op.execute('ALTER SEQUENCE aktivite_loglari_id_seq OWNED BY NONE')
+
+    op.create_table('aktivite_loglari',
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('aktivite_loglari_id_seq')"), nullable=False),
+    sa.Column('kullanici_id', sa.Integer(), nullable=True),
+    sa.Column('eylem', sa.String(length=50), nullable=False),
+    sa.Column('modul', sa.String(length=50), nullable=True),
+    sa.Column('aciklama', sa.String(length=255), nullable=True),
+    sa.Column('detay', sa.Text(), nullable=True),
+    sa.Column('ip_adresi', sa.String(length=50), nullable=True),
+    sa.Column('user_agent', sa.String(length=255), nullable=True),
+    sa.Column('tarih', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['kullanici_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute('ALTER SEQUENCE aktivite_loglari_id_seq OWNED BY aktivite_loglari.id')
+    op.execute(f'INSERT INTO aktivite_loglari ({KOLONLAR}) SELECT {KOLONLAR} FROM aktivite_loglari_bolumlu')
+    # Bölümler üst tabloyla birlikte silinir
+    op.execute('DROP TABLE aktivite_loglari_bolumlu')
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        _bolumlu_upgrade()
+        return
+
+    op.execute('UPDATE aktivite_loglari SET tarih = CURRENT_TIMESTAMP WHERE tarih IS NULL')
+    with op.batch_alter_table('aktivite_loglari', schema=None) as batch_op:
+        batch_op.alter_column('tarih', existing_type=sa.DateTime(), nullable=False)
+        for ad, kolonlar in INDEKSLER:
+            batch_op.create_index(ad, kolonlar, unique=False)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        _bolumlu_downgrade()
+        return
+
+    with op.batch_alter_table('aktivite_loglari', schema=None) as batch_op:
+        for ad, _ in reversed(INDEKSLER):
+            batch_op.drop_index(ad)
+        batch_op.alter_column('tarih', existing_type=sa.DateTime(), nullable=True)
@@ -0,0 +1,57 @@
+"""Add rapor ozetleri
+
+Revision ID: f2a9c3e7b154
+Revises: e6f1a4c9d287
+Create Date: 2026-10-18 20:05:31.648210
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a9c3e7b154'
+down_revision = 'e6f1a4c9d287'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('rapor_ozetleri',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kaynak', sa.String(length=30), nullable=False),
+    sa.Column('donem', sa.Date(), nullable=True),
+    sa.Column('kategori_id', sa.Integer(), nullable=True),
+    sa.Column('durum', sa.String(length=30), nullable=True),
+    sa.Column('departman_id', sa.Integer(), nullable=True),
+    sa.Column('oncelik', sa.String(length=20), nullable=True),
+    sa.Column('adet', sa.Integer(), nullable=False),
+    sa.Column('tutar', sa.Numeric(precision=14, scale=2), nullable=True),
+    sa.Column('sla_asim', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('rapor_ozetleri', schema=None) as batch_op:
+        batch_op.create_index('ix_rapor_ozetleri_kaynak_donem', ['kaynak', 'donem'], unique=False)
+
+    op.create_table('rapor_ozet_kuyrugu',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kaynak', sa.String(length=30), nullable=False),
+    sa.Column('donem', sa.Date(), nullable=True),
+    sa.Column('tam', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    # İlk hesaplama: worker kuyruktaki 'tam' kayıtlarıyla tüm ayları toplar
+    op.execute("INSERT INTO rapor_ozet_kuyrugu (kaynak, tam) VALUES "
+               "('masraf', true), ('satinalma_talebi', true), ('satinalma_siparisi', true), "
+               "('talep', true), ('calisan', true)")
+
+
+def downgrade():
+    op.drop_table('rapor_ozet_kuyrugu')
+
+    with op.batch_alter_table('rapor_ozetleri', schema=None) as batch_op:
+        batch_op.drop_index('ix_rapor_ozetleri_kaynak_donem')
+
+    op.drop_table('rapor_ozetleri')
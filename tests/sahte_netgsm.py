@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+TG Portal - Yerel Sahte NetGSM Sunucusu
+SMS worker'ını gerçek servise gitmeden çalıştırmak için NetGSM'in
+/sms/send/get/ uç noktasını taklit eder. Testler NETGSM_API_URL'i bu
+sunucunun adresine yönlendirir; elle denemek için:
+
+    python -m tests.sahte_netgsm 8025
+    NETGSM_API_URL=http://127.0.0.1:8025 flask sms-worker --once
+"""
+
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class SahteNetgsm:
+    """
+    Gelen gönderim isteklerini `istekler` listesine kaydeder. Yanıtı
+    `yanitla(params)` belirler ve (HTTP durum kodu, gövde) döndürür;
+    verilmezse her istek "00 <bulk_id>" ile başarılı sayılır.
+    """
+
+    def __init__(self, yanitla=None, port=0):
+        self.istekler = []
+        self.yanitla = yanitla or self.basarili
+        self._kilit = threading.Lock()
+        self._bulk_id = 0
+        self._thread = None
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), self._isleyici())
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}'
+
+    def _isleyici(self):
+        sunucu = self
+
+        class Isleyici(BaseHTTPRequestHandler):
+            def do_GET(self):
+                adres = urlsplit(self.path)
+                if adres.path.rstrip('/') != '/sms/send/get':
+                    self.send_error(404)
+                    return
+                params = {ad: degerler[0] for ad, degerler in parse_qs(adres.query).items()}
+                with sunucu._kilit:
+                    sunucu.istekler.append(params)
+                durum, govde = sunucu.yanitla(params)
+                veri = govde.encode('utf-8')
+                self.send_response(durum)
+                self.send_header('Content-Type', 'text/plain; charset=utf-8')
+                self.send_header('Content-Length', str(len(veri)))
+                self.end_headers()
+                self.wfile.write(veri)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Isleyici
+
+    def basarili(self, params):
+        with self._kilit:
+            self._bulk_id += 1
+            return 200, f'00 {self._bulk_id}'
+
+    @staticmethod
+    def alicilar(params):
+        """İsteğin 1:N alıcı listesi"""
+        return params['gsmno'].split(',')
+
+    def baslat(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def durdur(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.baslat()
+
+    def __exit__(self, *exc):
+        self.durdur()
+
+
+if __name__ == '__main__':
+    sunucu = SahteNetgsm(port=int(sys.argv[1]) if len(sys.argv) > 1 else 8025)
+    print(f'Sahte NetGSM: {sunucu.url}')
+    try:
+        sunucu.httpd.serve_forever()
+    except KeyboardInterrupt:
+        sunucu.httpd.server_close()
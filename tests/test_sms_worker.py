@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+SMS kuyruğu worker'ı: sahte NetGSM sunucusuna karşı kuyruktan alma,
+1:N gruplu gönderim, geri çekilmeli tekrar deneme ve Aday.sms_durumu.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from tests.sahte_netgsm import SahteNetgsm
+
+
+GERI_CEKILME = 30  # saniye
+
+
+@pytest.fixture
+def netgsm():
+    with SahteNetgsm() as sunucu:
+        yield sunucu
+
+
+@pytest.fixture
+def app(monkeypatch, netgsm):
+    monkeypatch.setenv('DATABASE_URL', 'sqlite://')
+    monkeypatch.setenv('REDIS_URL', '')
+    monkeypatch.setenv('SQL_PROFIL_ORAN', '0')
+    monkeypatch.setenv('NETGSM_USERCODE', 'tgportal')
+    monkeypatch.setenv('NETGSM_PASSWORD', 'gizli')
+    monkeypatch.setenv('NETGSM_HEADER', 'TEAMGUERILA')
+    monkeypatch.setenv('NETGSM_API_URL', netgsm.url)
+    monkeypatch.setenv('NO_PROXY', '127.0.0.1')
+
+    from app import create_app, db
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def gonderici(app):
+    from app.modules.basvuru.sms import NetgsmIstemci, SmsGonderici
+    gonderici = SmsGonderici(NetgsmIstemci.from_config(app.config), geri_cekilme=GERI_CEKILME)
+    yield gonderici
+    gonderici.executor.shutdown()
+
+
+def _aday(telefon):
+    from app import db
+    from app.models.ik import Aday
+    aday = Aday(ad='Deneme', soyad='Aday', telefon=telefon)
+    db.session.add(aday)
+    return aday
+
+
+def _kuyruga(aday, mesaj, **kwargs):
+    from app.modules.basvuru.sms import kuyruga_ekle
+    return kuyruga_ekle(aday.telefon, mesaj, aday=aday, **kwargs)
+
+
+def _zamani_getir(*mesajlar):
+    """Geri çekilme süresinin geçtiğini taklit eder"""
+    from app import db
+    for sms in mesajlar:
+        sms.sonraki_deneme = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+
+
+def test_ayni_metin_tek_istekte_gonderilir(app, netgsm, gonderici):
+    from app import db
+    adaylar = [_aday(f'0532 000 00 0{i}') for i in range(3)]
+    davetler = [_kuyruga(a, 'Davet linkiniz: https://portal/b/x', tip='davet') for a in adaylar]
+    tek = _kuyruga(_aday('+905330000000'), 'Baska metin')
+    db.session.commit()
+
+    assert gonderici.bir_tur() == 4
+    assert len(netgsm.istekler) == 2
+
+    toplu = next(i for i in netgsm.istekler if i['message'].startswith('Davet'))
+    assert sorted(netgsm.alicilar(toplu)) == ['5320000000', '5320000001', '5320000002']
+    assert toplu['usercode'] == 'tgportal'
+    assert toplu['msgheader'] == 'TEAMGUERILA'
+
+    for sms in davetler + [tek]:
+        assert sms.durum == 'gonderildi'
+        assert sms.deneme == 1
+        assert sms.saglayici_id
+        assert sms.aday.sms_durumu == 'gonderildi'
+    assert len({sms.saglayici_id for sms in davetler}) == 1
+
+
+def test_otp_kuyrukta_once_alinir(app, netgsm, gonderici):
+    from app import db
+    gonderici.batch_boyutu = 1
+    davet = _kuyruga(_aday('05320000001'), 'Davet', tip='davet')
+    otp = _kuyruga(_aday('05320000002'), 'Kod: 123456', tip='otp')
+    db.session.commit()
+
+    assert gonderici.bir_tur() == 1
+    assert [i['message'] for i in netgsm.istekler] == ['Kod: 123456']
+    assert otp.durum == 'gonderildi'
+    assert davet.durum == 'bekliyor'
+
+
+def test_gecici_hata_geri_cekilme_ile_tekrar_denenir(app, netgsm, gonderici):
+    from app import db
+    yanitlar = [(500, 'Internal Server Error'), (503, 'Service Unavailable')]
+    netgsm.yanitla = lambda params: yanitlar.pop(0) if yanitlar else netgsm.basarili(params)
+    sms = _kuyruga(_aday('05320000001'), 'Davet', tip='davet')
+    db.session.commit()
+
+    for deneme in (1, 2):
+        baslangic = datetime.utcnow()
+        assert gonderici.bir_tur() == 1
+        assert sms.durum == 'bekliyor'
+        assert sms.deneme == deneme
+        assert sms.hata.startswith('SMS servisi HTTP 50')
+        assert sms.aday.sms_durumu == 'kuyrukta'
+        # 30, 60, ... saniye
+        bekleme = (sms.sonraki_deneme - baslangic).total_seconds()
+        assert GERI_CEKILME * 2 ** (deneme - 1) - 1 <= bekleme <= GERI_CEKILME * 2 ** (deneme - 1) + 1
+
+        # Süre dolmadan tekrar alınmaz
+        assert gonderici.bir_tur() == 0
+        assert len(netgsm.istekler) == deneme
+        _zamani_getir(sms)
+
+    assert gonderici.bir_tur() == 1
+    assert len(netgsm.istekler) == 3
+    assert sms.durum == 'gonderildi'
+    assert sms.hata is None
+    assert sms.aday.sms_durumu == 'gonderildi'
+    assert sms.aday.sms_hata is None
+
+
+def test_kalici_hata_tekrar_denenmez(app, netgsm, gonderici):
+    from app import db
+    netgsm.yanitla = lambda params: (200, '30')
+    sms = _kuyruga(_aday('05320000001'), 'Davet', tip='davet')
+    db.session.commit()
+
+    assert gonderici.bir_tur() == 1
+    assert sms.durum == 'hata'
+    assert sms.aday.sms_durumu == 'hata'
+    assert sms.aday.sms_hata == 'Geçersiz kullanıcı/şifre'
+
+    _zamani_getir(sms)
+    assert gonderici.bir_tur() == 0
+    assert len(netgsm.istekler) == 1
+
+
+def test_deneme_siniri_asilinca_hata(app, netgsm, gonderici):
+    from app import db
+    gonderici.max_deneme = 2
+    netgsm.yanitla = lambda params: (500, 'Internal Server Error')
+    sms = _kuyruga(_aday('05320000001'), 'Davet', tip='davet')
+    db.session.commit()
+
+    assert gonderici.bir_tur() == 1
+    assert sms.durum == 'bekliyor'
+    _zamani_getir(sms)
+    assert gonderici.bir_tur() == 1
+    assert sms.durum == 'hata'
+    assert sms.deneme == 2
+    assert sms.aday.sms_durumu == 'hata'
+
+
+def test_otp_gecerlilik_suresinden_sonra_denenmez(app, netgsm, gonderici):
+    from app import db
+    netgsm.yanitla = lambda params: (500, 'Internal Server Error')
+    # İlk geri çekilme (30 sn) kodun kalan süresini aşıyor
+    sms = _kuyruga(_aday('05320000001'), 'Kod: 123456', tip='otp',
+                   son_gecerlilik=datetime.utcnow() + timedelta(seconds=10))
+    db.session.commit()
+
+    assert gonderici.bir_tur() == 1
+    assert sms.durum == 'hata'
+    assert sms.aday.sms_durumu == 'hata'
+
+
+def test_suresi_dolan_otp_gonderilmez(app, netgsm, gonderici):
+    from app import db
+    from app.modules.basvuru.sms import SURE_DOLDU_HATASI
+    sms = _kuyruga(_aday('05320000001'), 'Kod: 123456', tip='otp',
+                   son_gecerlilik=datetime.utcnow() - timedelta(seconds=1))
+    db.session.commit()
+
+    assert gonderici.bir_tur() == 0
+    assert netgsm.istekler == []
+    assert sms.durum == 'hata'
+    assert sms.hata == SURE_DOLDU_HATASI
+    assert sms.aday.sms_durumu == 'hata'